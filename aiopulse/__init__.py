@@ -1,22 +1,33 @@
 """Rollease Acmeda Automate Pulse asyncio protocol implementation."""
 
+import importlib
 import logging
+from typing import TYPE_CHECKING, Any
 
-from aiopulse.const import UpdateType
-from aiopulse.errors import (
-    CannotConnectException,
-    InvalidResponseException,
-    NotConnectedException,
-    NotRunningException,
-)
-from aiopulse.hub import Hub
-from aiopulse.roller import Roller
-from aiopulse.room import Room
-from aiopulse.scene import Scene
-from aiopulse.timer import Timer
+if TYPE_CHECKING:
+    from aiopulse.batch import ChangeBatch
+    from aiopulse.const import UpdateType
+    from aiopulse.discovery import DiscoveredHub, DiscoveryCache
+    from aiopulse.engine import CommandPriority
+    from aiopulse.errors import (
+        CannotConnectException,
+        InvalidResponseException,
+        NotConnectedException,
+        NotRunningException,
+    )
+    from aiopulse.events import Event, EventStream, OverflowPolicy
+    from aiopulse.hub import Hub
+    from aiopulse.manager import HubManager
+    from aiopulse.ratelimit import RateLimiter
+    from aiopulse.reconnect import ReconnectPolicy
+    from aiopulse.roller import Roller
+    from aiopulse.room import Room
+    from aiopulse.scene import Scene
+    from aiopulse.timer import Timer
 
 __all__ = [
     "Hub",
+    "HubManager",
     "Roller",
     "Room",
     "Scene",
@@ -26,8 +37,57 @@ __all__ = [
     "NotRunningException",
     "InvalidResponseException",
     "UpdateType",
+    "CommandPriority",
+    "ReconnectPolicy",
+    "DiscoveryCache",
+    "DiscoveredHub",
+    "ChangeBatch",
+    "Event",
+    "EventStream",
+    "OverflowPolicy",
+    "RateLimiter",
 ]
 __version__ = "0.5.3"
 __author__ = "Alan Murray"
 
 _LOGGER = logging.getLogger(__name__)
+
+# Public names are imported from their modules on first access, so that
+# `import aiopulse` stays cheap for processes that only need part of it.
+_LAZY_ATTRIBUTES = {
+    "Hub": "aiopulse.hub",
+    "HubManager": "aiopulse.manager",
+    "Roller": "aiopulse.roller",
+    "Room": "aiopulse.room",
+    "Scene": "aiopulse.scene",
+    "Timer": "aiopulse.timer",
+    "CannotConnectException": "aiopulse.errors",
+    "NotConnectedException": "aiopulse.errors",
+    "NotRunningException": "aiopulse.errors",
+    "InvalidResponseException": "aiopulse.errors",
+    "UpdateType": "aiopulse.const",
+    "CommandPriority": "aiopulse.engine",
+    "ReconnectPolicy": "aiopulse.reconnect",
+    "DiscoveryCache": "aiopulse.discovery",
+    "DiscoveredHub": "aiopulse.discovery",
+    "ChangeBatch": "aiopulse.batch",
+    "Event": "aiopulse.events",
+    "EventStream": "aiopulse.events",
+    "OverflowPolicy": "aiopulse.events",
+    "RateLimiter": "aiopulse.ratelimit",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import a public attribute on first access."""
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    """List the module attributes, including those not imported yet."""
+    return sorted({*globals(), *_LAZY_ATTRIBUTES})
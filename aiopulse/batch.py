@@ -0,0 +1,82 @@
+"""Entity changes delivered together as one batch."""
+from __future__ import annotations
+
+from typing import Any
+
+from aiopulse.const import UpdateType
+
+
+class ChangeBatch:
+    """Entities that changed during one update cycle.
+
+    `changed` maps each update type to the entities of that type that were
+    added or changed, and `removed` to those that were removed. `fields`
+    holds the names of the fields that changed on each changed entity. The
+    hub itself is the entity of UpdateType.info.
+    """
+
+    def __init__(self) -> None:
+        """Init an empty batch."""
+        self.changed: dict[UpdateType, set[Any]] = {}
+        self.removed: dict[UpdateType, set[Any]] = {}
+        self.fields: dict[Any, set[str]] = {}
+
+    def __bool__(self) -> bool:
+        """Whether anything changed."""
+        return bool(self.changed or self.removed)
+
+    def __contains__(self, update_type: UpdateType) -> bool:
+        """Whether any entity of a type changed or was removed."""
+        return update_type in self.changed or update_type in self.removed
+
+    def __repr__(self) -> str:
+        """Return the number of changes of each type."""
+        counts = ", ".join(
+            f"{update_type.value}: +{len(self.changed.get(update_type, ()))}"
+            f"/-{len(self.removed.get(update_type, ()))}"
+            for update_type in UpdateType
+            if update_type in self
+        )
+        return f"ChangeBatch({counts})"
+
+    def add(
+        self,
+        update_type: UpdateType,
+        entity: Any,
+        fields: frozenset[str] = frozenset(),
+    ) -> None:
+        """Record an added or changed entity and the fields that changed."""
+        self.changed.setdefault(update_type, set()).add(entity)
+        self.fields.setdefault(entity, set()).update(fields)
+
+    def merge(self, newer: ChangeBatch) -> ChangeBatch:
+        """Return this batch with a later batch folded in.
+
+        Batches are shared between subscribers, so neither batch is modified.
+        An entity removed in one batch and added in the other ends up as
+        whichever happened last.
+        """
+        merged = ChangeBatch()
+        for update_type, entities in self.changed.items():
+            for entity in entities:
+                merged.add(update_type, entity, frozenset(self.fields[entity]))
+        for update_type, entities in self.removed.items():
+            merged.removed.setdefault(update_type, set()).update(entities)
+        for update_type, entities in newer.changed.items():
+            removed = merged.removed.get(update_type)
+            for entity in entities:
+                if removed is not None:
+                    removed.discard(entity)
+                merged.add(update_type, entity, frozenset(newer.fields[entity]))
+        for update_type, entities in newer.removed.items():
+            for entity in entities:
+                merged.remove(update_type, entity)
+        return merged
+
+    def remove(self, update_type: UpdateType, entity: Any) -> None:
+        """Record a removed entity."""
+        self.removed.setdefault(update_type, set()).add(entity)
+        changed = self.changed.get(update_type)
+        if changed is not None:
+            changed.discard(entity)
+        self.fields.pop(entity, None)
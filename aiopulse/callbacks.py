@@ -8,33 +8,95 @@ import logging
 from collections.abc import Callable
 from typing import Any
 
+from aiopulse.ratelimit import RateLimiter
+
 _LOGGER = logging.getLogger(__name__)
 
 
 class CallbackMixin:
-    """Mixin for entities that support update callbacks."""
+    """Mixin for entities that support update callbacks.
+
+    Coroutine callbacks run as tasks. Plain callbacks run on the event loop,
+    in notification order, so they must be quick and must not block; a
+    callback subscribed with executor=True runs in the default executor
+    instead. A callback subscribed with max_rate or debounce gets its
+    notifications through a RateLimiter.
+    """
 
     def __init__(self) -> None:
         """Initialize callback list."""
         self._update_callbacks: list[Callable[..., None]] = []
+        self._executor_callbacks: list[Callable[..., None]] = []
+        self._rate_limiters: dict[Callable[..., None], RateLimiter] = {}
+
+    def callback_subscribe(
+        self,
+        callback: Callable[..., None],
+        executor: bool = False,
+        max_rate: float | None = None,
+        debounce: float | None = None,
+    ) -> RateLimiter | None:
+        """Add a callback for updates.
+
+        Args:
+            callback: Function or coroutine function called on updates.
+            executor: Run a plain callback in the default executor rather
+                than on the event loop, for callbacks that block.
+            max_rate: Deliver at most this many updates per second.
+            debounce: Deliver once no update has arrived for this many
+                seconds.
 
-    def callback_subscribe(self, callback: Callable[..., None]) -> None:
-        """Add a callback for updates."""
+        Returns:
+            The RateLimiter of a rate limited or debounced callback, which
+            counts the updates it saved, otherwise None.
+        """
+        limiter = None
+        if max_rate is not None or debounce is not None:
+            limiter = RateLimiter(
+                functools.partial(self._dispatch_callback, callback, executor),
+                max_rate=max_rate,
+                debounce=debounce,
+            )
+            self._rate_limiters[callback] = limiter
         self._update_callbacks.append(callback)
+        if executor:
+            self._executor_callbacks.append(callback)
+        return limiter
 
     def callback_unsubscribe(self, callback: Callable[..., None]) -> None:
         """Remove a callback for updates."""
         if callback in self._update_callbacks:
             self._update_callbacks.remove(callback)
+        if callback in self._executor_callbacks:
+            self._executor_callbacks.remove(callback)
+        limiter = self._rate_limiters.pop(callback, None)
+        if limiter is not None:
+            limiter.cancel()
 
     def notify_callback(self, *args: Any) -> None:
         """Notify all callbacks of an update."""
+        limiters = self._rate_limiters
         for callback in self._update_callbacks:
+            limiter = limiters.get(callback) if limiters else None
+            if limiter is not None:
+                limiter.notify(*args)
+            else:
+                self._dispatch_callback(
+                    callback, callback in self._executor_callbacks, *args
+                )
+
+    def _dispatch_callback(
+        self, callback: Callable[..., None], executor: bool, *args: Any
+    ) -> None:
+        """Schedule one callback, in the executor if it opted in."""
+        if executor:
+            self._schedule_callback(callback, *args, executor=True)
+        else:
             self._schedule_callback(callback, *args)
 
     def _schedule_callback(
-        self, target: Callable[..., Any], *args: Any
-    ) -> asyncio.Task[None] | None:
+        self, target: Callable[..., Any], *args: Any, executor: bool = False
+    ) -> asyncio.Future[Any] | asyncio.Handle | None:
         """Schedule a callback to run asynchronously.
 
         Must be called from within the event loop.
@@ -54,5 +116,7 @@ class CallbackMixin:
             return loop.create_task(target)  # type: ignore
         elif inspect.iscoroutinefunction(check_target):
             return loop.create_task(target(*args))
+        elif executor:
+            return loop.run_in_executor(None, target, *args)
         else:
-            return loop.run_in_executor(None, target, *args)  # type: ignore
+            return loop.call_soon(target, *args)
@@ -0,0 +1,61 @@
+"""Prebuilt command payloads for devices that hang off the hub."""
+from __future__ import annotations
+
+import struct
+
+import aiopulse.utils as utils
+from aiopulse.const import CommandType
+
+MOVE_TO = CommandType.MOVE_TO.to_bytes(4, "big")
+MOVE = CommandType.MOVE.to_bytes(4, "big")
+GET_HEALTH = CommandType.GET_HEALTH.to_bytes(4, "big")
+
+MOVE_MESSAGE_TYPE = bytes.fromhex("2201")
+HEALTH_MESSAGE_TYPE = bytes.fromhex("2A01")
+
+_PERCENT = struct.Struct("<H")
+
+
+class DeviceCommands:
+    """Command payloads addressed to a single roller or room.
+
+    The fixed part of every payload is built once; move_to() only fills the
+    percent slot of a reusable buffer.
+    """
+
+    __slots__ = ("target_id", "up", "down", "stop", "health", "_move_to")
+
+    def __init__(self, target_id: int) -> None:
+        """Build the payloads for a target.
+
+        Args:
+            target_id: The roller or room id the commands are addressed to.
+        """
+        self.target_id = target_id
+        prefix = (
+            bytes.fromhex("0000000000000101")
+            + bytes.fromhex("0600")
+            + utils.pack_int(target_id, 6)
+        )
+        move = prefix + bytes.fromhex("03010100")
+        self.up: bytes = move + bytes.fromhex("10ff")
+        self.stop: bytes = move + bytes.fromhex("11ff")
+        self.down: bytes = move + bytes.fromhex("12ff")
+        self.health: bytes = (
+            prefix + bytes.fromhex("410201000E4202010004") + bytes.fromhex("ff")
+        )
+        self._move_to = bytearray(
+            move + bytes.fromhex("190401030001") + bytes.fromhex("0000ff")
+        )
+
+    def move_to(self, percent: int) -> bytearray:
+        """Return the move to payload with the percent filled in.
+
+        The returned buffer is reused by the next call, so it must be consumed
+        (e.g. by Hub.send_command) before move_to() is called again.
+
+        Args:
+            percent: Target position (0-100).
+        """
+        _PERCENT.pack_into(self._move_to, len(self._move_to) - 3, percent)
+        return self._move_to
@@ -9,6 +9,8 @@ class UpdateType(Enum):
     rooms = "rooms"
     scenes = "scenes"
     timers = "timers"
+    resynced = "resynced"
+    batch = "batch"
 
 
 class MessageType(IntEnum):
@@ -0,0 +1,157 @@
+"""Cache of hubs found by discovery."""
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import TYPE_CHECKING
+
+import aiopulse
+
+if TYPE_CHECKING:
+    from aiopulse.hub import Hub
+
+
+class DiscoveryCache:
+    """Remember interrogated hubs for `ttl` seconds.
+
+    Entries are keyed by the address that answered the discover broadcast
+    and indexed by hub id and MAC address. While an entry is fresh, a
+    response from its address is answered from the cache instead of
+    connecting to the hub again. A hub that reappears at a new address (e.g.
+    after a DHCP change) replaces its old entry.
+    """
+
+    def __init__(self, ttl: float = 300.0) -> None:
+        """Init the cache.
+
+        Args:
+            ttl: Seconds a discovered hub is trusted without re-interrogating.
+        """
+        if ttl < 0:
+            raise ValueError("ttl must not be negative")
+        self.ttl = ttl
+        self._entries: dict[str, tuple[Hub, float]] = {}
+        self._hosts_by_key: dict[str, str] = {}
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def __len__(self) -> int:
+        """Number of fresh entries."""
+        return len(self.hubs())
+
+    def get(self, host: str) -> Hub | None:
+        """Return the fresh hub cached for an address, counting hits."""
+        entry = self._entries.get(host)
+        if entry is None or entry[1] <= time.monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[0]
+
+    def find(self, key: str) -> Hub | None:
+        """Return the fresh hub with a given hub id or MAC address."""
+        host = self._hosts_by_key.get(key)
+        if host is None:
+            return None
+        entry = self._entries.get(host)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    def hubs(self) -> list[Hub]:
+        """Return all fresh hubs."""
+        now = time.monotonic()
+        return [hub for hub, expires in self._entries.values() if expires > now]
+
+    def put(self, hub: Hub) -> None:
+        """Cache an interrogated hub under its address, id and MAC."""
+        host = hub.host
+        if host is None:
+            raise ValueError("Can't cache a hub without an address")
+        for key in self._keys(hub):
+            old_host = self._hosts_by_key.get(key)
+            if old_host is not None and old_host != host:
+                self.invalidate(old_host)
+        self._entries[host] = (hub, time.monotonic() + self.ttl)
+        for key in self._keys(hub):
+            self._hosts_by_key[key] = host
+
+    def invalidate(self, host: str) -> None:
+        """Forget the hub cached for an address."""
+        entry = self._entries.pop(host, None)
+        if entry is None:
+            return
+        for key in self._keys(entry[0]):
+            if self._hosts_by_key.get(key) == host:
+                del self._hosts_by_key[key]
+
+    def clear(self) -> None:
+        """Forget all hubs."""
+        self._entries.clear()
+        self._hosts_by_key.clear()
+
+    @staticmethod
+    def _keys(hub: Hub) -> list[str]:
+        """Identity keys of a hub besides its address."""
+        return [key for key in (hub.id, hub.mac_address) if key]
+
+
+class DiscoveredHub:
+    """A hub that answered the discover broadcast, not yet interrogated.
+
+    Holds what the broadcast reply tells: the address and, when the reply
+    decodes, the hub id. interrogate() connects to the hub for its full info
+    on demand; interrogations share `slots`, which bounds how many run at
+    once.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        hub_id: str | None,
+        slots: asyncio.Semaphore,
+        cache: DiscoveryCache | None = None,
+    ) -> None:
+        """Init the result.
+
+        Args:
+            host: Address the reply came from.
+            port: Port the reply came from.
+            hub_id: Hub id decoded from the reply, or None.
+            slots: Semaphore bounding concurrent interrogations.
+            cache: Cache to answer from and to store the interrogated hub in.
+        """
+        self.host = host
+        self.port = port
+        self.id = hub_id
+        self.slots = slots
+        self.cache = cache
+        self.hub: Hub | None = cache.get(host) if cache is not None else None
+        self._task: asyncio.Task[Hub | None] | None = None
+
+    def __repr__(self) -> str:
+        """Return the address and id."""
+        return f"DiscoveredHub(host={self.host!r}, id={self.id!r})"
+
+    async def interrogate(self) -> Hub | None:
+        """Connect to the hub to read its info, once.
+
+        Returns:
+            The interrogated hub, or None if it couldn't be interrogated.
+        """
+        if self.hub is not None:
+            return self.hub
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._interrogate())
+        return await asyncio.shield(self._task)
+
+    async def _interrogate(self) -> Hub | None:
+        """Interrogate the hub within the shared concurrency bound."""
+        async with self.slots:
+            hub = await aiopulse.Hub._interrogate_hub(self.host)
+        if hub is not None:
+            self.hub = hub
+            if self.cache is not None:
+                self.cache.put(hub)
+        return hub
@@ -0,0 +1,416 @@
+"""Pipelined command engine for sending commands to the hub."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import OrderedDict, deque
+from collections.abc import Callable, Hashable
+from enum import IntEnum
+
+from aiopulse.errors import NotConnectedException
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_COMMAND_WINDOW = 8
+
+
+class CommandPriority(IntEnum):
+    """Scheduling class of a command, lower values are sent first."""
+
+    INTERACTIVE = 0
+    HOUSEKEEPING = 1
+
+
+class WaitStats:
+    """Time commands of one priority class spent queued before being sent."""
+
+    __slots__ = ("count", "total", "maximum")
+
+    def __init__(self) -> None:
+        """Init empty statistics."""
+        self.count: int = 0
+        self.total: float = 0.0
+        self.maximum: float = 0.0
+
+    @property
+    def mean(self) -> float:
+        """Mean wait in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def record(self, wait: float) -> None:
+        """Record the wait of one command."""
+        self.count += 1
+        self.total += wait
+        self.maximum = max(self.maximum, wait)
+
+
+class PendingCommand:
+    """A command frame waiting for, or in flight to, the hub."""
+
+    __slots__ = (
+        "sequence",
+        "frame",
+        "timeout",
+        "retries",
+        "attempts",
+        "future",
+        "timer",
+        "key",
+        "superseded",
+        "priority",
+        "queued_at",
+    )
+
+    def __init__(
+        self,
+        sequence: int,
+        frame: bytes,
+        timeout: float,
+        retries: int,
+        future: asyncio.Future[bool],
+        key: Hashable | None = None,
+        priority: CommandPriority = CommandPriority.INTERACTIVE,
+    ) -> None:
+        """Init a pending command.
+
+        Args:
+            sequence: Sequence number encoded in the frame.
+            frame: The encoded command frame.
+            timeout: Seconds to wait for an acknowledgement per attempt.
+            retries: Number of attempts before giving up.
+            future: Resolved with True when acknowledged, False on timeout.
+            key: Target of the command; a newer command for the same key
+                replaces this one while it is still queued.
+            priority: Scheduling class of the command.
+        """
+        self.sequence = sequence
+        self.frame = frame
+        self.timeout = timeout
+        self.retries = retries
+        self.attempts = 0
+        self.future = future
+        self.timer: asyncio.TimerHandle | None = None
+        self.key = key
+        self.superseded: list[asyncio.Future[bool]] = []
+        self.priority = priority
+        self.queued_at: float = 0.0
+
+    @property
+    def waiting(self) -> bool:
+        """Whether any caller is still waiting for this command."""
+        return not self.future.done() or any(
+            not future.done() for future in self.superseded
+        )
+
+    def resolve(self, result: bool) -> None:
+        """Resolve this command and every command it replaced."""
+        for future in (self.future, *self.superseded):
+            if not future.done():
+                future.set_result(result)
+
+    def fail(self, exc: BaseException) -> None:
+        """Fail this command and every command it replaced."""
+        for future in (self.future, *self.superseded):
+            if not future.done():
+                future.set_exception(exc)
+
+
+class CommandEngine:
+    """Keep up to `window` commands in flight and match their acknowledgements.
+
+    The hub acknowledges commands with an empty message that does not echo the
+    sequence number, in the order the commands were received. Acknowledgements
+    are therefore matched to the oldest frame sent and not yet acknowledged,
+    and each command is tracked by the sequence number encoded in its frame.
+    When a retried command is acknowledged, the acks of its other frames are
+    absorbed rather than resolving later commands; they are only expected
+    until `timeout` after each frame was sent.
+
+    Commands submitted with a key (the target device) are coalesced: a newer
+    command replaces a queued command for the same key, last write wins, and
+    an older in-flight command for the key is no longer retried.
+
+    Queued interactive commands are always sent before housekeeping ones, and
+    housekeeping commands never take the last free slot of the window.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[bytes], None],
+        window: int = DEFAULT_COMMAND_WINDOW,
+        host: str | None = None,
+    ) -> None:
+        """Init the engine.
+
+        Args:
+            send: Writes a buffer to the hub transport.
+            window: Maximum number of unacknowledged commands.
+            host: Hub host, used to prefix log messages.
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        self._send = send
+        self.host = host
+        self.window = window
+        self._queues: dict[CommandPriority, deque[PendingCommand]] = {
+            priority: deque() for priority in CommandPriority
+        }
+        self._in_flight: OrderedDict[int, PendingCommand] = OrderedDict()
+        self._queued_by_key: dict[Hashable, PendingCommand] = {}
+        # every frame written and not yet acknowledged, with its send time
+        self._unacked: deque[tuple[PendingCommand, float]] = deque()
+
+        self.sent: int = 0
+        self.coalesced: int = 0
+        self.wait_times: dict[CommandPriority, WaitStats] = {
+            priority: WaitStats() for priority in CommandPriority
+        }
+        self.acknowledged: int = 0
+        self.absorbed: int = 0
+        self.retried: int = 0
+        self.timed_out: int = 0
+
+    @property
+    def in_flight(self) -> int:
+        """Number of commands sent and not yet acknowledged."""
+        return len(self._in_flight)
+
+    @property
+    def queued(self) -> int:
+        """Number of commands waiting for a free slot in the window."""
+        return sum(len(queue) for queue in self._queues.values())
+
+    async def submit(
+        self,
+        sequence: int,
+        frame: bytes,
+        timeout: float = 3.0,
+        retries: int = 3,
+        key: Hashable | None = None,
+        priority: CommandPriority = CommandPriority.INTERACTIVE,
+    ) -> bool:
+        """Send a command frame and wait for its acknowledgement.
+
+        Args:
+            sequence: Sequence number encoded in the frame.
+            frame: The encoded command frame.
+            timeout: Seconds to wait for an acknowledgement per attempt.
+            retries: Number of attempts before giving up.
+            key: Target of the command, used to coalesce queued commands.
+            priority: Scheduling class of the command.
+
+        Returns:
+            True if acknowledged, False if every attempt timed out. A command
+            replaced by a newer one for the same key returns the newer result.
+        """
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[bool] = loop.create_future()
+        pending = PendingCommand(
+            sequence, frame, timeout, retries, future, key, priority
+        )
+        pending.queued_at = loop.time()
+        if key is None or not self._coalesce(pending):
+            self._queues[priority].append(pending)
+        self._dispatch()
+        return await future
+
+    async def submit_batch(
+        self,
+        frames: list[tuple[int, bytes]],
+        timeout: float = 3.0,
+        retries: int = 3,
+        keys: list[Hashable | None] | None = None,
+    ) -> list[bool]:
+        """Send several command frames in one write and wait for every ack.
+
+        The batch is written at once even if it is larger than the window;
+        commands submitted afterwards wait until the batch has drained.
+
+        Args:
+            frames: (sequence, frame) pairs in the order they are sent.
+            timeout: Seconds to wait for an acknowledgement per attempt.
+            retries: Number of attempts before giving up on a command.
+            keys: Target of each frame; queued commands for the same targets
+                are replaced by the batch.
+
+        Returns:
+            For each frame, True if acknowledged, False if it timed out.
+        """
+        loop = asyncio.get_running_loop()
+        if keys is None:
+            keys = [None] * len(frames)
+        batch = [
+            PendingCommand(sequence, frame, timeout, retries, loop.create_future(), key)
+            for (sequence, frame), key in zip(frames, keys, strict=True)
+        ]
+        try:
+            self._send(b"".join(frame for _, frame in frames))
+        except Exception:
+            for pending in batch:
+                pending.future.cancel()
+            raise
+        now = loop.time()
+        for pending in batch:
+            self._unacked.append((pending, now))
+            if pending.key is not None:
+                replaced = self._queued_by_key.pop(pending.key, None)
+                if replaced is not None:
+                    self._queues[replaced.priority].remove(replaced)
+                    self._supersede(replaced, pending)
+                self._stop_retries(pending.key)
+            pending.attempts += 1
+            self.sent += 1
+            self._in_flight[pending.sequence] = pending
+            pending.timer = loop.call_later(
+                pending.timeout, self._expire, pending.sequence
+            )
+        return list(await asyncio.gather(*(pending.future for pending in batch)))
+
+    def acknowledge(self) -> None:
+        """Resolve the command of the oldest unacknowledged frame."""
+        if not self._unacked:
+            _LOGGER.debug(f"{self.host}: Acknowledgement with no command in flight")
+            return
+        now = asyncio.get_running_loop().time()
+        while self._unacked:
+            pending, sent_at = self._unacked.popleft()
+            if self._in_flight.get(pending.sequence) is pending:
+                del self._in_flight[pending.sequence]
+                self.acknowledged += 1
+                self._finish(pending)
+                pending.resolve(True)
+                self._dispatch()
+                return
+            if now - sent_at < pending.timeout:
+                # another frame of a retried command was acknowledged first
+                self.absorbed += 1
+                _LOGGER.debug(
+                    f"{self.host}: Extra acknowledgement of command "
+                    f"{pending.sequence}"
+                )
+                return
+            # the hub never acknowledged this frame, try the next one
+        _LOGGER.debug(f"{self.host}: Acknowledgement with no command in flight")
+
+    def reset(self) -> None:
+        """Fail every queued and in-flight command, e.g. after a disconnect."""
+        pending_commands = list(self._in_flight.values())
+        for queue in self._queues.values():
+            pending_commands.extend(queue)
+            queue.clear()
+        self._in_flight.clear()
+        self._queued_by_key.clear()
+        self._unacked.clear()
+        for pending in pending_commands:
+            self._finish(pending)
+            pending.fail(NotConnectedException("Disconnected before acknowledgement"))
+
+    def _coalesce(self, pending: PendingCommand) -> bool:
+        """Put a keyed command in the queue slot of its target.
+
+        Returns:
+            True if it replaced a queued command for the same key.
+        """
+        key = pending.key
+        replaced = self._queued_by_key.get(key)
+        self._queued_by_key[key] = pending
+        if replaced is None:
+            return False
+        queue = self._queues[replaced.priority]
+        if replaced.priority == pending.priority:
+            queue[queue.index(replaced)] = pending
+        else:
+            queue.remove(replaced)
+            self._queues[pending.priority].append(pending)
+        self._supersede(replaced, pending)
+        return True
+
+    def _supersede(self, replaced: PendingCommand, pending: PendingCommand) -> None:
+        """Hand the futures of a replaced command over to its replacement."""
+        self.coalesced += 1
+        _LOGGER.debug(
+            f"{self.host}: command {replaced.sequence} replaced by {pending.sequence}"
+        )
+        pending.superseded.append(replaced.future)
+        pending.superseded.extend(replaced.superseded)
+
+    def _stop_retries(self, key: Hashable) -> None:
+        """Stop retrying in-flight commands for a key that has a newer command."""
+        for pending in self._in_flight.values():
+            if pending.key == key:
+                pending.retries = pending.attempts
+
+    def _dispatch(self) -> None:
+        """Send queued commands while there is room in the window."""
+        while True:
+            pending = self._next_queued()
+            if pending is None:
+                return
+            if pending.key is not None:
+                del self._queued_by_key[pending.key]
+                self._stop_retries(pending.key)
+            if not pending.waiting:
+                continue  # caller gave up while queued
+            self._in_flight[pending.sequence] = pending
+            self._transmit(pending)
+
+    def _next_queued(self) -> PendingCommand | None:
+        """Pop the next command to send, if the window has room for it."""
+        free = self.window - len(self._in_flight)
+        if free < 1:
+            return None
+        reserved = 1 if self.window > 1 else 0
+        for priority, queue in self._queues.items():
+            if not queue:
+                continue
+            if priority != CommandPriority.INTERACTIVE and free <= reserved:
+                return None
+            pending = queue.popleft()
+            self.wait_times[priority].record(
+                asyncio.get_running_loop().time() - pending.queued_at
+            )
+            return pending
+        return None
+
+    def _transmit(self, pending: PendingCommand) -> None:
+        """Write a command frame and start its acknowledgement timer."""
+        pending.attempts += 1
+        try:
+            self._send(pending.frame)
+        except Exception as inst:
+            self._in_flight.pop(pending.sequence, None)
+            self._forget_frames(pending)
+            pending.fail(inst)
+            return
+        self.sent += 1
+        loop = asyncio.get_running_loop()
+        self._unacked.append((pending, loop.time()))
+        pending.timer = loop.call_later(pending.timeout, self._expire, pending.sequence)
+
+    def _expire(self, sequence: int) -> None:
+        """Retry or give up on a command whose acknowledgement timed out."""
+        pending = self._in_flight.get(sequence)
+        if pending is None:
+            return
+        _LOGGER.warning(f"{self.host}: command {sequence} timed out.")
+        if pending.attempts < pending.retries and pending.waiting:
+            self.retried += 1
+            self._transmit(pending)
+        else:
+            del self._in_flight[sequence]
+            self._forget_frames(pending)
+            self.timed_out += 1
+            pending.resolve(False)
+        self._dispatch()
+
+    def _forget_frames(self, pending: PendingCommand) -> None:
+        """Stop expecting acknowledgements for a command's frames."""
+        self._unacked = deque(
+            entry for entry in self._unacked if entry[0] is not pending
+        )
+
+    def _finish(self, pending: PendingCommand) -> None:
+        """Stop a command's acknowledgement timer."""
+        if pending.timer is not None:
+            pending.timer.cancel()
+            pending.timer = None
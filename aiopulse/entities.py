@@ -1,7 +1,7 @@
 """Base class for hub entities."""
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
 from aiopulse.callbacks import CallbackMixin
 
@@ -12,6 +12,9 @@ if TYPE_CHECKING:
 class HubEntity(CallbackMixin):
     """Base class for entities managed by a hub."""
 
+    # attributes compared to decide whether an update changed the entity
+    state_fields: tuple[str, ...] = ("name", "icon")
+
     def __init__(self, hub: Hub, entity_id: bytes | int) -> None:
         """Initialize entity.
 
@@ -24,3 +27,27 @@ class HubEntity(CallbackMixin):
         self.id = entity_id
         self.name: str | None = None
         self.icon: int | None = None
+        # state fields changed by the latest update; callbacks run after the
+        # whole read is parsed, so a later frame may already have replaced
+        # this. Event.fields and ChangeBatch.fields keep each update's fields.
+        self.changed_fields: frozenset[str] = frozenset()
+
+    def field_values(self) -> tuple[Any, ...]:
+        """Return the current values of the state fields."""
+        return tuple(getattr(self, field) for field in self.state_fields)
+
+    def changes_since(self, before: tuple[Any, ...] | None) -> frozenset[str]:
+        """Return the state fields that differ from earlier field_values().
+
+        Every field counts as changed when before is None, for an entity
+        that was just created.
+        """
+        if before is None:
+            return frozenset(self.state_fields)
+        return frozenset(
+            field
+            for field, old, new in zip(
+                self.state_fields, before, self.field_values(), strict=True
+            )
+            if old != new
+        )
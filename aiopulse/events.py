@@ -0,0 +1,200 @@
+"""Async streams of hub events with bounded queues."""
+from __future__ import annotations
+
+import asyncio
+import collections
+from collections.abc import Callable, Hashable
+from enum import Enum
+from types import TracebackType
+from typing import Any
+
+from aiopulse.const import UpdateType
+
+
+class OverflowPolicy(Enum):
+    """What an event stream does when its queue is full."""
+
+    drop_oldest = "drop_oldest"
+    coalesce = "coalesce"
+    block = "block"
+
+
+class Event:
+    """A change to one entity, or to the hub as a whole.
+
+    `entity` is the roller, room, scene or timer that changed, the hub for
+    UpdateType.info, or None for UpdateType.resynced. `fields` names the
+    fields that changed and `removed` is True if the entity was removed.
+    """
+
+    __slots__ = ("update_type", "entity", "fields", "removed")
+
+    def __init__(
+        self,
+        update_type: UpdateType,
+        entity: Any = None,
+        fields: frozenset[str] = frozenset(),
+        removed: bool = False,
+    ) -> None:
+        """Init the event."""
+        self.update_type = update_type
+        self.entity = entity
+        self.fields = fields
+        self.removed = removed
+
+    def __repr__(self) -> str:
+        """Return the type, entity and changed fields."""
+        change = "removed" if self.removed else sorted(self.fields)
+        return f"Event({self.update_type.value}, {self.entity}, {change})"
+
+    @property
+    def key(self) -> Hashable:
+        """Identity of the changed entity, for coalescing."""
+        return (self.update_type, self.entity)
+
+    def merge(self, newer: Event) -> Event:
+        """Return this event with a newer event for the same entity folded in.
+
+        Events are shared between streams, so neither event is modified.
+        """
+        fields = newer.fields
+        if not (newer.removed or self.removed):
+            fields = self.fields | fields
+        return Event(self.update_type, self.entity, fields, newer.removed)
+
+
+class EventStream:
+    """A consumer's bounded queue of hub events.
+
+    Iterate with `async for`. At most `maxsize` events are queued; when the
+    queue is full the `policy` decides:
+
+    - drop_oldest: the oldest queued event is dropped.
+    - coalesce: a new event for an entity that already has one queued is
+      merged into it, so the queue holds the latest change per entity; if
+      no event can be merged, the oldest is dropped.
+    - block: nothing is dropped. The hub stops reading from its connection
+      until the stream has room, so events from the data already read can
+      briefly take the queue past `maxsize`.
+
+    `depth`, `max_depth`, `delivered`, `dropped` and `coalesced` report how
+    the stream is keeping up.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 100,
+        policy: OverflowPolicy = OverflowPolicy.drop_oldest,
+        on_close: Callable[[EventStream], None] | None = None,
+    ) -> None:
+        """Init the stream.
+
+        Args:
+            maxsize: Events queued before the overflow policy applies.
+            policy: What to do with events when the queue is full.
+            on_close: Called once when the stream is closed.
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.maxsize = maxsize
+        self.policy = policy
+        self._on_close = on_close
+        self._queue: collections.OrderedDict[Hashable, Event] = (
+            collections.OrderedDict()
+        )
+        self._sequence = 0
+        self._not_empty = asyncio.Event()
+        self._not_full = asyncio.Event()
+        self._not_full.set()
+        self.closed = False
+
+        self.max_depth: int = 0
+        self.delivered: int = 0
+        self.dropped: int = 0
+        self.coalesced: int = 0
+
+    @property
+    def depth(self) -> int:
+        """Number of queued events."""
+        return len(self._queue)
+
+    @property
+    def full(self) -> bool:
+        """Whether the queue has reached `maxsize`."""
+        return not self._not_full.is_set()
+
+    def put(self, event: Event) -> None:
+        """Queue an event, applying the overflow policy."""
+        if self.closed:
+            return
+        if self.policy is OverflowPolicy.coalesce:
+            queued = self._queue.get(event.key)
+            if queued is not None:
+                self._queue[event.key] = queued.merge(event)
+                self.coalesced += 1
+                return
+            key: Hashable = event.key
+        else:
+            self._sequence += 1
+            key = self._sequence
+        full = len(self._queue) >= self.maxsize
+        if full and self.policy is not OverflowPolicy.block:
+            self._queue.popitem(last=False)
+            self.dropped += 1
+        self._queue[key] = event
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._not_empty.set()
+        if len(self._queue) >= self.maxsize:
+            self._not_full.clear()
+
+    async def wait_for_space(self) -> None:
+        """Wait until the queue has room or the stream is closed."""
+        await self._not_full.wait()
+
+    async def get(self) -> Event:
+        """Return the next event, waiting for one.
+
+        Raises:
+            StopAsyncIteration: The stream is closed and drained.
+        """
+        while not self._queue:
+            if self.closed:
+                raise StopAsyncIteration
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        _, event = self._queue.popitem(last=False)
+        self.delivered += 1
+        if len(self._queue) < self.maxsize:
+            self._not_full.set()
+        return event
+
+    def close(self) -> None:
+        """Stop receiving events; queued events can still be read."""
+        if self.closed:
+            return
+        self.closed = True
+        self._not_empty.set()
+        self._not_full.set()
+        if self._on_close is not None:
+            self._on_close(self)
+
+    def __aiter__(self) -> EventStream:
+        """Iterate over the events."""
+        return self
+
+    async def __anext__(self) -> Event:
+        """Return the next event."""
+        return await self.get()
+
+    async def __aenter__(self) -> EventStream:
+        """Use the stream as a context manager that closes it."""
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        """Close the stream."""
+        self.close()
@@ -0,0 +1,207 @@
+"""Hub-level scheduler for roller health polls."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+import time
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from aiopulse.hub import Hub
+    from aiopulse.roller import Roller
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class HealthScheduler:
+    """Poll the health of every roller on a hub from a single task.
+
+    New rollers get their first poll spread over `initial_spread` seconds, and
+    later polls are jittered by +/- `jitter` so they stay staggered. At most
+    `max_in_flight` polls are outstanding.
+
+    The interval adapts to each roller's battery: a full, steady battery is
+    polled every `max_interval` seconds, the interval shrinks linearly towards
+    `min_interval` as the level falls from `high_battery` to `low_battery`,
+    and a draining battery is polled at least once per `drain_step` percent
+    of expected drop. Rollers with no battery reading yet use `interval`.
+    """
+
+    def __init__(
+        self,
+        hub: Hub,
+        interval: float = 3600.0,
+        min_interval: float = 900.0,
+        max_interval: float = 14400.0,
+        low_battery: int = 20,
+        high_battery: int = 80,
+        drain_step: float = 5.0,
+        initial_spread: float = 60.0,
+        jitter: float = 0.1,
+        max_in_flight: int = 2,
+        rescan: float = 1.0,
+        slots: asyncio.Semaphore | None = None,
+    ) -> None:
+        """Init the scheduler.
+
+        Args:
+            hub: The hub whose rollers are polled.
+            interval: Seconds between polls of a roller with no battery level.
+            min_interval: Shortest interval between polls of a roller.
+            max_interval: Longest interval between polls of a roller.
+            low_battery: Battery percent at or below which min_interval is used.
+            high_battery: Battery percent at or above which max_interval is used.
+            drain_step: Battery percent a draining roller may lose between polls.
+            initial_spread: Window in seconds over which first polls are spread.
+            jitter: Fraction of the interval each poll is randomly moved by.
+            max_in_flight: Maximum number of outstanding health polls.
+            rescan: Maximum seconds between checks for new rollers.
+            slots: Semaphore bounding the polls in flight, shared to bound
+                polls across several hubs; replaces max_in_flight.
+        """
+        self.hub = hub
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("intervals must satisfy 0 < min_interval <= max_interval")
+        if low_battery >= high_battery:
+            raise ValueError("low_battery must be below high_battery")
+        self.interval = interval
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.low_battery = low_battery
+        self.high_battery = high_battery
+        self.drain_step = drain_step
+        self.initial_spread = initial_spread
+        self.jitter = jitter
+        self.rescan = rescan
+        self.slots = slots or asyncio.Semaphore(max_in_flight)
+        self._due: dict[int, float] = {}
+        self._polls: set[asyncio.Task[None]] = set()
+        self._task: asyncio.Task[None] | None = None
+
+        self._readings: dict[int, tuple[float, int]] = {}
+
+        self.polls: int = 0
+        self.last_polled: dict[int, float] = {}
+        self.intervals: dict[int, float] = {}
+        self.drain_rates: dict[int, float] = {}
+
+    @property
+    def poll_rate(self) -> float:
+        """Health polls per hour the current intervals add up to."""
+        return sum(3600.0 / interval for interval in self.intervals.values())
+
+    @property
+    def running(self) -> bool:
+        """Whether the scheduler task is running."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the scheduler task."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the scheduler task and any outstanding polls."""
+        tasks = [*self._polls]
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._due.clear()
+
+    def target_interval(self, roller: Roller) -> float:
+        """Seconds between polls of a roller, before jitter."""
+        if roller.battery is None:
+            return self.interval
+        span = self.high_battery - self.low_battery
+        level = min(1.0, max(0.0, (roller.battery - self.low_battery) / span))
+        interval = self.min_interval + level * (self.max_interval - self.min_interval)
+        drain = self.drain_rates.get(roller.id, 0.0)
+        if drain > 0:
+            interval = min(interval, 3600.0 * self.drain_step / drain)
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def next_interval(self, roller: Roller) -> float:
+        """Seconds until the next poll of a roller, including jitter."""
+        interval = self.target_interval(roller)
+        self.intervals[roller.id] = interval
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def record_battery(self, roller: Roller, now: float) -> None:
+        """Update a roller's drain rate from its latest battery level.
+
+        Args:
+            roller: The roller that was polled.
+            now: Monotonic time of the reading in seconds.
+        """
+        if roller.battery is None:
+            return
+        previous = self._readings.get(roller.id)
+        self._readings[roller.id] = (now, roller.battery)
+        if previous is None or now <= previous[0]:
+            return
+        # percent per hour, smoothed; a charging battery counts as steady
+        rate = max(0.0, (previous[1] - roller.battery) * 3600.0 / (now - previous[0]))
+        old = self.drain_rates.get(roller.id)
+        self.drain_rates[roller.id] = rate if old is None else (old + rate) / 2
+
+    def _schedule(self, now: float) -> None:
+        """Track new rollers and forget removed ones."""
+        rollers = self.hub.rollers
+        for roller_id in rollers:
+            if roller_id not in self._due:
+                self._due[roller_id] = now + random.uniform(0, self.initial_spread)
+        for roller_id in [r for r in self._due if r not in rollers]:
+            del self._due[roller_id]
+            self.intervals.pop(roller_id, None)
+            self.drain_rates.pop(roller_id, None)
+            self._readings.pop(roller_id, None)
+
+    async def _run(self) -> None:
+        """Poll rollers as they fall due."""
+        loop = asyncio.get_running_loop()
+        while True:
+            await self.hub.handshake.wait()
+            now = loop.time()
+            self._schedule(now)
+            roller_id = min(self._due, key=self._due.__getitem__, default=None)
+            if roller_id is None or self._due[roller_id] > now:
+                delay = self.rescan
+                if roller_id is not None:
+                    delay = min(delay, self._due[roller_id] - now)
+                await asyncio.sleep(delay)
+                continue
+            slots = self.slots
+            await slots.acquire()
+            roller = self.hub.rollers.get(roller_id)
+            if roller is None or not self.hub.handshake.is_set():
+                # the slot may be shared with other hubs, don't hold it while
+                # this one is down
+                slots.release()
+                continue
+            self._due[roller_id] = loop.time() + self.next_interval(roller)
+            task = loop.create_task(self._poll(roller, slots))
+            self._polls.add(task)
+            task.add_done_callback(self._polls.discard)
+
+    async def _poll(self, roller: Roller, slots: asyncio.Semaphore) -> None:
+        """Request one roller's health, holding an in-flight slot."""
+        try:
+            self.polls += 1
+            self.last_polled[roller.id] = time.time()
+            answered = await roller.get_health()
+            now = asyncio.get_running_loop().time()
+            if answered:
+                # a missed response leaves a stale battery level
+                self.record_battery(roller, now)
+            if roller.id in self._due:
+                self._due[roller.id] = now + self.next_interval(roller)
+        except Exception as inst:
+            _LOGGER.warning(
+                f"{self.hub.host}:{roller.name}: health poll failed: {inst}"
+            )
+        finally:
+            slots.release()
@@ -1,21 +1,54 @@
 """Acmeda Pulse Hub Interface."""
 
 import asyncio
+import collections
+import contextlib
 import logging
+import os
+import struct
+import time
 import warnings
-from collections.abc import AsyncGenerator, Callable
+from collections.abc import AsyncGenerator, Callable, Hashable, Iterable, Mapping
+from typing import Any
 
 # from aiopulse import Roller, Room, Scene, Timer
 import aiopulse
+import aiopulse.commands as commands
 import aiopulse.const as const
 import aiopulse.errors as errors
+import aiopulse.snapshot as snapshot
 import aiopulse.transport
 import aiopulse.utils as utils
+from aiopulse.batch import ChangeBatch
 from aiopulse.callbacks import CallbackMixin
-from aiopulse.const import CommandType, ResponseType
+from aiopulse.commands import DeviceCommands
+from aiopulse.const import CommandType, MessageType, ResponseType
+from aiopulse.discovery import DiscoveredHub, DiscoveryCache
+from aiopulse.engine import DEFAULT_COMMAND_WINDOW, CommandEngine, CommandPriority
+from aiopulse.entities import HubEntity
+from aiopulse.events import Event, EventStream, OverflowPolicy
+from aiopulse.health import HealthScheduler
+from aiopulse.keepalive import Keepalive
+from aiopulse.reconnect import ReconnectPolicy
 
 _LOGGER = logging.getLogger(__name__)
 
+_UINT16 = struct.Struct("<H")
+
+# Hub attributes compared to decide whether hub info changed
+_INFO_FIELDS = ("firmware_name", "wifi_module", "mac_address", "ip_address")
+
+# Lists the hub sends in reply to update(); a resync ends once all arrived
+_RESYNC_LISTS = frozenset(
+    {
+        const.UpdateType.info,
+        const.UpdateType.rooms,
+        const.UpdateType.rollers,
+        const.UpdateType.scenes,
+        const.UpdateType.timers,
+    }
+)
+
 
 class Hub(CallbackMixin):
     """Representation of an Acmeda Pulse Hub."""
@@ -24,8 +57,22 @@ class Hub(CallbackMixin):
         self,
         host: str | None = None,
         loop: asyncio.events.AbstractEventLoop | None = None,
+        *,
+        command_window: int = DEFAULT_COMMAND_WINDOW,
+        reconnect_policy: ReconnectPolicy | None = None,
+        batch_notifications: bool = False,
     ) -> None:
-        """Init the hub."""
+        """Init the hub.
+
+        Args:
+            host: The hub's IP address or hostname.
+            loop: Deprecated, the running loop is used.
+            command_window: Maximum number of unacknowledged commands.
+            reconnect_policy: Delays between reconnect attempts.
+            batch_notifications: Instead of notifying each changed entity
+                and list, collect the changes of one update cycle and notify
+                hub callbacks once with (UpdateType.batch, ChangeBatch).
+        """
         super().__init__()
         if loop is not None:
             warnings.warn(
@@ -39,10 +86,33 @@ class Hub(CallbackMixin):
         self.topic: bytes = str.encode("Smart_Id1_y:")
         self.sequence: int = 4
         self.handshake: asyncio.Event = asyncio.Event()
-        self.command_lock: asyncio.Lock = asyncio.Lock()
-        self.health_lock: asyncio.Lock = asyncio.Lock()
         self.response_task: asyncio.Task[None] | None = None
         self.running: bool = False
+        self._stop_requested: asyncio.Event = asyncio.Event()
+
+        self.reconnect_policy = reconnect_policy or ReconnectPolicy()
+        self.reconnect_attempts: int = 0
+        self.last_handshake: float | None = None
+        self._disconnected_total: float = 0.0
+        self._disconnected_at: float | None = None
+
+        self.handshake_timings: dict[str, float] = {}
+
+        self.batch_notifications = batch_notifications
+        self._batch: ChangeBatch | None = None
+        # updates that changed nothing and so were not notified, by type
+        self.duplicate_updates: collections.Counter[const.UpdateType] = (
+            collections.Counter()
+        )
+        self.changed_fields: frozenset[str] = frozenset()
+        self._streams: list[EventStream] = []
+        # reading is paused while a blocking event stream is full
+        self.reading_paused: bool = False
+        self.read_pauses: int = 0
+
+        self.resync_timeout: float = 10.0
+        self._resync_pending: set[const.UpdateType] = set()
+        self._resync_timer: asyncio.TimerHandle | None = None
 
         self.id: str | None = None
         self.host: str | None = host
@@ -52,14 +122,223 @@ class Hub(CallbackMixin):
         self.wifi_module: str | None = None
 
         self.protocol = aiopulse.transport.HubTransportTcp(host)
+        self.command_engine = CommandEngine(
+            lambda buffer: self.protocol.send(buffer), command_window, host
+        )
 
         self.rollers: dict[int, aiopulse.Roller] = {}
         self.rooms: dict[bytes, aiopulse.Room] = {}
         self.scenes: dict[bytes, aiopulse.Scene] = {}
         self.timers: dict[bytes, aiopulse.Timer] = {}
 
+        self.health_scheduler = HealthScheduler(self)
+        self.keepalive = Keepalive(self)
+        self._health_waiters: dict[int, asyncio.Future[None]] = {}
+
+        self._command_headers: dict[bytes, bytes] = {}
+        self._encode_buffer = bytearray()
+
         self.handshake.clear()
 
+    @property
+    def time_disconnected(self) -> float:
+        """Seconds spent running without a connection to the hub."""
+        if self._disconnected_at is None:
+            return self._disconnected_total
+        return self._disconnected_total + time.monotonic() - self._disconnected_at
+
+    @property
+    def rtt(self) -> float | None:
+        """Smoothed round trip time to the hub in seconds, if measured."""
+        return self.keepalive.srtt
+
+    def _mark_connected(self) -> None:
+        """Stop counting time disconnected."""
+        if self._disconnected_at is not None:
+            self._disconnected_total += time.monotonic() - self._disconnected_at
+            self._disconnected_at = None
+
+    def _mark_disconnected(self) -> None:
+        """Start counting time disconnected."""
+        if self._disconnected_at is None:
+            self._disconnected_at = time.monotonic()
+
+    def _begin_resync(self) -> None:
+        """Start waiting for the lists that refresh the cached entities."""
+        self._cancel_resync()
+        self._resync_pending = set(_RESYNC_LISTS)
+        self._resync_timer = asyncio.get_running_loop().call_later(
+            self.resync_timeout, self._finish_resync
+        )
+
+    def _cancel_resync(self) -> None:
+        """Abandon a resync in progress."""
+        if self._resync_timer is not None:
+            self._resync_timer.cancel()
+            self._resync_timer = None
+        self._resync_pending.clear()
+
+    def _list_received(self, update_type: const.UpdateType) -> None:
+        """Record that a list arrived, ending the resync once all have."""
+        if update_type in self._resync_pending:
+            self._resync_pending.discard(update_type)
+            if not self._resync_pending:
+                self._finish_resync()
+
+    def _remove_stale(
+        self,
+        entities: dict[Any, Any],
+        seen: set[Any],
+        update_type: const.UpdateType,
+    ) -> list[Any]:
+        """Drop cached entities missing from a list received during a resync.
+
+        Returns:
+            The removed entities.
+        """
+        if update_type not in self._resync_pending:
+            return []
+        stale = [entity_id for entity_id in entities if entity_id not in seen]
+        removed = []
+        for entity_id in stale:
+            _LOGGER.info(
+                f"{self.host}: Removed stale {update_type.value}: {entities[entity_id]}"
+            )
+            removed.append(entities.pop(entity_id))
+        return removed
+
+    def _record_change(
+        self, update_type: const.UpdateType, entity: Any, fields: frozenset[str]
+    ) -> bool:
+        """Record which fields an update changed, counting it if none did.
+
+        Returns:
+            True if the update changed the entity and should be notified.
+        """
+        if not fields:
+            self.duplicate_updates[update_type] += 1
+            return False
+        entity.changed_fields = fields
+        return True
+
+    def events(
+        self,
+        maxsize: int = 100,
+        policy: OverflowPolicy = OverflowPolicy.drop_oldest,
+    ) -> EventStream:
+        """Open a stream of the hub's events.
+
+        Use as `async with hub.events() as stream: async for event in
+        stream:`, or close() the stream when done with it.
+
+        A full OverflowPolicy.block stream pauses reading from the hub, which
+        also holds back command acknowledgements: commands sent meanwhile
+        may time out and return False. The keepalive does not count pings
+        missed while reading is paused.
+
+        Args:
+            maxsize: Events queued before the overflow policy applies.
+            policy: What to do with new events when the queue is full.
+        """
+        stream = EventStream(maxsize, policy, on_close=self._streams.remove)
+        self._streams.append(stream)
+        return stream
+
+    def _emit(self, event: Event) -> None:
+        """Queue an event on every open stream."""
+        for stream in self._streams:
+            stream.put(event)
+
+    async def _wait_for_streams(self) -> None:
+        """Wait until every blocking stream has room for more events."""
+        blocking = [
+            stream
+            for stream in self._streams
+            if stream.policy is OverflowPolicy.block and stream.full
+        ]
+        if not blocking:
+            return
+        _LOGGER.debug(f"{self.host}: Event stream full, pausing reading")
+        self.reading_paused = True
+        self.read_pauses += 1
+        try:
+            for stream in blocking:
+                await stream.wait_for_space()
+        finally:
+            self.reading_paused = False
+
+    def _entity_changed(
+        self, update_type: const.UpdateType, entity: HubEntity
+    ) -> None:
+        """Notify an entity's callbacks, or add it to the batch."""
+        if self._streams:
+            self._emit(Event(update_type, entity, entity.changed_fields))
+        if self.batch_notifications:
+            self._current_batch().add(update_type, entity, entity.changed_fields)
+        else:
+            entity.notify_callback()
+
+    def _list_changed(
+        self,
+        update_type: const.UpdateType,
+        changed: list[Any],
+        removed: list[Any] | None = None,
+        notify_entities: bool = False,
+    ) -> None:
+        """Notify that entities of a list changed, or add them to the batch.
+
+        Args:
+            update_type: The list the entities belong to.
+            changed: Added or changed entities.
+            removed: Removed entities.
+            notify_entities: Also notify each changed entity's callbacks
+                when not batching.
+        """
+        removed = removed or []
+        if self._streams:
+            for entity in changed:
+                self._emit(Event(update_type, entity, entity.changed_fields))
+            for entity in removed:
+                self._emit(Event(update_type, entity, removed=True))
+        if self.batch_notifications:
+            if changed or removed:
+                batch = self._current_batch()
+                for entity in changed:
+                    batch.add(update_type, entity, entity.changed_fields)
+                for entity in removed:
+                    batch.remove(update_type, entity)
+            return
+        if notify_entities:
+            for entity in changed:
+                entity.notify_callback()
+        if changed or removed:
+            self.notify_callback(update_type)
+
+    def _current_batch(self) -> ChangeBatch:
+        """Return the batch of this update cycle, delivered once it ends."""
+        if self._batch is None:
+            self._batch = ChangeBatch()
+            asyncio.get_running_loop().call_soon(self._deliver_batch)
+        return self._batch
+
+    def _deliver_batch(self) -> None:
+        """Notify hub callbacks of the changes collected this cycle."""
+        batch, self._batch = self._batch, None
+        if batch:
+            self.notify_callback(const.UpdateType.batch, batch)
+
+    def _finish_resync(self) -> None:
+        """Notify callbacks once that the cached entities are up to date."""
+        if self._resync_timer is None:
+            return
+        if self._resync_pending:
+            missing = ", ".join(sorted(t.value for t in self._resync_pending))
+            _LOGGER.warning(f"{self.host}: Resync timed out waiting for {missing}")
+        self._cancel_resync()
+        _LOGGER.info(f"{self.host}: Resynced")
+        self._emit(Event(const.UpdateType.resynced))
+        self.notify_callback(const.UpdateType.resynced)
+
     def __str__(self) -> str:
         """Returns string representation of the hub."""
         return (
@@ -74,6 +353,8 @@ class Hub(CallbackMixin):
     async def discover(  # type: ignore[misc]
         timeout: float = 5.0,
         bind_address: str | None = None,
+        cache: DiscoveryCache | None = None,
+        transport: aiopulse.transport.HubTransportUdpBroadcast | None = None,
     ) -> AsyncGenerator["Hub", None]:
         """Use a broadcast udp packet to find hubs on the lan.
 
@@ -81,12 +362,17 @@ class Hub(CallbackMixin):
             timeout: Timeout for discovery in seconds.
             bind_address: Local interface to bind to (e.g., '10.0.0.24').
                          If None, binds to all interfaces.
+            cache: Hubs from earlier discoveries. A responder with a fresh
+                entry is yielded straight from the cache; new and expired
+                responders are interrogated and then cached.
+            transport: Broadcast transport kept by the caller across
+                discoveries, so its interface table and endpoints are
+                reused; it is connected if needed and left open. Run one
+                discovery at a time on it.
         """
-        discover_client = aiopulse.transport.HubTransportUdpBroadcast()
+        discover_client = await Hub._open_discover_client(transport, bind_address)
         hub_queue: asyncio.Queue[Hub | None] = asyncio.Queue()
 
-        await discover_client.connect(bind_address=bind_address)
-
         addrs_seen: set[tuple[str, int]] = set()
         receive_task: asyncio.Task[None] | None = None
 
@@ -104,13 +390,19 @@ class Hub(CallbackMixin):
                     if addr not in addrs_seen:
                         addrs_seen.add(addr)
                         _LOGGER.info(f"{addr[0]}: Discovered hub on port {addr[1]}")
-                        asyncio.create_task(_interrogate_and_queue(addr[0]))
+                        cached = cache.get(addr[0]) if cache is not None else None
+                        if cached is not None:
+                            hub_queue.put_nowait(cached)
+                        else:
+                            asyncio.create_task(_interrogate_and_queue(addr[0]))
             except asyncio.CancelledError:
                 pass
 
         async def _interrogate_and_queue(host: str) -> None:
             """Interrogate a hub and put result in queue."""
             hub = await Hub._interrogate_hub(host)
+            if hub is not None and cache is not None:
+                cache.put(hub)
             await hub_queue.put(hub)
 
         try:
@@ -139,7 +431,74 @@ class Hub(CallbackMixin):
                 except asyncio.CancelledError:
                     pass
             _LOGGER.info("Discovery complete")
-            await discover_client.close()
+            if transport is None:
+                await discover_client.close()
+
+    @staticmethod
+    async def discover_lazy(  # type: ignore[misc]
+        timeout: float = 5.0,
+        bind_address: str | None = None,
+        max_interrogations: int = 4,
+        cache: DiscoveryCache | None = None,
+        transport: aiopulse.transport.HubTransportUdpBroadcast | None = None,
+    ) -> AsyncGenerator[DiscoveredHub, None]:
+        """Find hubs on the lan without connecting to them.
+
+        Each hub is yielded as soon as its broadcast reply arrives, with the
+        hub id decoded from the reply. Call interrogate() on a result to
+        connect to the hub for its full info; at most `max_interrogations`
+        hubs are interrogated at once.
+
+        Args:
+            timeout: Timeout for discovery in seconds.
+            bind_address: Local interface to bind to, or None for all.
+            max_interrogations: Interrogations allowed to run at once.
+            cache: Hubs from earlier discoveries, used by interrogate().
+            transport: Broadcast transport to reuse, as for discover().
+        """
+        discover_client = await Hub._open_discover_client(transport, bind_address)
+        slots = asyncio.Semaphore(max_interrogations)
+        addrs_seen: set[tuple[str, int]] = set()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            discover_client.send(const.HEADER + CommandType.DISCOVER.to_bytes(4, "big"))
+            _LOGGER.info("Discovering hubs on the LAN...")
+            while (remaining := deadline - loop.time()) > 0:
+                try:
+                    response, addr = await asyncio.wait_for(
+                        discover_client.receive(), remaining
+                    )
+                except TimeoutError:
+                    break
+                if addr in addrs_seen:
+                    continue
+                addrs_seen.add(addr)
+                hub_id = Hub.decode_discover_datagram(response)
+                _LOGGER.info(f"{addr[0]}: Discovered hub {hub_id} on port {addr[1]}")
+                yield DiscoveredHub(addr[0], addr[1], hub_id, slots, cache)
+        finally:
+            _LOGGER.info("Discovery complete")
+            if transport is None:
+                await discover_client.close()
+
+    @staticmethod
+    async def _open_discover_client(
+        transport: aiopulse.transport.HubTransportUdpBroadcast | None,
+        bind_address: str | None,
+    ) -> aiopulse.transport.HubTransportUdpBroadcast:
+        """Return a connected broadcast transport for one discovery.
+
+        A caller's transport is connected on first use; replies left over
+        from an earlier discovery are dropped.
+        """
+        if transport is None:
+            transport = aiopulse.transport.HubTransportUdpBroadcast()
+        if transport.connected:
+            transport.discard_received()
+        else:
+            await transport.connect(bind_address=bind_address)
+        return transport
 
     @staticmethod
     async def _interrogate_hub(host: str) -> "Hub | None":
@@ -165,35 +524,47 @@ class Hub(CallbackMixin):
         return None
 
     async def connect(self, host: str | None = None) -> bool:
-        """Try and connect to the hub."""
+        """Try and connect to the hub.
+
+        The handshake is CONNECT, LOGIN, then SETID and UNKNOWN1. SETID and
+        UNKNOWN1 don't depend on each other's replies, so they are sent in one
+        write and their replies are matched as they arrive. The duration of
+        each step is recorded in handshake_timings.
+        """
         if host:
             self.host = host
 
+        timings: dict[str, float] = {}
+        self.handshake_timings = timings
+        started = step = time.perf_counter()
+
+        def lap(name: str) -> None:
+            nonlocal step
+            now = time.perf_counter()
+            timings[name] = now - step
+            step = now
+
         try:
             await self.protocol.connect(self.host)
         except OSError as inst:
             raise errors.CannotConnectException(str(inst))
+        lap("transport")
 
         if self.handshake.is_set():
             _LOGGER.warning(f"{self.host} Handshake already completed")
             return False
 
-        if self.protocol.is_udp:  # udp
-            # self.protocol.send(const.HEADER + const.COMMAND_DISCOVER)
-            # response = await self.get_response()
-            self.protocol.send(const.HEADER + CommandType.CONNECT.to_bytes(4, "big"))
-            raw_id = await self.get_response(ResponseType.CONNECT.to_bytes(4, "big"))
-        else:  # TCP
-            self.protocol.send(const.HEADER + CommandType.CONNECT.to_bytes(4, "big"))
-            raw_id = await self.get_response(ResponseType.CONNECT.to_bytes(4, "big"))
-
+        self.protocol.send(const.HEADER + CommandType.CONNECT.to_bytes(4, "big"))
+        raw_id = await self.get_response(ResponseType.CONNECT.to_bytes(4, "big"))
         self.id = raw_id[2:].decode("utf-8")
+        lap("connect")
 
         self.protocol.send(const.HEADER + CommandType.LOGIN.to_bytes(4, "big") + raw_id)
         response = await self.get_response(ResponseType.LOGIN.to_bytes(4, "big"))
 
         if response[0] != 0:
             raise errors.InvalidResponseException
+        lap("login")
 
         self.protocol.send(
             const.HEADER
@@ -201,40 +572,74 @@ class Hub(CallbackMixin):
             + bytes.fromhex("05")
             + self.topic
             + bytes.fromhex("16000e0001000000000000000c000600120311073816ff9b")
-        )
-
-        response = await self.get_response(ResponseType.SETID.to_bytes(4, "big"))
-        self.response_parse(response)
-
-        self.protocol.send(
-            const.HEADER
+            + const.HEADER
             + CommandType.UNKNOWN1.to_bytes(4, "big")
             + bytes.fromhex("05")
             + self.topic
             + bytes.fromhex("1100150002000000000000006002010030ffa9")
         )
-
-        response = await self.get_response(
-            ResponseType.UNKNOWN1.to_bytes(4, "big")
-            + bytes.fromhex("06")
-            + self.topic
-            + bytes.fromhex("16000f0002000000000000000c000600120311073816ff9d")
+        # SETID is acknowledged, UNKNOWN1 is answered and then acknowledged
+        await self.get_responses(
+            [
+                ResponseType.SETID.to_bytes(4, "big"),
+                ResponseType.UNKNOWN1.to_bytes(4, "big")
+                + bytes.fromhex("06")
+                + self.topic
+                + bytes.fromhex("16000f0002000000000000000c000600120311073816ff9d"),
+                ResponseType.SETID.to_bytes(4, "big"),
+            ]
+        )
+        lap("setup")
+        timings["total"] = time.perf_counter() - started
+
+        _LOGGER.info(
+            f"{self.host}: Handshake complete in {timings['total'] * 1000:.0f} ms "
+            + " ".join(
+                f"{name}={duration * 1000:.0f}"
+                for name, duration in timings.items()
+                if name != "total"
+            )
         )
-        self.response_parse(response)
-
-        response = await self.get_response(ResponseType.SETID.to_bytes(4, "big"))
-        self.response_parse(response)
-
-        _LOGGER.info(f"{self.host}: Handshake complete")
         self.handshake.set()
+        self.last_handshake = time.time()
+        self._mark_connected()
 
         return True
 
+    def save_snapshot(self, path: str | os.PathLike[str]) -> None:
+        """Save the cached entities to a compact JSON snapshot file.
+
+        Args:
+            path: File to write, replaced atomically.
+        """
+        snapshot.save(self, path)
+
+    def load_snapshot(self, path: str | os.PathLike[str]) -> bool:
+        """Load cached entities from a snapshot file saved by save_snapshot().
+
+        The entities are available immediately. Once connected, run() treats
+        them as cached state: the live lists update changed entities and
+        remove those the hub no longer reports.
+
+        Args:
+            path: Snapshot file to read.
+
+        Returns:
+            True if the snapshot was loaded, False if it was missing, invalid
+            or saved from a different hub.
+        """
+        return snapshot.load(self, path)
+
     async def disconnect(self) -> None:
         """Disconnect from the hub."""
         _LOGGER.debug(f"{self.host}: Disconnecting")
         await self.protocol.close()
         self.handshake.clear()
+        self.keepalive.reset()
+        self._cancel_resync()
+        if self.running:
+            self._mark_disconnected()
+        self.command_engine.reset()
         _LOGGER.info(f"{self.host}: Disconnected")
 
     async def get_response(self, target_response: bytes | None = None) -> bytes:
@@ -249,13 +654,76 @@ class Hub(CallbackMixin):
             raise errors.InvalidResponseException
         return response[length:]
 
-    def response_hubinfo(self, message: bytes) -> None:
+    async def get_responses(self, targets: list[bytes]) -> list[bytes]:
+        """Receive frames until one has arrived for each target, in any order.
+
+        Each target is the start of a frame after the header; a frame is
+        matched to the first outstanding target it starts with. Frames that
+        match no outstanding target are parsed as ordinary messages.
+
+        Args:
+            targets: Expected frame prefixes, excluding the header.
+
+        Returns:
+            The remainder of each matched frame, in the order of targets.
+
+        Raises:
+            InvalidResponseException: The connection closed or a frame was
+                malformed before every target was matched.
+        """
+        results: list[bytes | None] = [None] * len(targets)
+        outstanding = list(enumerate(targets))
+        while outstanding:
+            response = await self.protocol.receive()
+            if not response:
+                raise errors.InvalidResponseException(
+                    "Connection closed while waiting for responses"
+                )
+            for frame in self._split_frames(response):
+                for position, (index, target) in enumerate(outstanding):
+                    prefix = const.HEADER + target
+                    if frame[: len(prefix)] == prefix:
+                        results[index] = bytes(frame[len(prefix) :])
+                        del outstanding[position]
+                        break
+                else:
+                    self.response_parse(frame)
+        return [result or b"" for result in results]
+
+    @staticmethod
+    def _split_frames(response: utils.ReadableBuffer) -> list[memoryview]:
+        """Split a buffer of complete frames into one view per frame."""
+        view = memoryview(response)
+        frames = []
+        ptr = 0
+        while ptr < len(view):
+            if view[ptr : ptr + 4] != const.HEADER or len(view) - ptr < 5:
+                raise errors.InvalidResponseException(
+                    "Malformed frame", response=bytes(view[ptr:])
+                )
+            msg_len = view[ptr + 4]
+            body = ptr + 5
+            msg_blocks = 1
+            if msg_len > 127:
+                msg_blocks = view[body] if body < len(view) else 1
+                body += 1
+            end = body + msg_len + 128 * (msg_blocks - 1)
+            if end > len(view):
+                raise errors.InvalidResponseException(
+                    "Truncated frame", response=bytes(view[ptr:])
+                )
+            frames.append(view[ptr:end])
+            ptr = end
+        return frames
+
+    def response_hubinfo(self, message: utils.ReadableBuffer) -> None:
         """Receive start of hub information."""
         if len(message) < 10:
             raise errors.InvalidResponseException(
                 f"Hub info message too short: {len(message)} bytes",
-                response=message,
+                response=bytes(message),
             )
+        before = self._info_state()
         ptr = 10
         self.firmware_name, ptr = utils.unpack_string(message, ptr)
         ptr += 2
@@ -266,33 +734,50 @@ class Hub(CallbackMixin):
         self.mac_address, ptr = utils.unpack_string(message, ptr)
         ptr += 2
         self.ip_address, ptr = utils.unpack_string(message, ptr)
-        _LOGGER.info(f"{self.host}: Hub info: {self}")
-        self.notify_callback(const.UpdateType.info)
+        fields = frozenset(
+            field
+            for field, old, new in zip(
+                _INFO_FIELDS, before, self._info_state(), strict=True
+            )
+            if old != new
+        )
+        if self._record_change(const.UpdateType.info, self, fields):
+            _LOGGER.info(f"{self.host}: Hub info: {self}")
+            self._list_changed(const.UpdateType.info, [self])
+        self._list_received(const.UpdateType.info)
 
-    def response_roller_updated(self, message: bytes) -> None:
+    def _info_state(self) -> tuple[str | None, ...]:
+        """Return the hub information fields, for change detection."""
+        return tuple(getattr(self, field) for field in _INFO_FIELDS)
+
+    def response_roller_updated(self, message: utils.ReadableBuffer) -> None:
         """Receive change of roller information."""
         if len(message) < 10:
             raise errors.InvalidResponseException(
                 f"Roller updated message too short: {len(message)} bytes",
-                response=message,
+                response=bytes(message),
             )
         ptr = 2  # sequence?
         ptr += 4
         ptr += 2  # unknown field
         ptr += 2  # unknown field
-        room_id, ptr = utils.unpack_bytes(message, ptr)
+        room_view, ptr = utils.unpack_bytes(message, ptr)
+        room_id = bytes(room_view)
         ptr += 4  # unknown field
         roller_type, ptr = utils.unpack_int(message, ptr, 1)
         ptr += 2  # unknown field
         roller_name, ptr = utils.unpack_string(message, ptr)
         ptr += 10  # unknown field
-        roller_id, ptr = utils.unpack_int(message, ptr, 6)
-        roller_percent, ptr = utils.unpack_roller_percent(message, ptr)
-        roller_flags, ptr = utils.unpack_int(message, ptr, 1)
+        roller_id, roller_percent, roller_flags, ptr = utils.unpack_roller_state(
+            message, ptr
+        )
         ptr += 2  # checksum
-        if roller_id not in self.rollers:
-            self.rollers[roller_id] = aiopulse.Roller(self, roller_id)
-        roller = self.rollers[roller_id]
+        roller = self.rollers.get(roller_id)
+        if roller is None:
+            roller = self.rollers[roller_id] = aiopulse.Roller(self, roller_id)
+            before: tuple[Any, ...] | None = None
+        else:
+            before = roller.field_values()
         roller.name = roller_name
         # doesn't seem to come through in update
         # roller.serial = roller_serial
@@ -304,52 +789,73 @@ class Hub(CallbackMixin):
             roller.room = None
         roller.closed_percent = roller_percent
         roller.flags = roller_flags
-        _LOGGER.info(f"{self.host}: Roller updated: {roller}")
-        roller.notify_callback()
-        self.notify_callback(const.UpdateType.rollers)
+        if self._record_change(
+            const.UpdateType.rollers, roller, roller.changes_since(before)
+        ):
+            _LOGGER.info(f"{self.host}: Roller updated: {roller}")
+            self._list_changed(
+                const.UpdateType.rollers, [roller], notify_entities=True
+            )
 
-    def response_discard(self, message: bytes) -> None:
+    def response_discard(self, message: utils.ReadableBuffer) -> None:
         """Discard response."""
 
-    def response_roomlist(self, message: bytes) -> None:
+    def response_roomlist(self, message: utils.ReadableBuffer) -> None:
         """Receive room list."""
         if len(message) < 12:
             raise errors.InvalidResponseException(
                 f"Room list message too short: {len(message)} bytes",
-                response=message,
+                response=bytes(message),
             )
         ptr = 12
         room_count, ptr = utils.unpack_int(message, ptr, 1)
+        changed: list[aiopulse.Room] = []
+        seen: set[bytes] = set()
         for _ in range(room_count):
             _, ptr = utils.unpack_bytes(message, ptr, 2)
-            room_id, ptr = utils.unpack_bytes(message, ptr)
+            room_view, ptr = utils.unpack_bytes(message, ptr)
+            room_id = bytes(room_view)
             _, ptr = utils.unpack_bytes(message, ptr, 4)
             icon, ptr = utils.unpack_int(message, ptr, 1)
             _, ptr = utils.unpack_bytes(message, ptr, 2)
             room_name, ptr = utils.unpack_string(message, ptr)
-            if room_id not in self.rooms:
-                self.rooms[room_id] = aiopulse.Room(self, room_id)
-            self.rooms[room_id].icon = icon
-            self.rooms[room_id].name = room_name
-            _LOGGER.info(f"{self.host}: Room updated: {self.rooms[room_id]}")
-        self.notify_callback(const.UpdateType.rooms)
-
-    def response_rollerlist(self, message: bytes) -> None:
+            seen.add(room_id)
+            room = self.rooms.get(room_id)
+            if room is None:
+                room = self.rooms[room_id] = aiopulse.Room(self, room_id)
+                before: tuple[Any, ...] | None = None
+            else:
+                before = room.field_values()
+            room.icon = icon
+            room.name = room_name
+            if self._record_change(
+                const.UpdateType.rooms, room, room.changes_since(before)
+            ):
+                _LOGGER.info(f"{self.host}: Room updated: {room}")
+                changed.append(room)
+        removed = self._remove_stale(self.rooms, seen, const.UpdateType.rooms)
+        self._list_changed(const.UpdateType.rooms, changed, removed)
+        self._list_received(const.UpdateType.rooms)
+
+    def response_rollerlist(self, message: utils.ReadableBuffer) -> None:
         """Receive roller blind list."""
         if len(message) < 12:
             raise errors.InvalidResponseException(
                 f"Roller list message too short: {len(message)} bytes",
-                response=message,
+                response=bytes(message),
             )
         ptr = 2  # sequence?
         ptr += 10
         roller_count, ptr = utils.unpack_int(message, ptr, 1)
+        changed: list[aiopulse.Roller] = []
+        seen: set[int] = set()
         for _ in range(roller_count):
             start = ptr
             ptr += 4  # unknown field
             roller_id, ptr = utils.unpack_int(message, ptr, 6)
             ptr += 2  # unknown field
-            room_id, ptr = utils.unpack_bytes(message, ptr)
+            room_view, ptr = utils.unpack_bytes(message, ptr)
+            room_id = bytes(room_view)
             ptr += 4  # unknown field
             roller_type, ptr = utils.unpack_int(message, ptr, 1)
             ptr += 2  # unknown field
@@ -359,10 +865,15 @@ class Hub(CallbackMixin):
             roller_percent, ptr = utils.unpack_roller_percent(message, ptr)
             roller_flags, ptr = utils.unpack_int(message, ptr, 1)
 
-            _LOGGER.debug(f"{message[start:ptr].hex()}")
-            if roller_id not in self.rollers:
-                self.rollers[roller_id] = aiopulse.Roller(self, roller_id)
-            roller = self.rollers[roller_id]
+            if _LOGGER.isEnabledFor(logging.DEBUG):
+                _LOGGER.debug(message[start:ptr].hex())
+            seen.add(roller_id)
+            roller = self.rollers.get(roller_id)
+            if roller is None:
+                roller = self.rollers[roller_id] = aiopulse.Roller(self, roller_id)
+                before: tuple[Any, ...] | None = None
+            else:
+                before = roller.field_values()
             roller.name = roller_name
             roller.serial = roller_serial
             roller.room_id = room_id
@@ -373,24 +884,34 @@ class Hub(CallbackMixin):
                 roller.room = None
             roller.closed_percent = roller_percent
             roller.flags = roller_flags
-            _LOGGER.info(f"{self.host}: Roller updated: {roller}")
-            roller.notify_callback()
-
-        self.notify_callback(const.UpdateType.rollers)
+            if self._record_change(
+                const.UpdateType.rollers, roller, roller.changes_since(before)
+            ):
+                _LOGGER.info(f"{self.host}: Roller updated: {roller}")
+                changed.append(roller)
+
+        removed = self._remove_stale(self.rollers, seen, const.UpdateType.rollers)
+        self._list_changed(
+            const.UpdateType.rollers, changed, removed, notify_entities=True
+        )
+        self._list_received(const.UpdateType.rollers)
 
-    def response_scenelist(self, message: bytes) -> None:
+    def response_scenelist(self, message: utils.ReadableBuffer) -> None:
         """Receive scene list."""
         if len(message) < 12:
             raise errors.InvalidResponseException(
                 f"Scene list message too short: {len(message)} bytes",
-                response=message,
+                response=bytes(message),
             )
         ptr = 0
         _, ptr = utils.unpack_bytes(message, ptr, 12)
         scene_count, ptr = utils.unpack_int(message, ptr, 1)
+        changed: list[aiopulse.Scene] = []
+        seen: set[bytes] = set()
         for _ in range(scene_count):
             _, ptr = utils.unpack_bytes(message, ptr, 2)
-            scene_id, ptr = utils.unpack_bytes(message, ptr)
+            scene_view, ptr = utils.unpack_bytes(message, ptr)
+            scene_id = bytes(scene_view)
             _, ptr = utils.unpack_bytes(message, ptr, 4)
             icon, ptr = utils.unpack_int(message, ptr, 1)
             _, ptr = utils.unpack_bytes(message, ptr, 2)
@@ -401,27 +922,42 @@ class Hub(CallbackMixin):
                 _, ptr = utils.unpack_bytes(message, ptr, 2)
                 _, ptr = utils.unpack_bytes(message, ptr)
 
-            if scene_id not in self.scenes:
-                self.scenes[scene_id] = aiopulse.Scene(self, scene_id)
-            self.scenes[scene_id].icon = icon
-            self.scenes[scene_id].name = scene_name
-            _LOGGER.info(f"{self.host}: Scene updated: {self.scenes[scene_id]}")
+            seen.add(scene_id)
+            scene = self.scenes.get(scene_id)
+            if scene is None:
+                scene = self.scenes[scene_id] = aiopulse.Scene(self, scene_id)
+                before: tuple[Any, ...] | None = None
+            else:
+                before = scene.field_values()
+            scene.icon = icon
+            scene.name = scene_name
+            if self._record_change(
+                const.UpdateType.scenes, scene, scene.changes_since(before)
+            ):
+                _LOGGER.info(f"{self.host}: Scene updated: {scene}")
+                changed.append(scene)
         _, ptr = utils.unpack_bytes(message, ptr, 2)
-        self.notify_callback(const.UpdateType.scenes)
+        removed = self._remove_stale(self.scenes, seen, const.UpdateType.scenes)
+        self._list_changed(const.UpdateType.scenes, changed, removed)
+        self._list_received(const.UpdateType.scenes)
 
-    def response_timerlist(self, message: bytes) -> None:
+    def response_timerlist(self, message: utils.ReadableBuffer) -> None:
         """Receive timer list."""
         if len(message) < 12:
             raise errors.InvalidResponseException(
                 f"Timer list message too short: {len(message)} bytes",
-                response=message,
+                response=bytes(message),
             )
         ptr = 0
         _, ptr = utils.unpack_bytes(message, ptr, 12)
         timer_count, ptr = utils.unpack_int(message, ptr, 1)
+        changed: list[aiopulse.Timer] = []
+        seen: set[bytes] = set()
+        complete = True
         for _ in range(timer_count):
             _, ptr = utils.unpack_bytes(message, ptr, 2)
-            timer_id, ptr = utils.unpack_bytes(message, ptr)
+            timer_view, ptr = utils.unpack_bytes(message, ptr)
+            timer_id = bytes(timer_view)
             _, ptr = utils.unpack_bytes(message, ptr, 4)
             icon, ptr = utils.unpack_int(message, ptr, 1)
             _, ptr = utils.unpack_bytes(message, ptr, 2)
@@ -448,150 +984,191 @@ class Hub(CallbackMixin):
                 if roller_id in self.rollers:
                     entity = self.rollers[roller_id]
             elif timer_type == b"\x00\x00\x10\x02":  # Scene Timer
-                scene_id, ptr = utils.unpack_bytes(message, ptr)
+                scene_view, ptr = utils.unpack_bytes(message, ptr)
+                scene_id = bytes(scene_view)
                 if scene_id in self.scenes:
                     entity = self.scenes[scene_id]
             else:
+                # the entry's length is unknown, so the rest can't be read;
+                # keep the timers read so far and don't drop unseen ones
                 _LOGGER.error(
                     f"{self.host}: Unexpected timer type received: {timer_type.hex()}"
                 )
-                return
-
-            if timer_id not in self.timers:
-                self.timers[timer_id] = aiopulse.Timer(self, timer_id)
-            self.timers[timer_id].icon = icon
-            self.timers[timer_id].name = timer_name
-            self.timers[timer_id].state = state
-            self.timers[timer_id].hour = hour
-            self.timers[timer_id].minute = minute
-            self.timers[timer_id].days = days
-            self.timers[timer_id].entity = entity
-
-            _LOGGER.info(f"Timer added: {self.timers[timer_id]}")
-        _, ptr = utils.unpack_bytes(message, ptr, 2)
-        self.notify_callback(const.UpdateType.timers)
+                complete = False
+                break
+
+            seen.add(timer_id)
+            timer = self.timers.get(timer_id)
+            if timer is None:
+                timer = self.timers[timer_id] = aiopulse.Timer(self, timer_id)
+                before: tuple[Any, ...] | None = None
+            else:
+                before = timer.field_values()
+            timer.icon = icon
+            timer.name = timer_name
+            timer.state = state
+            timer.hour = hour
+            timer.minute = minute
+            timer.days = days
+            timer.entity = entity
+
+            if self._record_change(
+                const.UpdateType.timers, timer, timer.changes_since(before)
+            ):
+                _LOGGER.info(f"Timer added: {timer}")
+                changed.append(timer)
+        removed = None
+        if complete:
+            _, ptr = utils.unpack_bytes(message, ptr, 2)
+            removed = self._remove_stale(self.timers, seen, const.UpdateType.timers)
+        self._list_changed(const.UpdateType.timers, changed, removed)
+        self._list_received(const.UpdateType.timers)
 
-    def response_authinfo(self, message: bytes) -> None:
+    def response_authinfo(self, message: utils.ReadableBuffer) -> None:
         """Receive acmeda account information."""
         if len(message) < 15:
             raise errors.InvalidResponseException(
                 f"Auth info message too short: {len(message)} bytes",
-                response=message,
+                response=bytes(message),
             )
         ptr = 15
         _, ptr = utils.unpack_string(message, ptr)
 
-    def response_position(self, message: bytes) -> None:
+    def response_position(self, message: utils.ReadableBuffer) -> None:
         """Receive change of roller position information."""
         if len(message) < 12:
             raise errors.InvalidResponseException(
                 f"Position message too short: {len(message)} bytes",
-                response=message,
+                response=bytes(message),
             )
-        ptr = 12
-        roller_id, ptr = utils.unpack_int(message, ptr, 6)
-        roller_percent, ptr = utils.unpack_roller_percent(message, ptr)
-        roller_flags, ptr = utils.unpack_int(message, ptr, 1)
-        if roller_id in self.rollers:
-            self.rollers[roller_id].closed_percent = roller_percent
-            self.rollers[roller_id].flags = roller_flags
-            self.rollers[roller_id].notify_callback()
-            _LOGGER.info(f"{self.host}: Roller updated: {self.rollers[roller_id]}")
+        roller_id, roller_percent, roller_flags, _ = utils.unpack_roller_state(
+            message, 12
+        )
+        roller = self.rollers.get(roller_id)
+        if roller is not None:
+            before = roller.field_values()
+            roller.closed_percent = roller_percent
+            roller.flags = roller_flags
+            if self._record_change(
+                const.UpdateType.rollers, roller, roller.changes_since(before)
+            ):
+                self._entity_changed(const.UpdateType.rollers, roller)
+                _LOGGER.info(f"{self.host}: Roller updated: {roller}")
         else:
             _LOGGER.warning(
                 f"{self.host}: Received position update for unknown roller {roller_id}"
             )
 
-    def response_rollerhealth(self, message: bytes) -> None:
+    def response_rollerhealth(self, message: utils.ReadableBuffer) -> None:
         """Receive change of roller health information."""
         if len(message) < 12:
             raise errors.InvalidResponseException(
                 f"Roller health message too short: {len(message)} bytes",
-                response=message,
+                response=bytes(message),
             )
-        ptr = 12
-        roller_id, ptr = utils.unpack_int(message, ptr, 6)
-        # letter A and then 4 bytes
-        unknown, ptr = utils.unpack_bytes(message, ptr, 5)
-        _LOGGER.debug(f"{unknown.hex()}")
-        # letter B and then 4 bytes
-        unknown, ptr = utils.unpack_bytes(message, ptr, 5)
-        _LOGGER.debug(f"{unknown.hex()}")
-        # letter C and then 4 bytes
-        unknown, ptr = utils.unpack_bytes(message, ptr, 5)
-        _LOGGER.debug(f"{unknown.hex()}")
-        # unknown
-        unknown, ptr = utils.unpack_bytes(message, ptr, 3)
-        _LOGGER.debug(f"{unknown.hex()}")
-        # battery level
-        charge_int, ptr = utils.unpack_int(message, ptr, 1)
-        charge_fraction, ptr = utils.unpack_int(message, ptr, 1)
-        charge: float = charge_int + charge_fraction / 256.0
+        # roller id, letters A, B and C each followed by 4 unknown bytes,
+        # 3 unknown bytes, battery level and then 8 unknown bytes
+        roller_id, charge, _ = utils.unpack_roller_health(message, 12)
         roller_battery = round(
             min(100, max(0, 100.0 * (charge - 9.45) / (12.375 - 9.45)))
         )
-        _LOGGER.debug(f"Battery: {charge} {roller_battery}")
-        # unknown
-        unknown, ptr = utils.unpack_bytes(message, ptr, 8)
-        _LOGGER.debug(f"{unknown.hex()}")
-        ptr += 2  # checksum
-        if roller_id in self.rollers:
-            self.rollers[roller_id].battery = roller_battery
-            _LOGGER.info(
-                f"{self.host}: Roller health updated: {self.rollers[roller_id]}"
-            )
-            self.rollers[roller_id].health_updated()
-            self.rollers[roller_id].notify_callback()
-        if self.health_lock.locked():
-            self.health_lock.release()
-
-    def response_discover(self, message: bytes) -> None:
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(f"{message[12:].hex()}")
+            _LOGGER.debug(f"Battery: {charge} {roller_battery}")
+        roller = self.rollers.get(roller_id)
+        if roller is not None:
+            before = roller.field_values()
+            roller.battery = roller_battery
+            if self._record_change(
+                const.UpdateType.rollers, roller, roller.changes_since(before)
+            ):
+                _LOGGER.info(f"{self.host}: Roller health updated: {roller}")
+                self._entity_changed(const.UpdateType.rollers, roller)
+        waiter = self._health_waiters.get(roller_id)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+    def response_discover(self, message: utils.ReadableBuffer) -> None:
         """Receive after discover broadcast packet."""
+        hub_id = Hub.decode_discover(message)
+        if hub_id and self.id is None:
+            self.id = hub_id
+
+    @staticmethod
+    def decode_discover(message: utils.ReadableBuffer) -> str:
+        """Decode the hub id from a discover response message.
+
+        The id is the length prefixed field after the 10 byte preamble, in
+        the same form as the id the hub sends in reply to CONNECT.
+        """
         if len(message) < 10:
             raise errors.InvalidResponseException(
                 f"Discover message too short: {len(message)} bytes",
-                response=message,
+                response=bytes(message),
             )
-        ptr = 0
-        _, ptr = utils.unpack_bytes(message, ptr, 10)
-        _, ptr = utils.unpack_bytes(message, ptr)
-        pass
+        hub_id, _ = utils.unpack_string(message, 10)
+        return hub_id
+
+    @staticmethod
+    def decode_discover_datagram(datagram: utils.ReadableBuffer) -> str | None:
+        """Decode the hub id from a discover response datagram, if possible."""
+        try:
+            frames = Hub._split_frames(datagram)
+            if not frames:
+                return None
+            frame = frames[0]
+            # header, length, blocks if length > 127, two unknown bytes, type
+            body = 8 if frame[4] <= 127 else 9
+            return Hub.decode_discover(frame[body:]) or None
+        except (errors.InvalidResponseException, IndexError):
+            return None
 
     class Receiver:
         """Wraps around a function that gets called for received messages."""
 
-        def __init__(self, name: str, function: "Callable[[Hub, bytes], None]") -> None:
+        def __init__(
+            self, name: str, function: "Callable[[Hub, utils.ReadableBuffer], None]"
+        ) -> None:
             """Constructor for message receiver class."""
             self.name = name
             self.function = function
 
-        def execute(self, target: "Hub", message: bytes) -> None:
+        def execute(self, target: "Hub", message: utils.ReadableBuffer) -> None:
             """Executor function."""
             self.function(target, message)
 
-    msgmap = {
-        bytes.fromhex("1600"): Receiver("hub info", response_hubinfo),
-        bytes.fromhex("0d00"): Receiver("hub info updated", response_discard),
-        bytes.fromhex("0101"): Receiver("room list", response_roomlist),
-        bytes.fromhex("3301"): Receiver("scene list", response_scenelist),
-        bytes.fromhex("2101"): Receiver("roller list", response_rollerlist),
-        bytes.fromhex("4101"): Receiver("timer list", response_timerlist),
-        bytes.fromhex("0800"): Receiver("auth info", response_authinfo),
-        bytes.fromhex("2301"): Receiver("position", response_position),
-        bytes.fromhex("2501"): Receiver("roller info updated", response_roller_updated),
-        bytes.fromhex("4301"): Receiver("timer created", response_discard),
-        bytes.fromhex("4501"): Receiver("timer device updated", response_discard),
-        bytes.fromhex("4901"): Receiver("timer info updated", response_discard),
-        bytes.fromhex("4701"): Receiver("timer deleted", response_discard),
-        bytes.fromhex("2b01"): Receiver("roller health", response_rollerhealth),
-        bytes.fromhex("0f00"): Receiver("discover response", response_discover),
+    msgmap: dict[int, Receiver] = {
+        MessageType.HUB_INFO: Receiver("hub info", response_hubinfo),
+        MessageType.HUB_INFO_UPDATED: Receiver("hub info updated", response_discard),
+        MessageType.ROOM_LIST: Receiver("room list", response_roomlist),
+        MessageType.SCENE_LIST: Receiver("scene list", response_scenelist),
+        MessageType.ROLLER_LIST: Receiver("roller list", response_rollerlist),
+        MessageType.TIMER_LIST: Receiver("timer list", response_timerlist),
+        MessageType.AUTH_INFO: Receiver("auth info", response_authinfo),
+        MessageType.POSITION: Receiver("position", response_position),
+        MessageType.ROLLER_UPDATED: Receiver(
+            "roller info updated", response_roller_updated
+        ),
+        MessageType.TIMER_CREATED: Receiver("timer created", response_discard),
+        MessageType.TIMER_DEVICE_UPDATED: Receiver(
+            "timer device updated", response_discard
+        ),
+        MessageType.TIMER_INFO_UPDATED: Receiver(
+            "timer info updated", response_discard
+        ),
+        MessageType.TIMER_DELETED: Receiver("timer deleted", response_discard),
+        MessageType.ROLLER_HEALTH: Receiver("roller health", response_rollerhealth),
+        MessageType.DISCOVER_RESPONSE: Receiver(
+            "discover response", response_discover
+        ),
     }
 
-    def rec_ping(self, message: bytes) -> None:
+    def rec_ping(self, message: utils.ReadableBuffer) -> None:
         """Receive a ping from the hub."""
         _LOGGER.debug(f"{self.host}: Received hub ping response")
+        self.keepalive.pong_received()
 
-    def rec_message(self, message: bytes) -> None:
+    def rec_message(self, message: utils.ReadableBuffer) -> None:
         """Receive and decode a message from the hub."""
         if message:
             if message[0] != 6:
@@ -608,61 +1185,68 @@ class Hub(CallbackMixin):
 
             ptr = 1 + len(self.topic)
             _, ptr = utils.unpack_int(message, ptr, 2)
-            mtype = message[ptr : (ptr + 2)]
+            mtype = int.from_bytes(message[ptr : (ptr + 2)], "big")
             ptr = ptr + 2
-            if mtype in self.msgmap:
-                _LOGGER.info(f"{self.host}: Parsing {self.msgmap[mtype].name}")
-                self.msgmap[mtype].execute(self, message[ptr:])
+            receiver = self.msgmap.get(mtype)
+            if receiver is not None:
+                _LOGGER.info("%s: Parsing %s", self.host, receiver.name)
+                receiver.execute(self, message[ptr:])
             else:
                 _LOGGER.warning(
-                    "%s: Unable to parse message %s message %s",
+                    "%s: Unable to parse message %04x message %s",
                     self.host,
-                    mtype.hex(),
+                    mtype,
                     message.hex(),
                 )
         else:
             """message is the acknowledgement of a command"""
-            if self.command_lock.locked():
-                self.command_lock.release()
+            self.command_engine.acknowledge()
 
     respmap = {
         22: Receiver("ping", rec_ping),
         145: Receiver("message", rec_message),
     }
 
-    def response_parse(self, response: bytes) -> None:
-        """Decode response."""
-        while response:
-            ptr = 0
-            header, ptr = utils.unpack_bytes(response, ptr, 4)
-            if header != bytes.fromhex("00000003"):
-                _LOGGER.warning(f"{self.host}: Unknown response: {response[0:4].hex()}")
+    def response_parse(self, response: utils.ReadableBuffer) -> None:
+        """Decode response.
+
+        The response may hold several frames; they are walked by offset over a
+        single memoryview so no frame copies the remainder of the buffer.
+        """
+        view = memoryview(response)
+        frame = 0
+        while frame < len(view):
+            header, ptr = utils.unpack_bytes(view, frame, 4)
+            if header != const.HEADER:
+                _LOGGER.warning(f"{self.host}: Unknown response: {header.hex()}")
                 raise errors.InvalidResponseException
 
             try:
-                msg_len, ptr = utils.unpack_int(response, ptr, 1)
+                msg_len, ptr = utils.unpack_int(view, ptr, 1)
                 msg_blocks = 1
 
                 if msg_len > 127:
-                    msg_blocks, ptr = utils.unpack_int(response, ptr, 1)
+                    msg_blocks, ptr = utils.unpack_int(view, ptr, 1)
 
                 msg_end = ptr + msg_len + 128 * (msg_blocks - 1)
 
-                if msg_end > len(response):
+                if msg_end > len(view):
                     raise errors.InvalidResponseException
 
-                _, ptr = utils.unpack_bytes(response, ptr, 2)
-                mtype, ptr = utils.unpack_int(response, ptr, 1)
+                ptr += 2
+                mtype, ptr = utils.unpack_int(view, ptr, 1)
 
-                message = response[ptr:msg_end]
-                response = response[msg_end:]
+                message = view[ptr:msg_end]
+                frame = msg_end
 
-                if mtype in Hub.respmap:
-                    _LOGGER.debug(
-                        f"{self.host}: Received response: {mtype} "
-                        f"{Hub.respmap[mtype].name} content: {message.hex()}"
-                    )
-                    Hub.respmap[mtype].execute(self, message)
+                receiver = Hub.respmap.get(mtype)
+                if receiver is not None:
+                    if _LOGGER.isEnabledFor(logging.DEBUG):
+                        _LOGGER.debug(
+                            f"{self.host}: Received response: {mtype} "
+                            f"{receiver.name} content: {message.hex()}"
+                        )
+                    receiver.execute(self, message)
                 else:
                     _LOGGER.warning(
                         f"{self.host}: Received unknown response type: "
@@ -674,7 +1258,7 @@ class Hub(CallbackMixin):
             except Exception:
                 logging.exception(
                     f"{self.host}: Exception raised when parsing response: "
-                    f"{response.hex()}"
+                    f"{view[frame:].hex()}"
                 )
                 raise errors.InvalidResponseException
 
@@ -684,93 +1268,269 @@ class Hub(CallbackMixin):
         while self.handshake.is_set():
             """Only catch exceptions that can be recovered from without reconnecting"""
             try:
+                await self._wait_for_streams()
                 async with asyncio.timeout(30):
                     response = await self.get_response()
                 if len(response) > 0:
                     self.response_parse(response)
             except TimeoutError:
                 _LOGGER.debug(f"{self.host}: Receive timeout, sending ping keepalive")
-                self.protocol.send(const.HEADER + CommandType.PING.to_bytes(4, "big"))
+                self.keepalive.ping()
             except errors.InvalidResponseException:
                 _LOGGER.debug(f"{self.host}: Invalid response, sending ping keepalive")
-                self.protocol.send(const.HEADER + CommandType.PING.to_bytes(4, "big"))
+                self.keepalive.ping()
 
     async def update(self) -> None:
         """Update all hub information (includes scenes, rooms, and rollers)."""
-        await self.send_command(
-            CommandType.GET_HUB_INFO.to_bytes(4, "big"),
-            bytes.fromhex("F000"),
-            bytes.fromhex("000000000000FF"),
-        )
+        try:
+            await self.send_command(
+                CommandType.GET_HUB_INFO.to_bytes(4, "big"),
+                bytes.fromhex("F000"),
+                bytes.fromhex("000000000000FF"),
+                priority=CommandPriority.HOUSEKEEPING,
+            )
+        except errors.NotRunningException:
+            # run() schedules update() without awaiting it; stopped meanwhile
+            _LOGGER.debug(f"{self.host}: Hub stopped, update not sent")
+            return
         _LOGGER.debug(f"{self.host}: Hub update command sent")
 
+    def encode_command(
+        self, command: bytes, message_type: bytes, message: utils.ReadableBuffer
+    ) -> bytes:
+        """Encode a command frame and assign it the next sequence number.
+
+        The frame header for each command is cached and the frame is filled in
+        a reusable buffer, so only the returned bytes are allocated.
+        """
+        header = self._command_headers.get(command)
+        if header is None:
+            header = const.HEADER + command + bytes.fromhex("05") + self.topic
+            self._command_headers[command] = header
+        sequence = self.sequence
+        self.sequence = (sequence + 2) & 0xFFFF
+        length = len(message_type) + 2 + len(message) + 1
+        checksum = sum(message_type) + (sequence & 0xFF) + (sequence >> 8)
+        checksum += sum(message)
+        buffer = self._encode_buffer
+        buffer[:] = header
+        buffer += _UINT16.pack(length)
+        buffer += message_type
+        buffer += _UINT16.pack(sequence)
+        buffer += message
+        buffer.append(checksum & 0xFF)
+        return bytes(buffer)
+
     async def send_command(
         self,
         command: bytes,
         message_type: bytes,
-        message: bytes,
+        message: utils.ReadableBuffer,
         timeout: float = 3.0,
         retries: int = 3,
-    ) -> None:
-        """Send payload to the hub."""
+        key: Hashable | None = None,
+        priority: CommandPriority = CommandPriority.INTERACTIVE,
+    ) -> bool:
+        """Send payload to the hub.
+
+        Up to command_window commands are in flight at once; each is retried
+        every `timeout` seconds until acknowledged or `retries` attempts fail.
+        A command with a key replaces any queued, unsent command with the same
+        key, e.g. an older move for the same roller. Queued interactive
+        commands are sent before housekeeping ones such as health checks.
+
+        Returns:
+            True if the hub acknowledged the command (or its replacement),
+            False if it timed out or the hub disconnected first.
+        """
         if not self.running:
             raise errors.NotRunningException
+        # encode before awaiting so the caller may reuse its message buffer
+        sequence = self.sequence
+        buffer = self.encode_command(command, message_type, message)
         await self.handshake.wait()
-        data = message_type + utils.pack_int(self.sequence, 2) + message
-        checksum = bytes([sum(data) & 0xFF])
-        self.sequence += 2
-        command_header = const.HEADER + command + bytes.fromhex("05") + self.topic
-        length = len(data) + 1  # bytes.fromhex('0C00')
-        buffer = command_header + utils.pack_int(length, 2) + data + checksum
-        _LOGGER.debug(f"{self.host}: Sending buffer {buffer.hex()}")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug(f"{self.host}: Sending buffer {buffer.hex()}")
 
-        await self.command_lock.acquire()
+        try:
+            acknowledged = await self.command_engine.submit(
+                sequence, buffer, timeout, retries, key, priority
+            )
+        except errors.NotConnectedException as inst:
+            _LOGGER.warning(f"{self.host}: command not acknowledged: {inst}")
+            return False
+        if acknowledged:
+            _LOGGER.info(f"{self.host}: command successful.")
+            return True
+        _LOGGER.warning(f"{self.host}: command failed after {retries} attempts.")
+        return False
 
-        attempt = 0
-        while attempt < retries:
-            self.protocol.send(buffer)
+    async def send_many(
+        self,
+        command: bytes,
+        messages: Mapping[int, utils.ReadableBuffer],
+        message_type: bytes = commands.MOVE_MESSAGE_TYPE,
+        timeout: float = 3.0,
+        retries: int = 3,
+    ) -> dict[int, bool]:
+        """Send one command per target in a single transport write.
 
-            try:
-                await asyncio.wait_for(self.command_lock.acquire(), timeout=timeout)
-                _LOGGER.info(f"{self.host}: command successful.")
-                break
-            except TimeoutError:
-                attempt += 1
-                _LOGGER.warning(f"{self.host}: command timed out.")
+        Args:
+            command: The command type sent to every target.
+            messages: Payload for each target id; queued commands for the same
+                targets are replaced by the batch.
+            message_type: The message type sent with every payload.
+            timeout: Seconds to wait for each acknowledgement.
+            retries: Number of attempts per command.
+
+        Returns:
+            For each target id, True if the hub acknowledged its command. If
+            the hub disconnects before the batch is done, every target is
+            reported False.
+        """
+        if not self.running:
+            raise errors.NotRunningException
+        frames: list[tuple[int, bytes]] = []
+        for message in messages.values():
+            sequence = self.sequence
+            frames.append(
+                (sequence, self.encode_command(command, message_type, message))
+            )
+        if not frames:
+            return {}
+        await self.handshake.wait()
+        _LOGGER.info(f"{self.host}: sending {len(frames)} commands in one batch")
+        try:
+            results = await self.command_engine.submit_batch(
+                frames, timeout, retries, keys=list(messages)
+            )
+        except errors.NotConnectedException as inst:
+            _LOGGER.warning(f"{self.host}: batch not acknowledged: {inst}")
+            return dict.fromkeys(messages, False)
+        return dict(zip(messages, results, strict=True))
+
+    def _roller_commands(self, roller_id: int) -> DeviceCommands:
+        """Prebuilt commands for a roller id, known to the hub or not."""
+        roller = self.rollers.get(roller_id)
+        return roller.commands if roller else DeviceCommands(roller_id)
+
+    async def move_many(self, positions: Mapping[int, int]) -> dict[int, bool]:
+        """Move several rollers to a percentage closed in one batch.
+
+        Args:
+            positions: Target percentage closed (0-100) for each roller id.
+
+        Returns:
+            For each roller id, True if the hub acknowledged the move.
+        """
+        return await self.send_many(
+            commands.MOVE_TO,
+            {
+                roller_id: self._roller_commands(roller_id).move_to(percent)
+                for roller_id, percent in positions.items()
+            },
+        )
+
+    async def move_up_many(self, roller_ids: Iterable[int]) -> dict[int, bool]:
+        """Move several rollers to fully open in one batch."""
+        return await self.send_many(
+            commands.MOVE,
+            {
+                roller_id: self._roller_commands(roller_id).up
+                for roller_id in roller_ids
+            },
+        )
 
-        if self.command_lock.locked():
-            self.command_lock.release()
+    async def move_down_many(self, roller_ids: Iterable[int]) -> dict[int, bool]:
+        """Move several rollers to fully closed in one batch."""
+        return await self.send_many(
+            commands.MOVE,
+            {
+                roller_id: self._roller_commands(roller_id).down
+                for roller_id in roller_ids
+            },
+        )
+
+    async def move_stop_many(self, roller_ids: Iterable[int]) -> dict[int, bool]:
+        """Stop several rollers in one batch."""
+        return await self.send_many(
+            commands.MOVE,
+            {
+                roller_id: self._roller_commands(roller_id).stop
+                for roller_id in roller_ids
+            },
+        )
 
     async def send_healthcheck(
-        self, command: bytes, message_type: bytes, message: bytes
-    ) -> None:
-        """Send payload to the hub."""
-        await self.health_lock.acquire()
+        self,
+        command: bytes,
+        message_type: bytes,
+        message: utils.ReadableBuffer,
+        roller_id: int | None = None,
+        timeout: float = 5.0,
+    ) -> bool:
+        """Send a health request and wait for the roller's health response.
 
-        await self.send_command(command, message_type, message)
+        Args:
+            command: The command bytes.
+            message_type: The message type bytes.
+            message: The health request payload.
+            roller_id: The roller the request is addressed to; if None the
+                response is not waited for.
+            timeout: Seconds to wait for the health response.
 
-        try:
-            await asyncio.wait_for(self.health_lock.acquire(), timeout=5.0)
+        Returns:
+            True if the health response was received, False otherwise or if
+            the hub is not connected.
+        """
+        if not self.handshake.is_set():
+            # health checks are housekeeping, skip them rather than wait out
+            # a reconnect
+            _LOGGER.debug(f"{self.host}: Not connected, health-check skipped.")
+            return False
+        waiter = self._health_waiters.get(roller_id) if roller_id is not None else None
+        if roller_id is not None and (waiter is None or waiter.done()):
+            waiter = asyncio.get_running_loop().create_future()
+            self._health_waiters[roller_id] = waiter
 
+        try:
+            await self.send_command(
+                command, message_type, message, priority=CommandPriority.HOUSEKEEPING
+            )
+            if waiter is None:
+                return True
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=timeout)
+            return True
         except TimeoutError:
             _LOGGER.warning(f"{self.host}: Health-check timed out.")
-
-        if self.health_lock.locked():
-            self.health_lock.release()
+            return False
+        finally:
+            if roller_id is not None and self._health_waiters.get(roller_id) is waiter:
+                del self._health_waiters[roller_id]
 
     async def run(self) -> None:
         """Start hub by connecting then awaiting for messages.
 
-        Runs until the stop() method is called.
+        Runs until the stop() method is called. Lost connections are retried
+        with delays from the reconnect policy.
         """
         if self.running:
             _LOGGER.warning(f"{self.host}: Already running")
             return
         self.running = True
+        self._stop_requested.clear()
+        self._mark_disconnected()
+        self.health_scheduler.start()
+        self.keepalive.start()
+        failures = 0
         while self.running:
+            connected_at = None
             try:
                 _LOGGER.info(f"{self.host}: Connecting")
                 await self.connect()
+                connected_at = time.monotonic()
+                if self.rollers or self.rooms or self.scenes or self.timers:
+                    self._begin_resync()
                 # await self.update()
                 self._schedule_callback(self.update)
                 await self.response_parser()
@@ -790,10 +1550,31 @@ class Hub(CallbackMixin):
             finally:
                 if self.handshake.is_set():
                     await self.disconnect()
+                if (
+                    connected_at is not None
+                    and time.monotonic() - connected_at
+                    >= self.reconnect_policy.stable_after
+                ):
+                    failures = 0
                 if self.running:
-                    await asyncio.sleep(5)
+                    await self._reconnect_delay(failures)
+                    failures += 1
+        await self.health_scheduler.stop()
+        await self.keepalive.stop()
+        self._mark_connected()
         _LOGGER.debug(f"{self.host}: Stopped")
 
+    async def _reconnect_delay(self, failures: int) -> None:
+        """Wait before the next reconnect attempt, returning early on stop."""
+        self.reconnect_attempts += 1
+        delay = self.reconnect_policy.delay(failures)
+        if delay <= 0:
+            await asyncio.sleep(0)
+            return
+        _LOGGER.info(f"{self.host}: Reconnecting in {delay:.1f}s")
+        with contextlib.suppress(TimeoutError):
+            await asyncio.wait_for(self._stop_requested.wait(), timeout=delay)
+
     async def stop(self) -> None:
         """Tell hub to stop and await for it to disconnect."""
         if not self.running:
@@ -805,4 +1586,7 @@ class Hub(CallbackMixin):
         self.timers.clear()
         self.rollers.clear()
         self.running = False
+        self._stop_requested.set()
+        await self.health_scheduler.stop()
+        await self.keepalive.stop()
         await self.disconnect()
@@ -0,0 +1,167 @@
+"""Keepalive pings that time the hub's replies and detect dead links."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import TYPE_CHECKING
+
+import aiopulse.const as const
+from aiopulse import errors
+from aiopulse.const import CommandType
+
+if TYPE_CHECKING:
+    from aiopulse.hub import Hub
+
+_LOGGER = logging.getLogger(__name__)
+
+PING = const.HEADER + CommandType.PING.to_bytes(4, "big")
+
+
+class Keepalive:
+    """Ping the hub every `interval` seconds and time each reply.
+
+    Round trip times are smoothed as in TCP (RFC 6298) with gain `alpha`. A
+    ping not answered within `timeout` seconds counts as missed, and after
+    `max_missed` consecutive misses the link is declared dead and the hub is
+    disconnected so that Hub.run reconnects. A ping that can't be sent at all
+    declares the link dead at once. No pings are sent, and none counts as
+    missed, while the hub has paused reading for a full event stream.
+    """
+
+    def __init__(
+        self,
+        hub: Hub,
+        interval: float = 30.0,
+        timeout: float = 5.0,
+        max_missed: int = 2,
+        alpha: float = 0.125,
+    ) -> None:
+        """Init the keepalive.
+
+        Args:
+            hub: The hub to ping.
+            interval: Seconds between pings.
+            timeout: Seconds to wait for a reply before the ping is missed.
+            max_missed: Consecutive missed replies before the link is dead.
+            alpha: Weight of the newest sample in the smoothed round trip time.
+        """
+        if max_missed < 1:
+            raise ValueError("max_missed must be at least 1")
+        self.hub = hub
+        self.interval = interval
+        self.timeout = timeout
+        self.max_missed = max_missed
+        self.alpha = alpha
+        self._pong: asyncio.Future[float] | None = None
+        self._sent_at: float = 0.0
+        self._read_pauses: int = 0
+        self._task: asyncio.Task[None] | None = None
+
+        self.rtt: float | None = None
+        self.srtt: float | None = None
+        self.missed: int = 0
+        self.pings_sent: int = 0
+        self.pongs_received: int = 0
+        self.pongs_missed: int = 0
+        self.dead_links: int = 0
+
+    @property
+    def running(self) -> bool:
+        """Whether the keepalive task is running."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the keepalive task."""
+        if not self.running:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the keepalive task."""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the outstanding ping, e.g. after a disconnect."""
+        if self._pong is not None and not self._pong.done():
+            self._pong.cancel()
+        self._pong = None
+        self.missed = 0
+
+    def ping(self) -> asyncio.Future[float]:
+        """Send a ping, timing it unless a ping is already outstanding.
+
+        Returns:
+            Resolved with the round trip time when the reply arrives.
+        """
+        self.hub.protocol.send(PING)
+        self.pings_sent += 1
+        if self._pong is None or self._pong.done():
+            loop = asyncio.get_running_loop()
+            self._pong = loop.create_future()
+            self._sent_at = loop.time()
+        return self._pong
+
+    def pong_received(self) -> None:
+        """Record a ping reply from the hub."""
+        pong = self._pong
+        if pong is None or pong.done():
+            return  # unsolicited
+        rtt = asyncio.get_running_loop().time() - self._sent_at
+        self.pongs_received += 1
+        self.missed = 0
+        self.rtt = rtt
+        if self.srtt is None:
+            self.srtt = rtt
+        else:
+            self.srtt += self.alpha * (rtt - self.srtt)
+        pong.set_result(rtt)
+
+    async def _run(self) -> None:
+        """Ping the hub while it is connected."""
+        while True:
+            await self.hub.handshake.wait()
+            await asyncio.sleep(self.interval)
+            if not self.hub.handshake.is_set() or self.hub.reading_paused:
+                continue
+            self._read_pauses = self.hub.read_pauses
+            try:
+                # a reply arriving after the timeout is ignored as unsolicited
+                await asyncio.wait_for(self.ping(), self.timeout)
+            except TimeoutError:
+                await self._missed()
+            except (errors.NotConnectedException, OSError) as inst:
+                _LOGGER.warning(f"{self.hub.host}: Ping not sent: {inst}")
+                await self._link_dead()
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if task is None or task.cancelling():
+                    raise
+                # the outstanding ping was reset by a disconnect
+
+    async def _missed(self) -> None:
+        """Count a missed reply and drop the link after too many."""
+        if self.hub.reading_paused or self.hub.read_pauses != self._read_pauses:
+            # the reply may be waiting unread behind a full event stream
+            _LOGGER.debug(f"{self.hub.host}: Ping reply not read, reading paused")
+            return
+        self.missed += 1
+        self.pongs_missed += 1
+        _LOGGER.warning(
+            f"{self.hub.host}: No ping reply within {self.timeout}s "
+            f"({self.missed}/{self.max_missed})"
+        )
+        if self.missed >= self.max_missed:
+            await self._link_dead()
+
+    async def _link_dead(self) -> None:
+        """Disconnect the hub so that Hub.run reconnects."""
+        _LOGGER.error(f"{self.hub.host}: Link dead, disconnecting")
+        self.dead_links += 1
+        self.reset()
+        try:
+            await self.hub.disconnect()
+        except OSError as inst:
+            _LOGGER.warning(f"{self.hub.host}: Disconnect failed: {inst}")
@@ -0,0 +1,156 @@
+"""Run many hubs in one process."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable, Iterator
+from typing import Any
+
+import aiopulse
+from aiopulse.callbacks import CallbackMixin
+from aiopulse.const import UpdateType
+
+_LOGGER = logging.getLogger(__name__)
+
+RollerKey = tuple[str, int]
+
+
+class HubManager(CallbackMixin):
+    """Own a set of hubs, run them concurrently and merge their updates.
+
+    Health polls of every managed hub share one budget of `max_health_polls`
+    polls in flight. Rollers are indexed by (hub id, roller id), and hub and
+    roller updates from every hub are forwarded to the manager's callbacks
+    as callback(hub, update_type, roller), with roller None for hub updates
+    and the ChangeBatch for UpdateType.batch.
+    """
+
+    def __init__(self, max_health_polls: int = 4) -> None:
+        """Init the manager.
+
+        Args:
+            max_health_polls: Health polls in flight across all hubs.
+        """
+        super().__init__()
+        self.health_budget = asyncio.Semaphore(max_health_polls)
+        self.hubs: list[aiopulse.Hub] = []
+        self.rollers: dict[RollerKey, aiopulse.Roller] = {}
+        self.running: bool = False
+        self._tasks: dict[aiopulse.Hub, asyncio.Task[None]] = {}
+        self._hub_callbacks: dict[aiopulse.Hub, Callable[..., Any]] = {}
+        self._roller_callbacks: dict[RollerKey, Callable[..., Any]] = {}
+        self._indexed: dict[aiopulse.Hub, set[RollerKey]] = {}
+
+    def __iter__(self) -> Iterator[aiopulse.Hub]:
+        """Iterate over the managed hubs."""
+        return iter(self.hubs)
+
+    def __len__(self) -> int:
+        """Number of managed hubs."""
+        return len(self.hubs)
+
+    def add(self, hub: aiopulse.Hub) -> None:
+        """Manage a hub, starting it if the manager is running."""
+        if hub in self._hub_callbacks:
+            return
+        hub.health_scheduler.slots = self.health_budget
+
+        async def forward(update_type: UpdateType, *args: Any) -> None:
+            if update_type in (UpdateType.rollers, UpdateType.resynced) or (
+                update_type is UpdateType.batch and UpdateType.rollers in args[0]
+            ):
+                self._index(hub)
+            self.notify_callback(hub, update_type, *args or (None,))
+
+        callback: Callable[..., Any] = forward
+        self._hub_callbacks[hub] = callback
+        hub.callback_subscribe(callback)
+        self.hubs.append(hub)
+        self._index(hub)
+        if self.running:
+            self._start(hub)
+
+    async def remove(self, hub: aiopulse.Hub) -> None:
+        """Stop managing a hub, stopping it if it is running."""
+        forward = self._hub_callbacks.pop(hub, None)
+        if forward is None:
+            return
+        hub.callback_unsubscribe(forward)
+        self.hubs.remove(hub)
+        await self._stop(hub)
+        self._unindex(hub, set())
+
+    def roller(self, hub_id: str, roller_id: int) -> aiopulse.Roller | None:
+        """Return a roller by hub id and roller id."""
+        return self.rollers.get((hub_id, roller_id))
+
+    def start(self) -> None:
+        """Run every managed hub."""
+        if self.running:
+            return
+        self.running = True
+        for hub in self.hubs:
+            self._start(hub)
+
+    async def stop(self) -> None:
+        """Stop every managed hub and wait for them to finish."""
+        self.running = False
+        await asyncio.gather(*(self._stop(hub) for hub in list(self._tasks)))
+        for hub in self.hubs:
+            self._unindex(hub, set())
+
+    def _start(self, hub: aiopulse.Hub) -> None:
+        """Run one hub in its own task."""
+        task = asyncio.get_running_loop().create_task(hub.run())
+        self._tasks[hub] = task
+
+    async def _stop(self, hub: aiopulse.Hub) -> None:
+        """Stop one hub and wait for its task."""
+        task = self._tasks.pop(hub, None)
+        if task is None:
+            return
+        if hub.running:
+            await hub.stop()
+        try:
+            await asyncio.wait_for(task, timeout=10)
+        except TimeoutError:
+            _LOGGER.warning(f"{hub.host}: Hub did not stop in time")
+        except Exception as inst:
+            _LOGGER.error(f"{hub.host}: Hub stopped with exception: {inst}")
+
+    def _index(self, hub: aiopulse.Hub) -> None:
+        """Bring the roller index up to date with one hub's rollers."""
+        if hub.id is None:
+            return
+        current = {(hub.id, roller_id) for roller_id in hub.rollers}
+        self._unindex(hub, current)
+        self._indexed[hub] = current
+        for key in current:
+            roller = hub.rollers[key[1]]
+            if self.rollers.get(key) is roller:
+                continue
+            self.rollers[key] = roller
+            forward = self._forward_roller(hub, roller)
+            self._roller_callbacks[key] = forward
+            roller.callback_subscribe(forward)
+
+    def _unindex(self, hub: aiopulse.Hub, keep: set[RollerKey]) -> None:
+        """Remove a hub's rollers from the index, except those in keep."""
+        indexed = self._indexed.pop(hub, set())
+        for key in indexed - keep:
+            roller = self.rollers.pop(key, None)
+            if roller is None:
+                continue
+            forward = self._roller_callbacks.pop(key, None)
+            if forward is not None:
+                roller.callback_unsubscribe(forward)
+
+    def _forward_roller(
+        self, hub: aiopulse.Hub, roller: aiopulse.Roller
+    ) -> Callable[..., Any]:
+        """Return a callback forwarding a roller's updates to the manager."""
+
+        async def forward(*args: Any) -> None:
+            self.notify_callback(hub, UpdateType.rollers, roller)
+
+        return forward
@@ -0,0 +1,114 @@
+"""Rate limiting and debouncing of update callbacks."""
+from __future__ import annotations
+
+import asyncio
+import math
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from aiopulse.batch import ChangeBatch
+
+
+class RateLimiter:
+    """Deliver one subscriber's notifications at a limited rate.
+
+    With `max_rate`, the first notification is delivered at once and later
+    ones at most `max_rate` times a second. With `debounce`, notifications
+    are delivered once none has arrived for `debounce` seconds. Held
+    notifications with the same arguments (e.g. the same roller, or the same
+    update type) are merged, so each is delivered once with the latest state.
+    Held UpdateType.batch notifications are merged into one ChangeBatch.
+    """
+
+    def __init__(
+        self,
+        deliver: Callable[..., Any],
+        max_rate: float | None = None,
+        debounce: float | None = None,
+    ) -> None:
+        """Init the limiter.
+
+        Args:
+            deliver: Called with the arguments of each delivered notification.
+            max_rate: Deliveries per second.
+            debounce: Quiet period in seconds before delivering.
+        """
+        if (max_rate is None) == (debounce is None):
+            raise ValueError("Give exactly one of max_rate and debounce")
+        if max_rate is not None and max_rate <= 0:
+            raise ValueError("max_rate must be positive")
+        if debounce is not None and debounce <= 0:
+            raise ValueError("debounce must be positive")
+        self.deliver = deliver
+        self.max_rate = max_rate
+        self.debounce = debounce
+        self._interval = 1.0 / max_rate if max_rate is not None else 0.0
+        self._pending: dict[Hashable, tuple[Any, ...]] = {}
+        self._timer: asyncio.TimerHandle | None = None
+        self._last_delivery = -math.inf
+
+        self.received: int = 0
+        self.delivered: int = 0
+
+    @property
+    def saved(self) -> int:
+        """Notifications merged into another instead of being delivered."""
+        return self.received - self.delivered - len(self._pending)
+
+    def notify(self, *args: Any) -> None:
+        """Deliver a notification now or hold it for later."""
+        self.received += 1
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        if self.debounce is not None:
+            self._hold(args)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = loop.call_later(self.debounce, self._flush)
+            return
+
+        if self._timer is None and now - self._last_delivery >= self._interval:
+            self._last_delivery = now
+            self.delivered += 1
+            self.deliver(*args)
+            return
+        self._hold(args)
+        if self._timer is None:
+            self._timer = loop.call_at(
+                self._last_delivery + self._interval, self._flush
+            )
+
+    def cancel(self) -> None:
+        """Drop held notifications."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        self._pending.clear()
+
+    def _hold(self, args: tuple[Any, ...]) -> None:
+        """Hold a notification, replacing an earlier one with the same args."""
+        key: Hashable = tuple(
+            ChangeBatch if isinstance(arg, ChangeBatch) else arg for arg in args
+        )
+        try:
+            hash(key)
+        except TypeError:
+            key = object()  # can't be merged
+        held = self._pending.pop(key, None)
+        if held is not None and key != args:
+            args = tuple(
+                old.merge(new) if isinstance(new, ChangeBatch) else new
+                for old, new in zip(held, args)
+            )
+        self._pending[key] = args
+
+    def _flush(self) -> None:
+        """Deliver the held notifications."""
+        self._timer = None
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        self._last_delivery = asyncio.get_running_loop().time()
+        for args in pending.values():
+            self.delivered += 1
+            self.deliver(*args)
@@ -0,0 +1,65 @@
+"""Reconnect policy for hubs that drop their connection."""
+from __future__ import annotations
+
+import random
+
+
+class ReconnectPolicy:
+    """Delay before each reconnect attempt.
+
+    The first retry after a lost connection is immediate, so a brief Wi-Fi
+    drop costs no waiting. Each further failure doubles the delay (times
+    `factor`) from `base` up to `maximum`, and every delay is spread by
+    +/- `jitter` so hubs that drop together do not reconnect in lockstep.
+    A connection only counts as up again once it has lasted `stable_after`
+    seconds, so a hub that accepts the handshake and drops at once keeps
+    backing off.
+    """
+
+    def __init__(
+        self,
+        base: float = 1.0,
+        factor: float = 2.0,
+        maximum: float = 300.0,
+        jitter: float = 0.25,
+        stable_after: float = 30.0,
+    ) -> None:
+        """Init the policy.
+
+        Args:
+            base: Delay in seconds after the first failed retry.
+            factor: Multiplier applied to the delay after each failure.
+            maximum: Upper bound of the delay in seconds, before jitter.
+            jitter: Fraction of the delay it is randomly moved by (0-1).
+            stable_after: Seconds a connection must stay up to reset the
+                backoff.
+        """
+        if base < 0 or maximum < base:
+            raise ValueError("delays must satisfy 0 <= base <= maximum")
+        if factor < 1:
+            raise ValueError("factor must be at least 1")
+        if not 0 <= jitter <= 1:
+            raise ValueError("jitter must be between 0 and 1")
+        if stable_after < 0:
+            raise ValueError("stable_after must not be negative")
+        self.base = base
+        self.factor = factor
+        self.maximum = maximum
+        self.jitter = jitter
+        self.stable_after = stable_after
+
+    def delay(self, failures: int) -> float:
+        """Seconds to wait before the next attempt.
+
+        Args:
+            failures: Consecutive failed attempts since the connection was
+                last stable, 0 for the first retry.
+        """
+        if failures <= 0:
+            return 0.0
+        try:
+            delay = min(self.maximum, self.base * self.factor ** (failures - 1))
+        except OverflowError:
+            # a hub that has been down for days, long past the cap
+            delay = self.maximum if self.base > 0 else 0.0
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
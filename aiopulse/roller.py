@@ -2,12 +2,11 @@
 
 from __future__ import annotations
 
-import asyncio
 import logging
 from typing import TYPE_CHECKING
 
-import aiopulse.utils as utils
-from aiopulse.const import CommandType
+import aiopulse.commands as commands
+from aiopulse.commands import DeviceCommands
 from aiopulse.entities import HubEntity
 
 if TYPE_CHECKING:
@@ -20,6 +19,17 @@ _LOGGER = logging.getLogger(__name__)
 class Roller(HubEntity):
     """Representation of a Roller blind."""
 
+    state_fields = (
+        "name",
+        "icon",
+        "type",
+        "serial",
+        "room_id",
+        "closed_percent",
+        "flags",
+        "battery",
+    )
+
     def __init__(self, hub: Hub, roller_id: int) -> None:
         """Init a new roller blind.
 
@@ -36,41 +46,7 @@ class Roller(HubEntity):
         self.battery: int | None = None
         self.closed_percent: int | None = None
         self.flags: int = 0
-
-        self.health_lock = asyncio.Lock()
-        self.health_task = hub._schedule_callback(self.health_updater)
-
-    def __del__(self) -> None:
-        """Cancel health updater task on deletion."""
-        if self.health_task:
-            self.health_task.cancel()
-
-    def health_updated(self) -> None:
-        """Signal that health data has been received."""
-        try:
-            self.health_lock.release()
-        except RuntimeError:
-            pass
-
-    async def health_updater(self) -> None:
-        """Periodically update roller health."""
-        await self.get_health()
-        running = True
-        try:
-            while running:
-                try:
-                    await asyncio.wait_for(self.health_lock.acquire(), timeout=3600)
-                except TimeoutError:
-                    await self.get_health()
-                except asyncio.CancelledError:
-                    running = False
-        except Exception as inst:
-            _LOGGER.error(
-                f"{self.hub.host}:{self.name}: health updater "
-                f"unhandled exception: {inst}"
-            )
-        _LOGGER.info(f"{self.hub.host}:{self.name}: health updater stopped")
-        running = False
+        self._commands: DeviceCommands | None = None
 
     def __str__(self) -> str:
         """Returns string representation of roller."""
@@ -88,81 +64,67 @@ class Roller(HubEntity):
             self.flags,
         )
 
+    @property
+    def commands(self) -> DeviceCommands:
+        """Prebuilt command payloads addressed to this roller."""
+        if self._commands is None or self._commands.target_id != int(self.id):
+            self._commands = DeviceCommands(int(self.id))
+        return self._commands
+
     async def move_to(self, percent: int) -> None:
         """Send command to move the roller to a percentage closed.
 
         Args:
             percent: Target position (0-100).
         """
-        message = (
-            bytes.fromhex("0000000000000101")
-            + bytes.fromhex("0600")
-            + utils.pack_int(int(self.id), 6)
-            + bytes.fromhex("03010100")
-            + bytes.fromhex("190401030001")
-            + utils.pack_int(percent, 2)
-            + bytes.fromhex("ff")
-        )
         _LOGGER.info(f"{self.hub.host}:{self.name}: sending blind move to {percent}%")
         await self.hub.send_command(
-            CommandType.MOVE_TO.to_bytes(4, "big"), bytes.fromhex("2201"), message
+            commands.MOVE_TO,
+            commands.MOVE_MESSAGE_TYPE,
+            self.commands.move_to(percent),
+            key=self.commands.target_id,
         )
 
     async def move_up(self) -> None:
         """Send command to move the roller to fully open."""
-        message = (
-            bytes.fromhex("0000000000000101")
-            + bytes.fromhex("0600")
-            + utils.pack_int(int(self.id), 6)
-            + bytes.fromhex("03010100")
-            + bytes.fromhex("10")
-            + bytes.fromhex("ff")
-        )
         _LOGGER.info(f"{self.hub.host}:{self.name}: sending blind up")
         await self.hub.send_command(
-            CommandType.MOVE.to_bytes(4, "big"), bytes.fromhex("2201"), message
+            commands.MOVE,
+            commands.MOVE_MESSAGE_TYPE,
+            self.commands.up,
+            key=self.commands.target_id,
         )
 
     async def move_stop(self) -> None:
         """Send command to stop the roller."""
-        message = (
-            bytes.fromhex("0000000000000101")
-            + bytes.fromhex("0600")
-            + utils.pack_int(int(self.id), 6)
-            + bytes.fromhex("03010100")
-            + bytes.fromhex("11")
-            + bytes.fromhex("ff")
-        )
         _LOGGER.info(f"{self.hub.host}:{self.name}: sending blind stop")
         await self.hub.send_command(
-            CommandType.MOVE.to_bytes(4, "big"), bytes.fromhex("2201"), message
+            commands.MOVE,
+            commands.MOVE_MESSAGE_TYPE,
+            self.commands.stop,
+            key=self.commands.target_id,
         )
 
     async def move_down(self) -> None:
         """Send command to move the roller to fully closed."""
-        message = (
-            bytes.fromhex("0000000000000101")
-            + bytes.fromhex("0600")
-            + utils.pack_int(int(self.id), 6)
-            + bytes.fromhex("03010100")
-            + bytes.fromhex("12")
-            + bytes.fromhex("ff")
-        )
         _LOGGER.info(f"{self.hub.host}:{self.name}: sending blind down")
         await self.hub.send_command(
-            CommandType.MOVE.to_bytes(4, "big"), bytes.fromhex("2201"), message
+            commands.MOVE,
+            commands.MOVE_MESSAGE_TYPE,
+            self.commands.down,
+            key=self.commands.target_id,
         )
 
-    async def get_health(self) -> None:
-        """Request health information from the roller."""
-        message = (
-            bytes.fromhex("0000000000000101")
-            + bytes.fromhex("0600")
-            + utils.pack_int(int(self.id), 6)
-            + bytes.fromhex("410201000E4202010004")
-            + bytes.fromhex("ff")
-        )
+    async def get_health(self) -> bool:
+        """Request health information from the roller.
+
+        Returns:
+            True if the roller's health response arrived.
+        """
         _LOGGER.info(f"{self.hub.host}:{self.name}: sending health check")
-        await self.hub.send_healthcheck(
-            CommandType.GET_HEALTH.to_bytes(4, "big"), bytes.fromhex("2A01"), message
+        return await self.hub.send_healthcheck(
+            commands.GET_HEALTH,
+            commands.HEALTH_MESSAGE_TYPE,
+            self.commands.health,
+            roller_id=self.id,
         )
@@ -3,8 +3,8 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING
 
-import aiopulse.utils as utils
-from aiopulse.const import CommandType
+import aiopulse.commands as commands
+from aiopulse.commands import DeviceCommands
 from aiopulse.entities import HubEntity
 
 if TYPE_CHECKING:
@@ -22,69 +22,69 @@ class Room(HubEntity):
             room_id: The unique room identifier.
         """
         super().__init__(hub, room_id)
+        self._commands: DeviceCommands | None = None
 
     def __str__(self) -> str:
         """Returns string representation of room."""
         id_str = self.id[0:4].hex() if isinstance(self.id, bytes) else str(self.id)
         return f"Name: {self.name} ID: {id_str} Icon: {self.icon}"
 
+    @property
+    def commands(self) -> DeviceCommands:
+        """Prebuilt command payloads addressed to this room."""
+        if isinstance(self.id, (bytes, bytearray)):
+            target_id = int.from_bytes(self.id, "little")
+        else:
+            target_id = int(self.id)
+        if self._commands is None or self._commands.target_id != target_id:
+            self._commands = DeviceCommands(target_id)
+        return self._commands
+
+    @property
+    def command_key(self) -> tuple[str, int]:
+        """Coalescing key for moves of this room.
+
+        Kept apart from roller ids so a room move never replaces a queued
+        roller move.
+        """
+        return ("room", self.commands.target_id)
+
     async def move_to(self, percent: int) -> None:
         """Send command to move the room to a percentage closed.
 
         Args:
             percent: Target position (0-100).
         """
-        message = (
-            bytes.fromhex("0000000000000101")
-            + bytes.fromhex("0600")
-            + utils.pack_int(int(self.id), 6)
-            + bytes.fromhex("03010100")
-            + bytes.fromhex("190401030001")
-            + utils.pack_int(percent, 2)
-            + bytes.fromhex("ff")
-        )
         await self.hub.send_command(
-            CommandType.MOVE_TO.to_bytes(4, 'big'), bytes.fromhex("2201"), message
+            commands.MOVE_TO,
+            commands.MOVE_MESSAGE_TYPE,
+            self.commands.move_to(percent),
+            key=self.command_key,
         )
 
     async def move_up(self) -> None:
         """Send command to move the room to fully open."""
-        message = (
-            bytes.fromhex("0000000000000101")
-            + bytes.fromhex("0600")
-            + utils.pack_int(int(self.id), 6)
-            + bytes.fromhex("03010100")
-            + bytes.fromhex("10")
-            + bytes.fromhex("ff")
-        )
         await self.hub.send_command(
-            CommandType.MOVE.to_bytes(4, 'big'), bytes.fromhex("2201"), message
+            commands.MOVE,
+            commands.MOVE_MESSAGE_TYPE,
+            self.commands.up,
+            key=self.command_key,
         )
 
     async def move_stop(self) -> None:
         """Send command to stop the room."""
-        message = (
-            bytes.fromhex("0000000000000101")
-            + bytes.fromhex("0600")
-            + utils.pack_int(int(self.id), 6)
-            + bytes.fromhex("03010100")
-            + bytes.fromhex("11")
-            + bytes.fromhex("ff")
-        )
         await self.hub.send_command(
-            CommandType.MOVE.to_bytes(4, 'big'), bytes.fromhex("2201"), message
+            commands.MOVE,
+            commands.MOVE_MESSAGE_TYPE,
+            self.commands.stop,
+            key=self.command_key,
         )
 
     async def move_down(self) -> None:
         """Send command to move the room to fully closed."""
-        message = (
-            bytes.fromhex("0000000000000101")
-            + bytes.fromhex("0600")
-            + utils.pack_int(int(self.id), 6)
-            + bytes.fromhex("03010100")
-            + bytes.fromhex("12")
-            + bytes.fromhex("ff")
-        )
         await self.hub.send_command(
-            CommandType.MOVE.to_bytes(4, 'big'), bytes.fromhex("2201"), message
+            commands.MOVE,
+            commands.MOVE_MESSAGE_TYPE,
+            self.commands.down,
+            key=self.command_key,
         )
@@ -0,0 +1,241 @@
+"""Compact on-disk snapshot of the entities cached by a hub."""
+from __future__ import annotations
+
+import json
+import logging
+import os
+from typing import TYPE_CHECKING, Any
+
+import aiopulse
+import aiopulse.const as const
+
+if TYPE_CHECKING:
+    from aiopulse.hub import Hub
+
+_LOGGER = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Entities are stored as positional lists rather than objects to keep the
+# file small; the field order is fixed by the snapshot version.
+_TIMER_ROLLER = "r"
+_TIMER_SCENE = "s"
+
+
+def _hex(entity_id: bytes | int) -> str:
+    """Encode a byte string entity id."""
+    if not isinstance(entity_id, bytes):
+        raise TypeError(f"Expected a bytes id, got {entity_id!r}")
+    return entity_id.hex()
+
+
+def dump(hub: Hub) -> dict[str, Any]:
+    """Return the hub's entities as a JSON serialisable dict."""
+    timers = []
+    for timer in hub.timers.values():
+        kind: str | None = None
+        target: int | str | None = None
+        if isinstance(timer.entity, aiopulse.Roller):
+            kind, target = _TIMER_ROLLER, timer.entity.id
+        elif isinstance(timer.entity, aiopulse.Scene):
+            kind, target = _TIMER_SCENE, _hex(timer.entity.id)
+        timers.append(
+            [
+                _hex(timer.id),
+                timer.name,
+                timer.icon,
+                timer.state,
+                timer.hour,
+                timer.minute,
+                timer.days,
+                kind,
+                target,
+            ]
+        )
+    return {
+        "v": SNAPSHOT_VERSION,
+        "id": hub.id,
+        "info": [
+            hub.firmware_name,
+            hub.wifi_module,
+            hub.mac_address,
+            hub.ip_address,
+        ],
+        "rooms": [[_hex(room.id), room.name, room.icon] for room in hub.rooms.values()],
+        "rollers": [
+            [
+                roller.id,
+                roller.name,
+                roller.icon,
+                roller.type,
+                roller.serial,
+                roller.room_id.hex() if roller.room_id is not None else None,
+                roller.closed_percent,
+                roller.flags,
+                roller.battery,
+            ]
+            for roller in hub.rollers.values()
+        ],
+        "scenes": [
+            [_hex(scene.id), scene.name, scene.icon] for scene in hub.scenes.values()
+        ],
+        "timers": timers,
+    }
+
+
+def restore(hub: Hub, data: dict[str, Any]) -> None:
+    """Apply a snapshot produced by dump() to a hub.
+
+    Existing entities are updated in place and new ones are created. Each
+    list type that the snapshot contains is notified once.
+
+    Raises:
+        ValueError: The snapshot has an unknown version or a malformed entry.
+    """
+    if data.get("v") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {data.get('v')}")
+    try:
+        _restore(hub, data)
+    except (KeyError, TypeError, ValueError) as inst:
+        raise ValueError(f"Malformed snapshot: {inst}") from inst
+
+
+def _restore(hub: Hub, data: dict[str, Any]) -> None:
+    """Apply snapshot sections in dependency order."""
+    if hub.id is None:
+        hub.id = data["id"]
+    restored: dict[const.UpdateType, list[Any]] = {
+        const.UpdateType.rooms: [],
+        const.UpdateType.rollers: [],
+        const.UpdateType.scenes: [],
+        const.UpdateType.timers: [],
+    }
+
+    def record(
+        update_type: const.UpdateType, entity: Any, before: tuple[Any, ...] | None
+    ) -> None:
+        """Queue an entity for notification if the snapshot changed it."""
+        if hub._record_change(update_type, entity, entity.changes_since(before)):
+            restored[update_type].append(entity)
+
+    (
+        hub.firmware_name,
+        hub.wifi_module,
+        hub.mac_address,
+        hub.ip_address,
+    ) = data["info"]
+
+    for room_hex, name, icon in data["rooms"]:
+        room_id = bytes.fromhex(room_hex)
+        room = hub.rooms.get(room_id)
+        before = room.field_values() if room is not None else None
+        if room is None:
+            room = hub.rooms[room_id] = aiopulse.Room(hub, room_id)
+        room.name = name
+        room.icon = icon
+        record(const.UpdateType.rooms, room, before)
+
+    for (
+        roller_id,
+        name,
+        icon,
+        roller_type,
+        serial,
+        room_hex,
+        closed_percent,
+        flags,
+        battery,
+    ) in data["rollers"]:
+        roller = hub.rollers.get(roller_id)
+        before = roller.field_values() if roller is not None else None
+        if roller is None:
+            roller = hub.rollers[roller_id] = aiopulse.Roller(hub, roller_id)
+        roller.name = name
+        roller.icon = icon
+        roller.type = roller_type
+        roller.serial = serial
+        roller.room_id = bytes.fromhex(room_hex) if room_hex is not None else None
+        roller.room = hub.rooms.get(roller.room_id) if roller.room_id else None
+        roller.closed_percent = closed_percent
+        roller.flags = flags
+        roller.battery = battery
+        record(const.UpdateType.rollers, roller, before)
+
+    for scene_hex, name, icon in data["scenes"]:
+        scene_id = bytes.fromhex(scene_hex)
+        scene = hub.scenes.get(scene_id)
+        before = scene.field_values() if scene is not None else None
+        if scene is None:
+            scene = hub.scenes[scene_id] = aiopulse.Scene(hub, scene_id)
+        scene.name = name
+        scene.icon = icon
+        record(const.UpdateType.scenes, scene, before)
+
+    for timer_hex, name, icon, state, hour, minute, days, kind, target in data[
+        "timers"
+    ]:
+        timer_id = bytes.fromhex(timer_hex)
+        timer = hub.timers.get(timer_id)
+        before = timer.field_values() if timer is not None else None
+        if timer is None:
+            timer = hub.timers[timer_id] = aiopulse.Timer(hub, timer_id)
+        timer.name = name
+        timer.icon = icon
+        timer.state = state
+        timer.hour = hour
+        timer.minute = minute
+        timer.days = days
+        if kind == _TIMER_ROLLER:
+            timer.entity = hub.rollers.get(target)
+        elif kind == _TIMER_SCENE:
+            timer.entity = hub.scenes.get(bytes.fromhex(target))
+        else:
+            timer.entity = None
+        record(const.UpdateType.timers, timer, before)
+
+    for update_type, entities in restored.items():
+        hub._list_changed(update_type, entities)
+
+
+def save(hub: Hub, path: str | os.PathLike[str]) -> None:
+    """Write a hub snapshot to a file, replacing it atomically."""
+    temp = f"{os.fspath(path)}.tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump(dump(hub), file, separators=(",", ":"))
+    os.replace(temp, path)
+
+
+def load(hub: Hub, path: str | os.PathLike[str]) -> bool:
+    """Restore a hub from a snapshot file.
+
+    Returns:
+        True if the snapshot was loaded, False if the file is missing,
+        unreadable or belongs to a different hub.
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError) as inst:
+        _LOGGER.warning(f"{hub.host}: Couldn't read snapshot {path}: {inst}")
+        return False
+    if not isinstance(data, dict):
+        _LOGGER.warning(f"{hub.host}: Couldn't read snapshot {path}: not an object")
+        return False
+    if hub.id is not None and data.get("id") not in (None, hub.id):
+        _LOGGER.warning(
+            f"{hub.host}: Snapshot {path} is for hub {data.get('id')}, not {hub.id}"
+        )
+        return False
+    try:
+        restore(hub, data)
+    except ValueError as inst:
+        _LOGGER.warning(f"{hub.host}: Couldn't load snapshot {path}: {inst}")
+        return False
+    _LOGGER.info(
+        f"{hub.host}: Loaded snapshot with {len(hub.rollers)} rollers, "
+        f"{len(hub.rooms)} rooms, {len(hub.scenes)} scenes, "
+        f"{len(hub.timers)} timers"
+    )
+    return True
@@ -12,6 +12,8 @@ if TYPE_CHECKING:
 class Timer(HubEntity):
     """Representation of a Timer."""
 
+    state_fields = ("name", "icon", "state", "hour", "minute", "days", "entity")
+
     def __init__(self, hub: Hub, timer_id: bytes) -> None:
         """Init a new timer.
 
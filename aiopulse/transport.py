@@ -1,17 +1,85 @@
 """Network transport abstraction for hub."""
 
 import asyncio
+import functools
 import logging
 import socket
 
-# psutil does not provide type stubs in this project; ignore typing for import
-import psutil  # type: ignore
-
+from aiopulse.const import HEADER
 from aiopulse.errors import NotConnectedException
 
 _LOGGER = logging.getLogger(__name__)
 
 
+class StreamFramer:
+    """Reassemble complete hub frames from a TCP byte stream.
+
+    Bytes that do not yet form a complete frame are kept until the next read,
+    bytes that cannot be the start of a frame are dropped until the next
+    header is found.
+    """
+
+    def __init__(self) -> None:
+        """Initialise an empty framer."""
+        self._buffer = bytearray()
+        self.frames_received: int = 0
+        self.frames_reassembled: int = 0
+        self.bytes_dropped: int = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of buffered bytes waiting for the rest of their frame."""
+        return len(self._buffer)
+
+    def reset(self) -> None:
+        """Discard any partial frame, e.g. after a reconnect."""
+        self.bytes_dropped += len(self._buffer)
+        self._buffer.clear()
+
+    def feed(self, data: bytes) -> bytes:
+        """Add received data and return all complete frames now available.
+
+        Args:
+            data: Bytes read from the stream.
+
+        Returns:
+            The complete frames, concatenated, or b"" if none are complete yet.
+        """
+        buffer = self._buffer
+        carried = len(buffer)
+        buffer += data
+        frames: list[bytearray] = []
+        ptr = 0
+        end = len(buffer)
+        while end - ptr >= 5:
+            if buffer[ptr : ptr + 4] != HEADER:
+                resync = buffer.find(HEADER, ptr + 1)
+                if resync < 0:
+                    # keep a possible partial header at the end of the buffer
+                    resync = max(ptr + 1, end - (len(HEADER) - 1))
+                self.bytes_dropped += resync - ptr
+                ptr = resync
+                continue
+            msg_len = buffer[ptr + 4]
+            body = ptr + 5
+            msg_blocks = 1
+            if msg_len > 127:
+                if end - ptr < 6:
+                    break
+                msg_blocks = buffer[ptr + 5]
+                body += 1
+            frame_end = body + msg_len + 128 * (msg_blocks - 1)
+            if frame_end > end:
+                break
+            frames.append(buffer[ptr:frame_end])
+            self.frames_received += 1
+            if ptr < carried:
+                self.frames_reassembled += 1
+            ptr = frame_end
+        del buffer[:ptr]
+        return b"".join(frames)
+
+
 class HubTransportBase(asyncio.Protocol):
     """Base class for Hub transport implementations."""
 
@@ -77,6 +145,11 @@ class HubTransportUdp(HubTransportBase):
             raise NotConnectedException("UDP transport not connected")
         return await self.receive_queue.get()
 
+    def discard_received(self) -> None:
+        """Drop datagrams received but not read yet."""
+        while not self.receive_queue.empty():
+            self.receive_queue.get_nowait()
+
     def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
         """Callback for a received datagram, enqueue it."""
         # Don't close the socket as we might get multiple responses.
@@ -84,8 +157,43 @@ class HubTransportUdp(HubTransportBase):
         self.receive_queue.put_nowait((data, addr))
 
 
+class _InterfaceEndpoint(asyncio.DatagramProtocol):
+    """Broadcast endpoint on one interface, forwarding replies to its owner."""
+
+    def __init__(self, owner: "HubTransportUdp", address: str) -> None:
+        """Init the endpoint."""
+        self.owner = owner
+        self.address = address
+
+    def datagram_received(self, data: bytes, addr: tuple[str, int]) -> None:
+        """Pass a reply received on this interface to the owner."""
+        self.owner.datagram_received(data, addr)
+
+    def error_received(self, exc: Exception) -> None:
+        """Log a send error on this interface."""
+        _LOGGER.debug(f"Error on interface {self.address}: {exc}")
+
+
 class HubTransportUdpBroadcast(HubTransportUdp):
-    """UDP Based Hub transport."""
+    """UDP Based Hub transport.
+
+    When broadcasting on all interfaces, the interface table is read once
+    and one non-blocking endpoint per interface stays open until close();
+    call refresh_interfaces() after the host's interfaces change. Keep one
+    connected instance and pass it to Hub.discover to reuse the table and
+    endpoints across discoveries.
+    """
+
+    def __init__(self, host: str | None = None, port: int = 12414) -> None:
+        """Constructor for UDP broadcast transport class."""
+        super().__init__(host, port)
+        self.interfaces: list[str] | None = None
+        self.endpoints: dict[str, asyncio.DatagramTransport] = {}
+
+    @property
+    def connected(self) -> bool:
+        """Whether the main socket is open."""
+        return self.transport is not None and not self.transport.is_closing()
 
     async def connect(  # type: ignore[override]
         self, host: str = "255.255.255.255", bind_address: str | None = None
@@ -103,6 +211,7 @@ class HubTransportUdpBroadcast(HubTransportUdp):
         sock = socket.socket(addrinfo[0][0], socket.SOCK_DGRAM)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
         sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setblocking(False)
 
         # Bind to specific interface if provided
         if bind_address:
@@ -117,6 +226,15 @@ class HubTransportUdpBroadcast(HubTransportUdp):
             lambda: self,
             sock=sock,
         )
+        if self.host == "255.255.255.255" and not bind_address:
+            await self.refresh_interfaces()
+
+    async def close(self) -> None:
+        """Close the connection and the interface endpoints."""
+        for endpoint in self.endpoints.values():
+            endpoint.close()
+        self.endpoints.clear()
+        await super().close()
 
     def send(self, buffer: bytes) -> None:
         """Send buffer - on all interfaces for broadcast, or main socket otherwise."""
@@ -124,49 +242,81 @@ class HubTransportUdpBroadcast(HubTransportUdp):
             raise NotConnectedException("UDP transport not connected")
 
         # For broadcast, send on all interfaces
-        if self.host == "255.255.255.255":
+        if self.host == "255.255.255.255" and self.endpoints:
             self._send_to_all_interfaces(buffer)
         else:
             self.transport.sendto(buffer, (self.host or "", self.port))
 
-    def _send_to_all_interfaces(self, buffer: bytes) -> None:
-        """Send buffer on all available network interfaces."""
+    @staticmethod
+    def read_interfaces() -> list[str]:
+        """Return the IPv4 addresses of the interfaces to broadcast on."""
+        # psutil is only needed for broadcasts, so it is imported on first use;
+        # it does not provide type stubs in this project
+        import psutil  # type: ignore
+
+        interfaces: list[str] = []
+        for name, addrs in psutil.net_if_addrs().items():
+            for addr in addrs:
+                _LOGGER.debug(
+                    "Interface %s has address %s (family %s)",
+                    name,
+                    addr.address,
+                    addr.family,
+                )
+                if addr.family == socket.AF_INET and not addr.address.startswith(
+                    ("127.", "169.254.")
+                ):
+                    interfaces.append(addr.address)
+        return interfaces
+
+    async def refresh_interfaces(self) -> None:
+        """Re-read the interface table and open or close endpoints to match."""
+        loop = asyncio.get_running_loop()
         try:
-            interfaces: list[str] = []
-            for name, addrs in psutil.net_if_addrs().items():
-                for addr in addrs:
-                    _LOGGER.debug(
-                        "Interface %s has address %s (family %s)",
-                        name,
-                        addr.address,
-                        addr.family,
-                    )
-                    if addr.family == socket.AF_INET:
-                        interfaces.append(addr.address)
+            # psutil walks the OS interface table, keep it off the loop
+            self.interfaces = await loop.run_in_executor(None, self.read_interfaces)
+        except Exception as e:
+            _LOGGER.debug(f"Error reading interfaces: {e}")
+            self.interfaces = []
+        _LOGGER.info(
+            f"Broadcasting on {len(self.interfaces)} interfaces: {self.interfaces}"
+        )
 
-            _LOGGER.info(f"Sending on {len(interfaces)} interfaces: {interfaces}")
+        for ip in set(self.endpoints) - set(self.interfaces):
+            self.endpoints.pop(ip).close()
 
-            # Get the main socket's port
-            if self.transport:
-                sockname = self.transport.get_extra_info("sockname")
-                main_port = sockname[1] if sockname else 0
-            else:
-                main_port = 0
-
-            for ip in interfaces:
-                if not ip.startswith("127.") and not ip.startswith("169.254."):
-                    try:
-                        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-                        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
-                        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-                        sock.bind((ip, main_port))
-                        sock.sendto(buffer, (self.host or "", self.port))
-                        sock.close()
-                        _LOGGER.debug(f"Sent {len(buffer)} bytes on interface {ip}")
-                    except Exception as e:
-                        _LOGGER.debug(f"Failed to send on interface {ip}: {e}")
-        except Exception as e:
-            _LOGGER.debug(f"Error sending to all interfaces: {e}")
+        # Replies go to the main socket's port, so every endpoint shares it
+        main_port = 0
+        if self.transport:
+            sockname = self.transport.get_extra_info("sockname")
+            main_port = sockname[1] if sockname else 0
+
+        for ip in self.interfaces:
+            if ip in self.endpoints:
+                continue
+            try:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+                sock.setblocking(False)
+                sock.bind((ip, main_port))
+                transport, _ = await loop.create_datagram_endpoint(
+                    functools.partial(_InterfaceEndpoint, self, ip),
+                    sock=sock,
+                )
+            except Exception as e:
+                _LOGGER.debug(f"Failed to open endpoint on interface {ip}: {e}")
+                continue
+            self.endpoints[ip] = transport
+
+    def _send_to_all_interfaces(self, buffer: bytes) -> None:
+        """Send buffer on every interface endpoint without waiting."""
+        for ip, endpoint in self.endpoints.items():
+            try:
+                endpoint.sendto(buffer, (self.host or "", self.port))
+                _LOGGER.debug(f"Sent {len(buffer)} bytes on interface {ip}")
+            except Exception as e:
+                _LOGGER.debug(f"Failed to send on interface {ip}: {e}")
 
 
 class HubTransportTcp(HubTransportBase):
@@ -183,11 +333,13 @@ class HubTransportTcp(HubTransportBase):
         self.protocol: asyncio.StreamReaderProtocol | None = None
         self.is_udp: bool = False
         self.connect_task: asyncio.Task[None] | None = None
+        self.framer = StreamFramer()
         super().__init__()
 
     async def do_connection(self) -> None:
         """Try and establish a TCP connection."""
         loop = asyncio.get_running_loop()
+        self.framer.reset()
         self.reader = asyncio.StreamReader()
         self.protocol = asyncio.StreamReaderProtocol(self.reader)
 
@@ -255,10 +407,20 @@ class HubTransportTcp(HubTransportBase):
         self.writer.write(buffer)
 
     async def receive(self) -> bytes:
-        """Receive from stream."""
+        """Receive one or more complete frames from the stream.
+
+        Partial frames are buffered until the rest arrives, so a frame split
+        across reads is returned whole. Returns b"" at end of stream.
+        """
         if not self.reader or not self.writer or self.writer.is_closing():
             raise NotConnectedException("TCP transport not connected")
-        return await self.reader.read(65535)
+        while True:
+            data = await self.reader.read(65535)
+            if not data:
+                return data
+            frames = self.framer.feed(data)
+            if frames:
+                return frames
 
     def data_received(self, data: bytes) -> None:
         """Callback when data has been received."""
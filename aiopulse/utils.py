@@ -1,12 +1,29 @@
 """Serialisation / Deserialisation helpers."""
 from __future__ import annotations
 
+import struct
 
-def unpack_int(buffer: bytes, ptr: int, length: int) -> tuple[int, int]:
+ReadableBuffer = bytes | bytearray | memoryview
+"""Any buffer the unpack helpers accept; slices of a memoryview are not copied."""
+
+ROLLER_STATE = struct.Struct("<IH4xB5xBB")
+"""Roller id (low 4 bytes, high 2 bytes), state, percent and flags."""
+
+ROLLER_HEALTH = struct.Struct("<IH18xBB8x")
+"""Roller id (low 4 bytes, high 2 bytes), battery volts and 1/256 volts."""
+
+ROLLER_OPEN = 0x10
+"""Roller state byte for a fully open roller."""
+
+ROLLER_CLOSED = 0x12
+"""Roller state byte for a fully closed roller."""
+
+
+def unpack_int(buffer: ReadableBuffer, ptr: int, length: int) -> tuple[int, int]:
     """Unpack an int of specified length from the buffer and advance the pointer.
 
     Args:
-        buffer: The bytes buffer to read from.
+        buffer: The buffer to read from.
         ptr: Current position in the buffer.
         length: Number of bytes to read.
 
@@ -33,17 +50,17 @@ def pack_int(value: int, length: int) -> bytes:
 
 
 def unpack_bytes(
-    buffer: bytes, ptr: int, length: int | None = None
-) -> tuple[bytes, int]:
+    buffer: ReadableBuffer, ptr: int, length: int | None = None
+) -> tuple[ReadableBuffer, int]:
     """Unpack a specified number of bytes from the buffer and advance the pointer.
 
     Args:
-        buffer: The bytes buffer to read from.
+        buffer: The buffer to read from.
         ptr: Current position in the buffer.
         length: Number of bytes to read, or None to read length prefix.
 
     Returns:
-        Tuple of (bytes, new_pointer).
+        Tuple of (slice of buffer, new_pointer).
     """
     ptr_new = ptr
     if not length:
@@ -52,12 +69,12 @@ def unpack_bytes(
 
 
 def unpack_string(
-    buffer: bytes, ptr: int, length: int | None = None
+    buffer: ReadableBuffer, ptr: int, length: int | None = None
 ) -> tuple[str, int]:
     """Unpack a specified number of characters from the buffer and advance the pointer.
 
     Args:
-        buffer: The bytes buffer to read from.
+        buffer: The buffer to read from.
         ptr: Current position in the buffer.
         length: Number of bytes to read, or None to read length prefix.
 
@@ -65,14 +82,14 @@ def unpack_string(
         Tuple of (string, new_pointer).
     """
     str_new, ptr_new = unpack_bytes(buffer, ptr, length=None)
-    return (str_new.decode("utf-8", "ignore"), ptr_new)
+    return (str(str_new, "utf-8", "ignore"), ptr_new)
 
 
-def unpack_roller_percent(buffer: bytes, ptr: int) -> tuple[int, int]:
+def unpack_roller_percent(buffer: ReadableBuffer, ptr: int) -> tuple[int, int]:
     """Unpack roller close percentage.
 
     Args:
-        buffer: The bytes buffer to read from.
+        buffer: The buffer to read from.
         ptr: Current position in the buffer.
 
     Returns:
@@ -89,3 +106,56 @@ def unpack_roller_percent(buffer: bytes, ptr: int) -> tuple[int, int]:
         return 100, ptr
     else:  # read roller percent
         return unpack_int(buffer, ptr, 1)
+
+
+def unpack_roller_state(buffer: ReadableBuffer, ptr: int) -> tuple[int, int, int, int]:
+    """Unpack roller id, close percentage and flags with a single struct call.
+
+    Falls back to the field by field helpers if the buffer is too short.
+
+    Args:
+        buffer: The buffer to read from.
+        ptr: Current position in the buffer.
+
+    Returns:
+        Tuple of (roller_id, percent, flags, new_pointer).
+    """
+    if len(buffer) - ptr < ROLLER_STATE.size:
+        roller_id, ptr = unpack_int(buffer, ptr, 6)
+        percent, ptr = unpack_roller_percent(buffer, ptr)
+        flags, ptr = unpack_int(buffer, ptr, 1)
+        return roller_id, percent, flags, ptr
+    id_low, id_high, state, percent, flags = ROLLER_STATE.unpack_from(buffer, ptr)
+    if state == ROLLER_OPEN:
+        percent = 0
+    elif state == ROLLER_CLOSED:
+        percent = 100
+    return id_low | id_high << 32, percent, flags, ptr + ROLLER_STATE.size
+
+
+def unpack_roller_health(buffer: ReadableBuffer, ptr: int) -> tuple[int, float, int]:
+    """Unpack roller id and battery charge with a single struct call.
+
+    Falls back to the field by field helpers if the buffer is too short.
+
+    Args:
+        buffer: The buffer to read from.
+        ptr: Current position in the buffer.
+
+    Returns:
+        Tuple of (roller_id, charge_volts, new_pointer).
+    """
+    if len(buffer) - ptr < ROLLER_HEALTH.size:
+        roller_id, ptr = unpack_int(buffer, ptr, 6)
+        ptr += 18  # unknown fields
+        charge_int, ptr = unpack_int(buffer, ptr, 1)
+        charge_fraction, ptr = unpack_int(buffer, ptr, 1)
+        return roller_id, charge_int + charge_fraction / 256.0, ptr + 8
+    id_low, id_high, charge_int, charge_fraction = ROLLER_HEALTH.unpack_from(
+        buffer, ptr
+    )
+    return (
+        id_low | id_high << 32,
+        charge_int + charge_fraction / 256.0,
+        ptr + ROLLER_HEALTH.size,
+    )
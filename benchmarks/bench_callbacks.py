@@ -0,0 +1,65 @@
+"""Benchmark of dispatching synchronous update callbacks.
+
+Simulates a burst of position updates from moving blinds: each update
+notifies every subscriber of one roller. Compares plain callbacks run on the
+event loop with the same callbacks subscribed with ``executor=True``, timing
+the burst until every callback has run.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_callbacks.py``.
+"""
+
+import asyncio
+import itertools
+import time
+
+from aiopulse.callbacks import CallbackMixin
+
+ROLLERS = 20
+SUBSCRIBERS = 3
+UPDATES = 50  # position updates per roller
+REPEAT = 5
+
+
+class Entity(CallbackMixin):
+    """A roller stand-in that only notifies."""
+
+
+async def burst(executor: bool) -> float:
+    """Notify every roller UPDATES times and wait for all callbacks."""
+    loop = asyncio.get_running_loop()
+    expected = ROLLERS * SUBSCRIBERS * UPDATES
+    done = asyncio.Event()
+    calls = itertools.count(1)  # safe to advance from executor threads
+
+    def callback() -> None:
+        if next(calls) == expected:
+            loop.call_soon_threadsafe(done.set)
+
+    entities = [Entity() for _ in range(ROLLERS)]
+    for entity in entities:
+        for _ in range(SUBSCRIBERS):
+            entity.callback_subscribe(callback, executor=executor)
+
+    start = time.perf_counter()
+    for _ in range(UPDATES):
+        for entity in entities:
+            entity.notify_callback()
+        await asyncio.sleep(0)
+    await done.wait()
+    return time.perf_counter() - start
+
+
+async def main() -> None:
+    """Compare inline and executor dispatch."""
+    calls = ROLLERS * SUBSCRIBERS * UPDATES
+    for name, executor in (("loop", False), ("executor", True)):
+        best = min([await burst(executor) for _ in range(REPEAT)])
+        print(
+            f"{name:<9} {calls} callbacks  {best * 1e3:8.2f} ms  "
+            f"{best / calls * 1e6:6.2f} us/callback"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,94 @@
+"""Microbenchmark of the fixed-layout message decoders.
+
+Compares the field by field ``utils`` helpers with the precompiled struct
+decoders for position and roller health messages.
+
+Run from the repository root with ``PYTHONPATH=. python benchmarks/bench_decode.py``.
+"""
+
+import functools
+import timeit
+from collections.abc import Callable
+
+import aiopulse.utils as utils
+
+Decoder = Callable[[utils.ReadableBuffer], tuple[object, ...]]
+
+NUMBER = 200_000
+
+POSITION = (
+    b"\x00" * 12
+    + b"\x01\x02\x03\x04\x05\x06"
+    + b"\x00" * 4
+    + b"\x00"
+    + b"\x00" * 5
+    + b"\x32"
+    + b"\x01"
+    + b"\x00\x00"
+)
+
+HEALTH = (
+    b"\x00" * 12
+    + b"\x01\x02\x03\x04\x05\x06"
+    + b"A\x00\x00\x00\x00B\x00\x00\x00\x00C\x00\x00\x00\x00"
+    + b"\x00" * 3
+    + b"\x0b\x80"
+    + b"\x00" * 8
+    + b"\x00\x00"
+)
+
+
+def position_fields(message: utils.ReadableBuffer) -> tuple[int, int, int]:
+    """Decode a position message with the field helpers."""
+    ptr = 12
+    roller_id, ptr = utils.unpack_int(message, ptr, 6)
+    percent, ptr = utils.unpack_roller_percent(message, ptr)
+    flags, ptr = utils.unpack_int(message, ptr, 1)
+    return roller_id, percent, flags
+
+
+def position_struct(message: utils.ReadableBuffer) -> tuple[int, int, int]:
+    """Decode a position message with the struct decoder."""
+    roller_id, percent, flags, _ = utils.unpack_roller_state(message, 12)
+    return roller_id, percent, flags
+
+
+def health_fields(message: utils.ReadableBuffer) -> tuple[int, float]:
+    """Decode a health message with the field helpers."""
+    ptr = 12
+    roller_id, ptr = utils.unpack_int(message, ptr, 6)
+    for length in (5, 5, 5, 3):
+        unknown, ptr = utils.unpack_bytes(message, ptr, length)
+        unknown.hex()
+    charge_int, ptr = utils.unpack_int(message, ptr, 1)
+    charge_fraction, ptr = utils.unpack_int(message, ptr, 1)
+    unknown, ptr = utils.unpack_bytes(message, ptr, 8)
+    unknown.hex()
+    return roller_id, charge_int + charge_fraction / 256.0
+
+
+def health_struct(message: utils.ReadableBuffer) -> tuple[int, float]:
+    """Decode a health message with the struct decoder."""
+    roller_id, charge, _ = utils.unpack_roller_health(message, 12)
+    return roller_id, charge
+
+
+def bench(name: str, fields: Decoder, packed: Decoder, message: bytes) -> None:
+    """Time both decoders on bytes and on a memoryview and print the gain."""
+    assert fields(message) == packed(message)
+    buffers: tuple[utils.ReadableBuffer, ...] = (message, memoryview(message))
+    for buffer in buffers:
+        label = type(buffer).__name__
+        old = timeit.timeit(functools.partial(fields, buffer), number=NUMBER)
+        new = timeit.timeit(functools.partial(packed, buffer), number=NUMBER)
+        print(
+            f"{name:<10} {label:<10} "
+            f"fields {old / NUMBER * 1e9:7.0f} ns/msg  "
+            f"struct {new / NUMBER * 1e9:7.0f} ns/msg  "
+            f"x{old / new:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    bench("position", position_fields, position_struct, POSITION)
+    bench("health", health_fields, health_struct, HEALTH)
@@ -0,0 +1,86 @@
+"""Benchmark of the hub handshake against a simulated hub.
+
+Runs a local TCP server that answers the handshake frames after a fixed
+delay, then times ``Hub.connect`` and prints the per-step timings.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_handshake.py``.
+"""
+
+import asyncio
+import time
+
+import aiopulse.const as const
+from aiopulse import Hub
+from aiopulse.const import CommandType, ResponseType
+from aiopulse.transport import StreamFramer
+
+DELAYS = (0.0, 0.005, 0.020)
+REPEAT = 5
+
+TOPIC = b"Smart_Id1_y:"
+REPLIES = {
+    CommandType.CONNECT.to_bytes(4, "big"): [
+        ResponseType.CONNECT.to_bytes(4, "big") + b"\x00\x00BENCH00001"
+    ],
+    CommandType.LOGIN.to_bytes(4, "big"): [
+        ResponseType.LOGIN.to_bytes(4, "big") + b"\x00"
+    ],
+    CommandType.SETID.to_bytes(4, "big"): [ResponseType.SETID.to_bytes(4, "big")],
+    CommandType.UNKNOWN1.to_bytes(4, "big"): [
+        ResponseType.UNKNOWN1.to_bytes(4, "big")
+        + bytes.fromhex("06")
+        + TOPIC
+        + bytes.fromhex("16000f0002000000000000000c000600120311073816ff9d"),
+        ResponseType.SETID.to_bytes(4, "big"),
+    ],
+}
+
+
+def simulated_hub(delay: float):
+    """Return a connection handler that answers after `delay` seconds."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        framer = StreamFramer()
+        loop = asyncio.get_running_loop()
+        while data := await reader.read(65535):
+            frames = framer.feed(data)
+            ptr = 0
+            while ptr < len(frames):
+                command = frames[ptr + 4 : ptr + 8]
+                ptr += 5 + frames[ptr + 4]
+                # replies to one command are written 1 ms apart, as separate reads
+                for index, reply in enumerate(REPLIES.get(command, [])):
+                    loop.call_later(
+                        delay + index * 0.001, writer.write, const.HEADER + reply
+                    )
+        writer.close()
+
+    return handle
+
+
+async def main() -> None:
+    """Time handshakes for several simulated network delays."""
+    for delay in DELAYS:
+        server = await asyncio.start_server(simulated_hub(delay), "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        best = float("inf")
+        timings: dict[str, float] = {}
+        for _ in range(REPEAT):
+            hub = Hub("127.0.0.1")
+            hub.protocol.port = port
+            start = time.perf_counter()
+            await hub.connect()
+            elapsed = time.perf_counter() - start
+            if elapsed < best:
+                best = elapsed
+                timings = dict(getattr(hub, "handshake_timings", {}))
+            await hub.disconnect()
+        server.close()
+        await server.wait_closed()
+        steps = " ".join(f"{k}={v * 1e3:.1f}" for k, v in timings.items())
+        print(f"delay {delay * 1e3:4.0f} ms  handshake {best * 1e3:6.1f} ms  {steps}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,55 @@
+"""Benchmark of the time to import aiopulse.
+
+Starts a fresh interpreter for each sample and times ``import aiopulse`` on
+its own, the first use of ``aiopulse.Hub``, and the first broadcast
+interface lookup, which is what loads psutil. The best of several samples
+is reported along with whether psutil was loaded.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_import.py``.
+"""
+
+import subprocess
+import sys
+
+REPEAT = 10
+CASES = {
+    "import aiopulse": "import aiopulse",
+    "aiopulse.Hub": "import aiopulse\naiopulse.Hub",
+    "interfaces": (
+        "import aiopulse.transport as transport\n"
+        "transport.HubTransportUdpBroadcast.read_interfaces()"
+    ),
+}
+_TIMED = """\
+import sys, time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start, "psutil" in sys.modules)
+"""
+
+
+def sample(code: str) -> tuple[float, bool]:
+    """Return the seconds taken by code in a fresh interpreter and psutil use."""
+    result = subprocess.run(
+        [sys.executable, "-c", _TIMED.format(code=code)],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    seconds, psutil = result.stdout.split()
+    return float(seconds), psutil == "True"
+
+
+def main() -> None:
+    """Time each case in fresh interpreters."""
+    for name, code in CASES.items():
+        samples = [sample(code) for _ in range(REPEAT)]
+        best = min(seconds for seconds, _ in samples)
+        print(
+            f"{name:<16} {best * 1e3:7.2f} ms  psutil loaded: {samples[0][1]}"
+        )
+
+
+if __name__ == "__main__":
+    main()
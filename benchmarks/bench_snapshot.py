@@ -0,0 +1,71 @@
+"""Benchmark of loading hub entity snapshots.
+
+Builds snapshots with many rollers, rooms, scenes and timers, saves them and
+times ``Hub.load_snapshot`` into a fresh hub.
+
+Run from the repository root with
+``PYTHONPATH=. python benchmarks/bench_snapshot.py``.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+import aiopulse
+from aiopulse import Hub
+
+SIZES = (100, 1_000, 10_000)
+REPEAT = 5
+
+
+def populate(hub: Hub, rollers: int) -> None:
+    """Fill a hub with rollers plus a room, scene and timer per ten rollers."""
+    hub.id = "bench"
+    for index in range(rollers // 10 or 1):
+        entity_id = index.to_bytes(4, "big")
+        room = hub.rooms[entity_id] = aiopulse.Room(hub, entity_id)
+        room.name = f"Room {index}"
+        scene = hub.scenes[entity_id] = aiopulse.Scene(hub, entity_id)
+        scene.name = f"Scene {index}"
+        timer = hub.timers[entity_id] = aiopulse.Timer(hub, entity_id)
+        timer.name = f"Timer {index}"
+        timer.hour, timer.minute, timer.days, timer.state = 7, 30, 0b1111100, 1
+        timer.entity = scene
+    rooms = list(hub.rooms.values())
+    for roller_id in range(1, rollers + 1):
+        roller = hub.rollers[roller_id] = aiopulse.Roller(hub, roller_id)
+        roller.name = f"Blind {roller_id}"
+        roller.serial = f"SN{roller_id:08d}"
+        roller.type = 1
+        roller.room = rooms[roller_id % len(rooms)]
+        roller.room_id = bytes(roller.room.id)
+        roller.closed_percent = roller_id % 101
+        roller.flags = 0x12
+        roller.battery = 80
+
+
+async def main() -> None:
+    """Save and load snapshots of increasing size."""
+    with tempfile.TemporaryDirectory() as directory:
+        for size in SIZES:
+            path = os.path.join(directory, f"hub-{size}.json")
+            source = Hub("127.0.0.1")
+            populate(source, size)
+            source.save_snapshot(path)
+            best = float("inf")
+            for _ in range(REPEAT):
+                hub = Hub("127.0.0.1")
+                start = time.perf_counter()
+                assert hub.load_snapshot(path)
+                best = min(best, time.perf_counter() - start)
+                assert len(hub.rollers) == size
+            print(
+                f"{size:>6} rollers  {os.path.getsize(path) / 1024:8.1f} KiB  "
+                f"load {best * 1e3:8.2f} ms  "
+                f"{best / size * 1e6:6.2f} us/roller"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+from aiopulse.batch import ChangeBatch
+from aiopulse.const import UpdateType
+
+
+class TestChangeBatch:
+    def test_empty(self):
+        batch = ChangeBatch()
+        assert not batch
+        assert UpdateType.rollers not in batch
+        assert repr(batch) == "ChangeBatch()"
+
+    def test_add(self):
+        batch = ChangeBatch()
+        batch.add(UpdateType.rollers, "r1", frozenset({"flags"}))
+        batch.add(UpdateType.rollers, "r1", frozenset({"battery"}))
+        batch.add(UpdateType.rollers, "r2")
+        assert batch
+        assert batch.changed == {UpdateType.rollers: {"r1", "r2"}}
+        assert batch.fields == {"r1": {"flags", "battery"}, "r2": set()}
+        assert UpdateType.rollers in batch
+        assert repr(batch) == "ChangeBatch(rollers: +2/-0)"
+
+    def test_merge(self):
+        older = ChangeBatch()
+        older.add(UpdateType.rollers, "r1", frozenset({"flags"}))
+        older.add(UpdateType.rollers, "r2", frozenset({"name"}))
+        older.remove(UpdateType.scenes, "s1")
+        newer = ChangeBatch()
+        newer.add(UpdateType.rollers, "r1", frozenset({"battery"}))
+        newer.remove(UpdateType.rollers, "r2")
+        newer.add(UpdateType.scenes, "s1")
+
+        merged = older.merge(newer)
+        assert merged.changed == {
+            UpdateType.rollers: {"r1"},
+            UpdateType.scenes: {"s1"},
+        }
+        assert merged.removed == {UpdateType.rollers: {"r2"}, UpdateType.scenes: set()}
+        assert merged.fields == {"r1": {"flags", "battery"}, "s1": set()}
+        # the merged batches are left alone
+        assert older.fields["r1"] == {"flags"}
+        assert older.removed == {UpdateType.scenes: {"s1"}}
+
+    def test_remove_drops_change(self):
+        batch = ChangeBatch()
+        batch.add(UpdateType.scenes, "s1")
+        batch.remove(UpdateType.scenes, "s1")
+        assert batch.changed == {UpdateType.scenes: set()}
+        assert batch.fields == {}
+        assert batch.removed == {UpdateType.scenes: {"s1"}}
+        assert UpdateType.scenes in batch
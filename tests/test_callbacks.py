@@ -1,4 +1,5 @@
 import asyncio
+import threading
 from unittest.mock import AsyncMock, MagicMock
 
 import pytest
@@ -91,3 +92,92 @@ class TestCallbackMixin:
         entity.notify_callback()
         # Note: coroutine won't execute without event loop running
         # This tests that it doesn't raise
+
+    @pytest.mark.asyncio
+    async def test_sync_callbacks_run_on_loop_in_order(self, entity):
+        calls = []
+        loop_thread = threading.get_ident()
+
+        def first(value):
+            calls.append(("first", value, threading.get_ident()))
+
+        def second(value):
+            calls.append(("second", value, threading.get_ident()))
+
+        entity.callback_subscribe(first)
+        entity.callback_subscribe(second)
+        entity.notify_callback(1)
+        entity.notify_callback(2)
+        assert calls == []
+        await asyncio.sleep(0)
+        assert calls == [
+            ("first", 1, loop_thread),
+            ("second", 1, loop_thread),
+            ("first", 2, loop_thread),
+            ("second", 2, loop_thread),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_executor_opt_in(self, entity):
+        threads = []
+        done = asyncio.Event()
+        loop = asyncio.get_running_loop()
+
+        def blocking():
+            threads.append(threading.get_ident())
+            loop.call_soon_threadsafe(done.set)
+
+        entity.callback_subscribe(blocking, executor=True)
+        entity.notify_callback()
+        await asyncio.wait_for(done.wait(), 2)
+        assert threads != [threading.get_ident()]
+
+    def test_unsubscribe_executor_callback(self, entity):
+        callback = MagicMock()
+        entity.callback_subscribe(callback, executor=True)
+        entity.callback_unsubscribe(callback)
+        assert entity._update_callbacks == []
+        assert entity._executor_callbacks == []
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_callback_gets_latest_per_entity(self, entity):
+        calls = []
+        limiter = entity.callback_subscribe(calls.append, max_rate=20)
+        entity.notify_callback("a")
+        entity.notify_callback("b")
+        entity.notify_callback("a")
+        entity.notify_callback("b")
+        await asyncio.sleep(0)
+        assert calls == ["a"]
+        await asyncio.sleep(0.1)
+        assert calls == ["a", "a", "b"]
+        assert limiter.saved == 1
+
+    @pytest.mark.asyncio
+    async def test_unlimited_callbacks_unaffected_by_limited(self, entity):
+        limited = []
+        plain = []
+        entity.callback_subscribe(limited.append, debounce=0.05)
+        entity.callback_subscribe(plain.append)
+        entity.notify_callback(1)
+        entity.notify_callback(2)
+        await asyncio.sleep(0)
+        assert plain == [1, 2]
+        assert limited == []
+        await asyncio.sleep(0.1)
+        assert limited == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_rate_limited_callback(self, entity):
+        calls = []
+        entity.callback_subscribe(calls.append, debounce=0.01)
+        entity.notify_callback(1)
+        entity.callback_unsubscribe(calls.append)
+        await asyncio.sleep(0.05)
+        assert calls == []
+        assert entity._rate_limiters == {}
+
+    def test_subscribe_returns_limiter_only_when_limited(self, entity):
+        assert entity.callback_subscribe(MagicMock()) is None
+        with pytest.raises(ValueError):
+            entity.callback_subscribe(MagicMock(), max_rate=1, debounce=1)
@@ -0,0 +1,39 @@
+from aiopulse.commands import DeviceCommands
+from aiopulse.utils import pack_int
+
+PREFIX = bytes.fromhex("0000000000000101") + bytes.fromhex("0600")
+
+
+class TestDeviceCommands:
+    def test_move_payloads(self):
+        commands = DeviceCommands(123)
+        move = PREFIX + pack_int(123, 6) + bytes.fromhex("03010100")
+        assert commands.target_id == 123
+        assert commands.up == move + b"\x10\xff"
+        assert commands.stop == move + b"\x11\xff"
+        assert commands.down == move + b"\x12\xff"
+
+    def test_health_payload(self):
+        commands = DeviceCommands(123)
+        assert commands.health == (
+            PREFIX + pack_int(123, 6) + bytes.fromhex("410201000E4202010004ff")
+        )
+
+    def test_move_to_fills_percent(self):
+        commands = DeviceCommands(123)
+        expected = (
+            PREFIX
+            + pack_int(123, 6)
+            + bytes.fromhex("03010100")
+            + bytes.fromhex("190401030001")
+            + pack_int(42, 2)
+            + b"\xff"
+        )
+        assert bytes(commands.move_to(42)) == expected
+
+    def test_move_to_reuses_buffer(self):
+        commands = DeviceCommands(123)
+        first = commands.move_to(10)
+        second = commands.move_to(90)
+        assert first is second
+        assert second[-3:] == b"\x5a\x00\xff"
@@ -52,3 +52,5 @@ class TestUpdateType:
         assert UpdateType.rooms.name == "rooms"
         assert UpdateType.scenes.name == "scenes"
         assert UpdateType.timers.name == "timers"
+        assert UpdateType.resynced.name == "resynced"
+        assert UpdateType.batch.name == "batch"
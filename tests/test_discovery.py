@@ -0,0 +1,146 @@
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+import aiopulse
+from aiopulse.discovery import DiscoveredHub, DiscoveryCache
+
+
+class FakeHub:
+    def __init__(self, host, hub_id=None, mac_address=None):
+        self.host = host
+        self.id = hub_id
+        self.mac_address = mac_address
+
+
+@pytest.fixture
+def clock():
+    now = [1000.0]
+    with patch("aiopulse.discovery.time.monotonic", side_effect=lambda: now[0]):
+        yield now
+
+
+class TestDiscoveryCache:
+    def test_negative_ttl_rejected(self):
+        with pytest.raises(ValueError):
+            DiscoveryCache(ttl=-1)
+
+    def test_get_fresh_entry(self, clock):
+        cache = DiscoveryCache(ttl=60)
+        hub = FakeHub("10.0.0.5", "hub1", "aa:bb")
+        cache.put(hub)
+        assert cache.get("10.0.0.5") is hub
+        assert cache.get("10.0.0.6") is None
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert len(cache) == 1
+
+    def test_entry_expires(self, clock):
+        cache = DiscoveryCache(ttl=60)
+        hub = FakeHub("10.0.0.5", "hub1")
+        cache.put(hub)
+        clock[0] += 60
+        assert cache.get("10.0.0.5") is None
+        assert cache.find("hub1") is None
+        assert cache.hubs() == []
+
+    def test_put_refreshes_ttl(self, clock):
+        cache = DiscoveryCache(ttl=60)
+        hub = FakeHub("10.0.0.5", "hub1")
+        cache.put(hub)
+        clock[0] += 50
+        cache.put(hub)
+        clock[0] += 50
+        assert cache.get("10.0.0.5") is hub
+
+    def test_find_by_id_and_mac(self, clock):
+        cache = DiscoveryCache()
+        hub = FakeHub("10.0.0.5", "hub1", "aa:bb")
+        cache.put(hub)
+        assert cache.find("hub1") is hub
+        assert cache.find("aa:bb") is hub
+        assert cache.find("other") is None
+
+    def test_moved_hub_replaces_old_address(self, clock):
+        cache = DiscoveryCache()
+        cache.put(FakeHub("10.0.0.5", "hub1", "aa:bb"))
+        moved = FakeHub("10.0.0.9", "hub1", "aa:bb")
+        cache.put(moved)
+        assert cache.get("10.0.0.5") is None
+        assert cache.find("hub1") is moved
+        assert cache.hubs() == [moved]
+
+    def test_invalidate_and_clear(self, clock):
+        cache = DiscoveryCache()
+        cache.put(FakeHub("10.0.0.5", "hub1"))
+        cache.put(FakeHub("10.0.0.6", "hub2"))
+        cache.invalidate("10.0.0.5")
+        cache.invalidate("10.0.0.7")
+        assert cache.find("hub1") is None
+        assert len(cache) == 1
+        cache.clear()
+        assert len(cache) == 0
+        assert cache.find("hub2") is None
+
+    def test_put_requires_address(self, clock):
+        with pytest.raises(ValueError):
+            DiscoveryCache().put(FakeHub(None, "hub1"))
+
+
+class TestDiscoveredHub:
+    @pytest.mark.asyncio
+    async def test_interrogates_once(self):
+        hub = FakeHub("10.0.0.5", "hub1")
+        result = DiscoveredHub("10.0.0.5", 12414, "hub1", asyncio.Semaphore(1))
+        with patch.object(
+            aiopulse.Hub, "_interrogate_hub", AsyncMock(return_value=hub)
+        ) as interrogate:
+            hubs = await asyncio.gather(result.interrogate(), result.interrogate())
+            assert await result.interrogate() is hub
+        assert hubs == [hub, hub]
+        interrogate.assert_awaited_once_with("10.0.0.5")
+
+    @pytest.mark.asyncio
+    async def test_failed_interrogation(self):
+        result = DiscoveredHub("10.0.0.5", 12414, None, asyncio.Semaphore(1))
+        with patch.object(
+            aiopulse.Hub, "_interrogate_hub", AsyncMock(return_value=None)
+        ):
+            assert await result.interrogate() is None
+        assert result.hub is None
+
+    @pytest.mark.asyncio
+    async def test_concurrency_is_bounded(self):
+        slots = asyncio.Semaphore(2)
+        active = peak = 0
+
+        async def interrogate(host):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return FakeHub(host)
+
+        results = [DiscoveredHub(f"10.0.0.{i}", 12414, None, slots) for i in range(6)]
+        with patch.object(aiopulse.Hub, "_interrogate_hub", side_effect=interrogate):
+            hubs = await asyncio.gather(*(result.interrogate() for result in results))
+        assert [hub.host for hub in hubs] == [result.host for result in results]
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_uses_and_fills_cache(self, clock):
+        cache = DiscoveryCache()
+        cached = FakeHub("10.0.0.5", "hub1")
+        cache.put(cached)
+        fresh = FakeHub("10.0.0.6", "hub2")
+        slots = asyncio.Semaphore(1)
+        with patch.object(
+            aiopulse.Hub, "_interrogate_hub", AsyncMock(return_value=fresh)
+        ) as interrogate:
+            first = DiscoveredHub("10.0.0.5", 12414, "hub1", slots, cache)
+            second = DiscoveredHub("10.0.0.6", 12414, "hub2", slots, cache)
+            assert await first.interrogate() is cached
+            assert await second.interrogate() is fresh
+        interrogate.assert_awaited_once_with("10.0.0.6")
+        assert cache.find("hub2") is fresh
@@ -0,0 +1,238 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from aiopulse.engine import CommandEngine, CommandPriority
+from aiopulse.errors import NotConnectedException
+
+
+class TestCommandEngine:
+    @pytest.fixture
+    def send(self):
+        return MagicMock()
+
+    @pytest.fixture
+    def engine(self, send):
+        return CommandEngine(send, window=2, host="192.168.1.100")
+
+    def test_invalid_window(self, send):
+        with pytest.raises(ValueError):
+            CommandEngine(send, window=0)
+
+    @pytest.mark.asyncio
+    async def test_window_limits_in_flight(self, engine, send):
+        tasks = [
+            asyncio.create_task(engine.submit(seq, bytes([seq]))) for seq in range(3)
+        ]
+        await asyncio.sleep(0)
+        assert send.call_count == 2
+        assert engine.in_flight == 2
+        assert engine.queued == 1
+
+        engine.acknowledge()
+        assert send.call_count == 3
+        send.assert_called_with(b"\x02")
+        engine.acknowledge()
+        engine.acknowledge()
+        assert await asyncio.gather(*tasks) == [True, True, True]
+        assert engine.acknowledged == 3
+        assert engine.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_acknowledge_oldest_first(self, engine):
+        first = asyncio.create_task(engine.submit(4, b"a"))
+        second = asyncio.create_task(engine.submit(6, b"b"))
+        await asyncio.sleep(0)
+        engine.acknowledge()
+        await asyncio.sleep(0)
+        assert first.done()
+        assert not second.done()
+        engine.acknowledge()
+        assert await second is True
+
+    def test_acknowledge_nothing_in_flight(self, engine):
+        engine.acknowledge()
+        assert engine.acknowledged == 0
+
+    @pytest.mark.asyncio
+    async def test_retry_then_timeout(self, engine, send):
+        result = await engine.submit(4, b"a", timeout=0.01, retries=3)
+        assert result is False
+        assert send.call_count == 3
+        assert engine.retried == 2
+        assert engine.timed_out == 1
+        assert engine.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_timeout_is_per_command(self, engine, send):
+        slow = asyncio.create_task(engine.submit(4, b"a", timeout=0.01, retries=1))
+        fast = asyncio.create_task(engine.submit(6, b"b", timeout=5.0))
+        assert await slow is False
+        assert not fast.done()
+        engine.acknowledge()
+        assert await fast is True
+
+    @pytest.mark.asyncio
+    async def test_late_ack_after_retry_is_absorbed(self, engine, send):
+        first = asyncio.create_task(engine.submit(4, b"a", timeout=0.02))
+        second = asyncio.create_task(engine.submit(6, b"b", timeout=5.0))
+        await asyncio.sleep(0.03)
+        assert engine.retried == 1  # a was resent after b
+
+        # the hub acks a and b, c is sent, then the resent a is acked
+        engine.acknowledge()
+        engine.acknowledge()
+        assert await first is True
+        assert await second is True
+        third = asyncio.create_task(engine.submit(8, b"c"))
+        await asyncio.sleep(0)
+        engine.acknowledge()
+        await asyncio.sleep(0)
+        assert not third.done()
+        assert engine.absorbed == 1
+
+        engine.acknowledge()
+        assert await third is True
+        assert engine.acknowledged == 3
+
+    @pytest.mark.asyncio
+    async def test_unacked_frame_of_retried_command_expires(self, engine, send):
+        first = asyncio.create_task(engine.submit(4, b"a", timeout=0.01))
+        await asyncio.sleep(0.015)
+        engine.acknowledge()  # the resent a
+        assert await first is True
+        await asyncio.sleep(0.015)
+
+        # the original frame's ack is no longer expected
+        second = asyncio.create_task(engine.submit(6, b"b"))
+        await asyncio.sleep(0)
+        engine.acknowledge()
+        assert await second is True
+        assert engine.absorbed == 0
+
+    @pytest.mark.asyncio
+    async def test_send_failure(self, engine, send):
+        send.side_effect = NotConnectedException("down")
+        with pytest.raises(NotConnectedException):
+            await engine.submit(4, b"a")
+        assert engine.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_reset_fails_outstanding(self, engine):
+        tasks = [
+            asyncio.create_task(engine.submit(seq, b"a")) for seq in range(3)
+        ]
+        await asyncio.sleep(0)
+        engine.reset()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        assert all(isinstance(r, NotConnectedException) for r in results)
+        assert engine.in_flight == 0
+        assert engine.queued == 0
+
+    @pytest.mark.asyncio
+    async def test_submit_batch_single_write(self, engine, send):
+        task = asyncio.create_task(
+            engine.submit_batch([(4, b"a"), (6, b"b"), (8, b"c")], timeout=0.05)
+        )
+        await asyncio.sleep(0)
+        send.assert_called_once_with(b"abc")
+        assert engine.in_flight == 3
+        engine.acknowledge()
+        engine.acknowledge()
+        assert await task == [True, True, False]
+
+    @pytest.mark.asyncio
+    async def test_submit_batch_send_failure(self, engine, send):
+        send.side_effect = NotConnectedException("down")
+        with pytest.raises(NotConnectedException):
+            await engine.submit_batch([(4, b"a"), (6, b"b")])
+        assert engine.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_coalesce_queued_commands(self, send):
+        engine = CommandEngine(send, window=1)
+        busy = asyncio.create_task(engine.submit(2, b"busy"))
+        older = asyncio.create_task(engine.submit(4, b"move 10", key=1))
+        other = asyncio.create_task(engine.submit(6, b"other", key=2))
+        newer = asyncio.create_task(engine.submit(8, b"move 90", key=1))
+        await asyncio.sleep(0)
+        assert engine.queued == 2
+        assert engine.coalesced == 1
+
+        for _ in range(3):
+            engine.acknowledge()
+        assert [call.args[0] for call in send.call_args_list] == [
+            b"busy",
+            b"move 90",
+            b"other",
+        ]
+        assert await asyncio.gather(busy, older, other, newer) == [True] * 4
+
+    @pytest.mark.asyncio
+    async def test_newer_command_stops_retries(self, engine, send):
+        older = asyncio.create_task(engine.submit(4, b"a", timeout=0.01, key=1))
+        newer = asyncio.create_task(engine.submit(6, b"b", timeout=5.0, key=1))
+        assert await older is False
+        assert send.call_count == 2
+        engine.acknowledge()
+        assert await newer is True
+
+    @pytest.mark.asyncio
+    async def test_batch_replaces_queued_command(self, send):
+        engine = CommandEngine(send, window=1)
+        busy = asyncio.create_task(engine.submit(2, b"busy"))
+        queued = asyncio.create_task(engine.submit(4, b"old", key=1))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(
+            engine.submit_batch([(6, b"new"), (8, b"two")], keys=[1, 2])
+        )
+        await asyncio.sleep(0)
+        assert engine.queued == 0
+        assert engine.coalesced == 1
+        for _ in range(3):
+            engine.acknowledge()
+        assert await batch == [True, True]
+        assert await queued is True
+        assert await busy is True
+        assert b"old" not in [call.args[0] for call in send.call_args_list]
+
+    @pytest.mark.asyncio
+    async def test_interactive_jumps_housekeeping(self, send):
+        engine = CommandEngine(send, window=1)
+        busy = asyncio.create_task(engine.submit(2, b"busy"))
+        health = asyncio.create_task(
+            engine.submit(4, b"health", priority=CommandPriority.HOUSEKEEPING)
+        )
+        move = asyncio.create_task(engine.submit(6, b"move"))
+        await asyncio.sleep(0)
+        engine.acknowledge()
+        send.assert_called_with(b"move")
+        engine.acknowledge()
+        send.assert_called_with(b"health")
+        engine.acknowledge()
+        await asyncio.gather(busy, health, move)
+        interactive = engine.wait_times[CommandPriority.INTERACTIVE]
+        housekeeping = engine.wait_times[CommandPriority.HOUSEKEEPING]
+        assert interactive.count == 2
+        assert housekeeping.count == 1
+        assert housekeeping.maximum >= 0.0
+        assert housekeeping.mean == housekeeping.total
+
+    @pytest.mark.asyncio
+    async def test_housekeeping_leaves_slot_for_interactive(self, engine, send):
+        tasks = [
+            asyncio.create_task(
+                engine.submit(seq, b"health", priority=CommandPriority.HOUSEKEEPING)
+            )
+            for seq in range(2)
+        ]
+        await asyncio.sleep(0)
+        assert engine.in_flight == 1
+        move = asyncio.create_task(engine.submit(9, b"move"))
+        await asyncio.sleep(0)
+        send.assert_called_with(b"move")
+        assert engine.in_flight == 2
+        for _ in range(3):
+            engine.acknowledge()
+        await asyncio.gather(move, *tasks)
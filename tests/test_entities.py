@@ -35,6 +35,20 @@ class TestHubEntity:
         entity = ConcreteEntity(hub=hub_mock, entity_id=b"\x01\x02\x03\x04")
         assert entity.id == b"\x01\x02\x03\x04"
 
+    def test_field_values(self, entity):
+        entity.name = "Blind"
+        entity.icon = 3
+        assert entity.field_values() == ("Blind", 3)
+
+    def test_changes_since(self, entity):
+        assert entity.changes_since(None) == {"name", "icon"}
+        entity.name = "Blind"
+        before = entity.field_values()
+        assert entity.changes_since(before) == frozenset()
+        entity.icon = 3
+        assert entity.changes_since(before) == {"icon"}
+        assert entity.changed_fields == frozenset()
+
     def test_callback_subscribe(self, entity):
         callback = MagicMock()
         entity.callback_subscribe(callback)
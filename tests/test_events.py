@@ -0,0 +1,119 @@
+import asyncio
+
+import pytest
+
+from aiopulse.const import UpdateType
+from aiopulse.events import Event, EventStream, OverflowPolicy
+
+
+def event(entity, *fields, removed=False):
+    return Event(UpdateType.rollers, entity, frozenset(fields), removed)
+
+
+def drain(stream):
+    events = []
+    while stream.depth:
+        events.append(stream._queue.popitem(last=False)[1])
+    return events
+
+
+class TestEvent:
+    def test_merge_unions_fields(self):
+        merged = event("r1", "flags").merge(event("r1", "battery"))
+        assert merged.fields == {"flags", "battery"}
+        assert not merged.removed
+
+    def test_merge_does_not_modify_events(self):
+        older = event("r1", "flags")
+        older.merge(event("r1", "battery"))
+        assert older.fields == {"flags"}
+
+    def test_merge_removal(self):
+        assert event("r1", "flags").merge(event("r1", removed=True)).removed
+        readded = event("r1", removed=True).merge(event("r1", "name"))
+        assert not readded.removed
+        assert readded.fields == {"name"}
+
+    def test_repr(self):
+        assert repr(event("r1", "flags")) == "Event(rollers, r1, ['flags'])"
+
+
+class TestEventStream:
+    def test_maxsize_validated(self):
+        with pytest.raises(ValueError):
+            EventStream(maxsize=0)
+
+    def test_drop_oldest(self):
+        stream = EventStream(maxsize=2)
+        for name in ("a", "b", "c"):
+            stream.put(event(name))
+        assert [e.entity for e in drain(stream)] == ["b", "c"]
+        assert stream.dropped == 1
+        assert stream.max_depth == 2
+
+    def test_coalesce_per_entity(self):
+        stream = EventStream(maxsize=2, policy=OverflowPolicy.coalesce)
+        stream.put(event("a", "flags"))
+        stream.put(event("b", "flags"))
+        stream.put(event("a", "battery"))
+        assert stream.depth == 2
+        assert stream.coalesced == 1
+        stream.put(event("c"))
+        assert stream.dropped == 1
+        events = drain(stream)
+        assert [e.entity for e in events] == ["b", "c"]
+
+    def test_coalesce_keeps_position(self):
+        stream = EventStream(policy=OverflowPolicy.coalesce)
+        stream.put(event("a", "flags"))
+        stream.put(event("b"))
+        stream.put(event("a", "battery"))
+        first, second = drain(stream)
+        assert first.entity == "a"
+        assert first.fields == {"flags", "battery"}
+
+    def test_block_never_drops(self):
+        stream = EventStream(maxsize=2, policy=OverflowPolicy.block)
+        for name in ("a", "b", "c"):
+            stream.put(event(name))
+        assert stream.depth == 3
+        assert stream.dropped == 0
+        assert stream.full
+
+    @pytest.mark.asyncio
+    async def test_block_waits_for_space(self):
+        stream = EventStream(maxsize=1, policy=OverflowPolicy.block)
+        stream.put(event("a"))
+        waiter = asyncio.ensure_future(stream.wait_for_space())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        await stream.get()
+        await asyncio.wait_for(waiter, 1)
+        assert not stream.full
+
+    @pytest.mark.asyncio
+    async def test_iterates_until_closed(self):
+        stream = EventStream()
+
+        async def produce():
+            for name in ("a", "b"):
+                await asyncio.sleep(0)
+                stream.put(event(name))
+            stream.close()
+
+        task = asyncio.ensure_future(produce())
+        received = [e.entity async for e in stream]
+        await task
+        assert received == ["a", "b"]
+        assert stream.delivered == 2
+
+    @pytest.mark.asyncio
+    async def test_close_from_context_manager(self):
+        closed = []
+        async with EventStream(on_close=closed.append) as stream:
+            stream.put(event("a"))
+        assert closed == [stream]
+        stream.put(event("b"))
+        assert [e.entity async for e in stream] == ["a"]
+        stream.close()
+        assert closed == [stream]
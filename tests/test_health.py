@@ -0,0 +1,273 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from aiopulse.health import HealthScheduler
+
+
+def make_roller(roller_id, poll=None):
+    roller = MagicMock()
+    roller.id = roller_id
+    roller.name = f"roller {roller_id}"
+    roller.battery = None
+
+    async def get_health():
+        if poll is not None:
+            return await poll(roller_id) is not False
+        return True
+
+    roller.get_health = get_health
+    return roller
+
+
+@pytest.fixture
+def hub():
+    h = MagicMock()
+    h.host = "192.168.1.100"
+    h.handshake = asyncio.Event()
+    h.handshake.set()
+    h.rollers = {}
+    return h
+
+
+class TestHealthScheduler:
+    @pytest.mark.asyncio
+    async def test_polls_every_roller(self, hub):
+        polled = []
+
+        async def poll(roller_id):
+            polled.append(roller_id)
+
+        for roller_id in range(5):
+            hub.rollers[roller_id] = make_roller(roller_id, poll)
+        scheduler = HealthScheduler(hub, initial_spread=0.05, rescan=0.01)
+        scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+
+        assert sorted(polled) == list(range(5))
+        assert scheduler.polls == 5
+        assert set(scheduler.last_polled) == set(range(5))
+
+    @pytest.mark.asyncio
+    async def test_limits_polls_in_flight(self, hub):
+        active = 0
+        peak = 0
+
+        async def poll(roller_id):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.02)
+            active -= 1
+
+        for roller_id in range(6):
+            hub.rollers[roller_id] = make_roller(roller_id, poll)
+        scheduler = HealthScheduler(
+            hub, initial_spread=0, max_in_flight=2, rescan=0.01
+        )
+        scheduler.start()
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+
+        assert scheduler.polls == 6
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_repolls_after_interval(self, hub):
+        hub.rollers[1] = make_roller(1)
+        scheduler = HealthScheduler(
+            hub, interval=0.05, initial_spread=0, jitter=0, rescan=0.01
+        )
+        scheduler.start()
+        await asyncio.sleep(0.13)
+        await scheduler.stop()
+
+        assert scheduler.polls == 3
+
+    @pytest.mark.asyncio
+    async def test_waits_for_handshake(self, hub):
+        hub.handshake.clear()
+        hub.rollers[1] = make_roller(1)
+        scheduler = HealthScheduler(hub, initial_spread=0, rescan=0.01)
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        assert scheduler.polls == 0
+
+        hub.handshake.set()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        assert scheduler.polls == 1
+
+    @pytest.mark.asyncio
+    async def test_shared_slot_not_held_while_disconnected(self, hub):
+        slots = asyncio.Semaphore(1)
+        await slots.acquire()  # held by another hub's poll
+        hub.rollers[1] = make_roller(1)
+        scheduler = HealthScheduler(hub, initial_spread=0, rescan=0.01)
+        scheduler.slots = slots
+        scheduler.start()
+        await asyncio.sleep(0.02)
+
+        hub.handshake.clear()
+        slots.release()
+        await asyncio.sleep(0.02)
+        assert scheduler.polls == 0
+        assert not slots.locked()
+        await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_forgets_removed_rollers(self, hub):
+        hub.rollers[1] = make_roller(1)
+        scheduler = HealthScheduler(hub, initial_spread=10, rescan=0.01)
+        scheduler.start()
+        await asyncio.sleep(0.02)
+        assert 1 in scheduler._due
+
+        del hub.rollers[1]
+        await asyncio.sleep(0.02)
+        assert scheduler._due == {}
+        await scheduler.stop()
+
+    @pytest.mark.asyncio
+    async def test_poll_failure_is_logged(self, hub, caplog):
+        async def poll(roller_id):
+            raise RuntimeError("boom")
+
+        hub.rollers[1] = make_roller(1, poll)
+        scheduler = HealthScheduler(hub, initial_spread=0, rescan=0.01)
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+
+        assert scheduler.polls == 1
+        assert "health poll failed: boom" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_polls(self, hub):
+        started = asyncio.Event()
+
+        async def poll(roller_id):
+            started.set()
+            await asyncio.sleep(10)
+
+        hub.rollers[1] = make_roller(1, poll)
+        scheduler = HealthScheduler(hub, initial_spread=0, rescan=0.01)
+        scheduler.start()
+        await started.wait()
+        assert scheduler.running
+
+        await scheduler.stop()
+        assert not scheduler.running
+        assert scheduler._polls == set()
+
+
+class TestAdaptiveInterval:
+    @pytest.fixture
+    def scheduler(self, hub):
+        return HealthScheduler(
+            hub,
+            interval=3600,
+            min_interval=900,
+            max_interval=14400,
+            low_battery=20,
+            high_battery=80,
+            drain_step=5,
+            jitter=0,
+        )
+
+    def test_unknown_battery_uses_interval(self, scheduler):
+        assert scheduler.target_interval(make_roller(1)) == 3600
+
+    @pytest.mark.parametrize(
+        ("battery", "expected"),
+        [(100, 14400), (80, 14400), (50, 7650), (20, 900), (5, 900)],
+    )
+    def test_interval_follows_battery_level(self, scheduler, battery, expected):
+        roller = make_roller(1)
+        roller.battery = battery
+        assert scheduler.target_interval(roller) == pytest.approx(expected)
+
+    def test_draining_battery_is_polled_sooner(self, scheduler):
+        roller = make_roller(1)
+        roller.battery = 90
+        scheduler.record_battery(roller, 0.0)
+        roller.battery = 85
+        scheduler.record_battery(roller, 3600.0)
+        assert scheduler.drain_rates[1] == pytest.approx(5.0)
+        assert scheduler.target_interval(roller) == pytest.approx(3600)
+
+    def test_drain_interval_is_bounded(self, scheduler):
+        roller = make_roller(1)
+        roller.battery = 90
+        scheduler.record_battery(roller, 0.0)
+        roller.battery = 50
+        scheduler.record_battery(roller, 60.0)
+        assert scheduler.target_interval(roller) == 900
+
+    def test_charging_battery_counts_as_steady(self, scheduler):
+        roller = make_roller(1)
+        roller.battery = 85
+        scheduler.record_battery(roller, 0.0)
+        roller.battery = 90
+        scheduler.record_battery(roller, 3600.0)
+        assert scheduler.drain_rates[1] == 0
+        assert scheduler.target_interval(roller) == 14400
+
+    def test_drain_rate_is_smoothed(self, scheduler):
+        roller = make_roller(1)
+        for now, battery in ((0.0, 90), (3600.0, 86), (7200.0, 86)):
+            roller.battery = battery
+            scheduler.record_battery(roller, now)
+        assert scheduler.drain_rates[1] == pytest.approx(2.0)
+
+    def test_poll_rate(self, scheduler):
+        for roller_id, battery in ((1, 100), (2, 100), (3, 20)):
+            roller = make_roller(roller_id)
+            roller.battery = battery
+            scheduler.next_interval(roller)
+        assert scheduler.poll_rate == pytest.approx(0.25 + 0.25 + 4)
+
+    def test_invalid_bounds(self, hub):
+        with pytest.raises(ValueError):
+            HealthScheduler(hub, min_interval=100, max_interval=10)
+        with pytest.raises(ValueError):
+            HealthScheduler(hub, low_battery=80, high_battery=20)
+
+    @pytest.mark.asyncio
+    async def test_unanswered_poll_records_no_reading(self, hub):
+        async def poll(roller_id):
+            return False
+
+        roller = make_roller(1, poll)
+        roller.battery = 50
+        hub.rollers[1] = roller
+        scheduler = HealthScheduler(
+            hub,
+            min_interval=0.01,
+            max_interval=0.01,
+            initial_spread=0,
+            jitter=0,
+            rescan=0.01,
+        )
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        assert scheduler.polls >= 2
+        assert scheduler._readings == {}
+        assert scheduler.drain_rates == {}
+
+    @pytest.mark.asyncio
+    async def test_poll_reschedules_from_new_battery_level(self, hub):
+        async def poll(roller_id):
+            hub.rollers[roller_id].battery = 10
+
+        hub.rollers[1] = make_roller(1, poll)
+        scheduler = HealthScheduler(
+            hub, min_interval=900, initial_spread=0, jitter=0, rescan=0.01
+        )
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        assert scheduler.intervals[1] == 900
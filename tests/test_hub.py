@@ -4,15 +4,21 @@ from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+import aiopulse
 import aiopulse.const as const
 import aiopulse.transport
 from aiopulse.const import CommandType, ResponseType
+from aiopulse.discovery import DiscoveryCache
+from aiopulse.engine import CommandPriority
 from aiopulse.errors import (
     CannotConnectException,
     InvalidResponseException,
+    NotConnectedException,
     NotRunningException,
 )
+from aiopulse.events import OverflowPolicy
 from aiopulse.hub import Hub
+from aiopulse.reconnect import ReconnectPolicy
 
 
 # Helper to create a valid parseable ping response payload
@@ -21,6 +27,16 @@ def _ping_response():
     return const.HEADER + b"\x03\x00\x00\x16"
 
 
+def discover_message(hub_id):
+    encoded = hub_id.encode()
+    return bytes(10) + len(encoded).to_bytes(2, "little") + encoded
+
+
+def discover_datagram(hub_id):
+    body = bytes(2) + b"\x04" + discover_message(hub_id)
+    return const.HEADER + bytes([len(body)]) + body
+
+
 class TestHubInit:
     def test_init_with_host(self, hub):
         assert hub.host == "192.168.1.100"
@@ -129,6 +145,71 @@ class TestHubConnect:
         assert result is True
         assert hub.id == "b123"
         assert hub.handshake.is_set()
+        assert hub.last_handshake is not None
+
+    def setup_responses(self, hub):
+        return (
+            const.HEADER
+            + ResponseType.UNKNOWN1.to_bytes(4, "big")
+            + bytes.fromhex("06")
+            + hub.topic
+            + bytes.fromhex("16000f0002000000000000000c000600120311073816ff9d")
+        )
+
+    @pytest.mark.asyncio
+    async def test_connect_pipelines_setup(self, hub, mock_transport):
+        ack = const.HEADER + ResponseType.SETID.to_bytes(4, "big")
+        mock_transport.receive = AsyncMock(
+            side_effect=[
+                const.HEADER + ResponseType.CONNECT.to_bytes(4, "big") + b"Hub123",
+                const.HEADER + ResponseType.LOGIN.to_bytes(4, "big") + b"\x00",
+                # replies arrive in one read, interleaved with a ping
+                self.setup_responses(hub) + _ping_response() + ack + ack,
+            ]
+        )
+
+        assert await hub.connect() is True
+        assert mock_transport.send.call_count == 3
+        setup = mock_transport.send.call_args_list[2].args[0]
+        assert setup.startswith(const.HEADER + CommandType.SETID.to_bytes(4, "big"))
+        assert const.HEADER + CommandType.UNKNOWN1.to_bytes(4, "big") in setup
+        assert set(hub.handshake_timings) == {
+            "transport",
+            "connect",
+            "login",
+            "setup",
+            "total",
+        }
+        assert hub.handshake_timings["total"] >= hub.handshake_timings["setup"]
+
+    @pytest.mark.asyncio
+    async def test_connect_setup_waits_for_every_reply(self, hub, mock_transport):
+        ack = const.HEADER + ResponseType.SETID.to_bytes(4, "big")
+        mock_transport.receive = AsyncMock(
+            side_effect=[
+                const.HEADER + ResponseType.CONNECT.to_bytes(4, "big") + b"Hub123",
+                const.HEADER + ResponseType.LOGIN.to_bytes(4, "big") + b"\x00",
+                ack,
+                self.setup_responses(hub),
+                b"",
+            ]
+        )
+
+        with pytest.raises(InvalidResponseException):
+            await hub.connect()
+        assert not hub.handshake.is_set()
+
+    @pytest.mark.asyncio
+    async def test_get_responses_rejects_malformed_frame(self, hub, mock_transport):
+        mock_transport.receive = AsyncMock(return_value=b"\x01\x02\x03\x04\x05")
+        with pytest.raises(InvalidResponseException):
+            await hub.get_responses([ResponseType.SETID.to_bytes(4, "big")])
+
+    @pytest.mark.asyncio
+    async def test_get_responses_rejects_truncated_frame(self, hub, mock_transport):
+        mock_transport.receive = AsyncMock(return_value=const.HEADER + b"\x05\x00")
+        with pytest.raises(InvalidResponseException):
+            await hub.get_responses([ResponseType.SETID.to_bytes(4, "big")])
 
     @pytest.mark.asyncio
     async def test_connect_oserror(self, hub, mock_transport):
@@ -415,6 +496,47 @@ class TestHubResponseHandlers:
         hub.response_timerlist(message)
         assert len(hub.timers) == 1
 
+    def test_response_timerlist_unknown_type_keeps_read_timers(self, hub):
+        def timer_entry(timer_id, timer_type, tail):
+            return (
+                b"\x00\x00"
+                + b"\x04\x00"
+                + timer_id
+                + b"\x00" * 4
+                + b"\x01"
+                + b"\x00\x00"
+                + b"\x02\x00"
+                + b"T1"
+                + (b"\x00" * 4 + b"\x01") * 4
+                + b"\x00" * 4
+                + b"\x00\x00"
+                + timer_type
+                + tail
+            )
+
+        hub.timers[b"\x09\x09\x09\x09"] = old = MagicMock()
+        hub._list_changed = MagicMock()
+        hub._list_received = MagicMock()
+        message = (
+            b"\x00" * 12
+            + b"\x02"
+            + timer_entry(
+                b"\x05\x05\x05\x05",
+                b"\x00\x00\x10\x02",
+                b"\x04\x00\x01\x01\x01\x01",
+            )
+            + timer_entry(b"\x06\x06\x06\x06", b"\xff\xff\xff\xff", b"")
+        )
+        hub.response_timerlist(message)
+
+        timer = hub.timers[b"\x05\x05\x05\x05"]
+        # the list was cut short, so unseen timers are kept
+        assert hub.timers[b"\x09\x09\x09\x09"] is old
+        hub._list_changed.assert_called_once_with(
+            const.UpdateType.timers, [timer], None
+        )
+        hub._list_received.assert_called_once_with(const.UpdateType.timers)
+
     def test_response_authinfo(self, hub):
         message = b"\x00" * 15 + b"\x03\x00" + b"ABC"
         hub.response_authinfo(message)
@@ -437,7 +559,6 @@ class TestHubResponseHandlers:
     def test_response_rollerhealth(self, hub):
         roller_mock = MagicMock()
         roller_mock.notify_callback = MagicMock()
-        roller_mock.health_updated = MagicMock()
         hub.rollers[1] = roller_mock
         message = (
             b"\x00" * 12
@@ -458,6 +579,456 @@ class TestHubResponseHandlers:
         assert roller_mock.battery == 19
 
 
+def rollerlist_message(percent=0x12, name=b"Blind1"):
+    return (
+        b"\x00" * 12
+        + b"\x01"
+        + b"\x00" * 4
+        + b"\x01\x00\x00\x00\x00\x00"
+        + b"\x00\x00"
+        + b"\x04\x00"
+        + b"\x01\x00\x00\x00"
+        + b"\x00" * 4
+        + b"\x01"
+        + b"\x00" * 2
+        + len(name).to_bytes(2, "little")
+        + name
+        + b"\x00" * 8
+        + b"\x02\x00"
+        + b"S1"
+        + b"\x00\x00\x00\x00"
+        + bytes([percent])
+        + b"\x00\x00\x00\x00\x00"
+        + b"\x00"
+    )
+
+
+SCENELIST_MESSAGE = (
+    b"\x00" * 12
+    + b"\x01"
+    + b"\x00\x00"
+    + b"\x04\x00"
+    + b"\x01\x01\x01\x01"
+    + b"\x00" * 4
+    + b"\x02"
+    + b"\x00\x00"
+    + b"\x06\x00"
+    + b"Scene1"
+    + b"\x00" * 5
+    + b"\x00\x00"
+)
+
+
+class TestHubWarmResync:
+    def hub_updates(self, hub):
+        return [call.args[1] for call in hub._schedule_callback.call_args_list]
+
+    def test_unchanged_list_is_not_notified(self, hub):
+        hub.callback_subscribe(MagicMock())
+        hub.response_rollerlist(rollerlist_message())
+        roller = hub.rollers[1]
+        roller.notify_callback = MagicMock()
+
+        hub.response_rollerlist(rollerlist_message())
+        roller.notify_callback.assert_not_called()
+        assert self.hub_updates(hub) == [const.UpdateType.rollers]
+
+    def test_changed_roller_is_notified(self, hub):
+        hub.callback_subscribe(MagicMock())
+        hub.response_rollerlist(rollerlist_message())
+        roller = hub.rollers[1]
+        roller.notify_callback = MagicMock()
+
+        hub.response_rollerlist(rollerlist_message(percent=0x10))
+        roller.notify_callback.assert_called_once()
+        assert roller.closed_percent == 0
+        assert self.hub_updates(hub) == [const.UpdateType.rollers] * 2
+
+    def test_unchanged_scene_list_is_not_notified(self, hub):
+        hub.callback_subscribe(MagicMock())
+        hub.response_scenelist(SCENELIST_MESSAGE)
+        hub.response_scenelist(SCENELIST_MESSAGE)
+        assert self.hub_updates(hub) == [const.UpdateType.scenes]
+
+    @pytest.mark.asyncio
+    async def test_resync_notifies_once_when_all_lists_arrive(self, hub):
+        hub.callback_subscribe(MagicMock())
+        hub.response_rollerlist(rollerlist_message())
+        hub._schedule_callback.reset_mock()
+
+        hub._begin_resync()
+        for update_type in (
+            const.UpdateType.info,
+            const.UpdateType.rooms,
+            const.UpdateType.scenes,
+            const.UpdateType.timers,
+        ):
+            hub._list_received(update_type)
+        assert self.hub_updates(hub) == []
+        hub.response_rollerlist(rollerlist_message())
+        assert self.hub_updates(hub) == [const.UpdateType.resynced]
+        assert hub._resync_timer is None
+
+    @pytest.mark.asyncio
+    async def test_resync_removes_stale_entities(self, hub):
+        hub.callback_subscribe(MagicMock())
+        hub.response_rollerlist(rollerlist_message())
+        hub.rollers[2] = MagicMock()
+        hub._schedule_callback.reset_mock()
+
+        hub._begin_resync()
+        hub.response_rollerlist(rollerlist_message())
+        assert list(hub.rollers) == [1]
+        assert self.hub_updates(hub) == [const.UpdateType.rollers]
+
+    def test_stale_entities_are_kept_outside_resync(self, hub):
+        hub.response_rollerlist(rollerlist_message())
+        hub.rollers[2] = MagicMock()
+        hub.response_rollerlist(rollerlist_message())
+        assert sorted(hub.rollers) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_resync_times_out(self, hub, caplog):
+        hub.callback_subscribe(MagicMock())
+        hub.resync_timeout = 0.01
+        hub._begin_resync()
+        hub._list_received(const.UpdateType.rollers)
+        await asyncio.sleep(0.03)
+        assert self.hub_updates(hub) == [const.UpdateType.resynced]
+        assert "Resync timed out" in caplog.text
+
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_resync(self, hub, mock_transport):
+        hub.callback_subscribe(MagicMock())
+        hub.resync_timeout = 0.01
+        hub._begin_resync()
+        await hub.disconnect()
+        await asyncio.sleep(0.03)
+        assert self.hub_updates(hub) == []
+
+    @pytest.mark.asyncio
+    async def test_run_resyncs_only_with_cached_entities(self, hub, mock_transport):
+        resyncs = []
+        hub._begin_resync = MagicMock(side_effect=lambda: resyncs.append(1))
+        hub.reconnect_policy = MagicMock()
+        attempts = 0
+
+        async def connect():
+            nonlocal attempts
+            attempts += 1
+            if attempts == 2:
+                hub.running = False
+
+        async def response_parser():
+            hub.rollers[1] = MagicMock()
+
+        hub.response_parser = response_parser
+
+        hub.connect = AsyncMock(side_effect=connect)
+        hub.reconnect_policy.delay = MagicMock(return_value=0)
+        hub.reconnect_policy.stable_after = 0
+        await hub.run()
+        assert attempts == 2
+        assert resyncs == [1]
+
+
+POSITION_MESSAGE = (
+    b"\x00" * 12
+    + b"\x01\x00\x00\x00\x00\x00"
+    + b"\x00\x00\x00\x00"
+    + b"\x12"
+    + b"\x00\x00\x00\x00\x00"
+    + b"\x00"
+)
+
+
+class TestHubBatchNotifications:
+    @pytest.fixture
+    def batch_hub(self, hub):
+        hub.batch_notifications = True
+        hub.callback_subscribe(MagicMock())
+        return hub
+
+    def batches(self, hub):
+        calls = hub._schedule_callback.call_args_list
+        assert all(call.args[1] is const.UpdateType.batch for call in calls)
+        return [call.args[2] for call in calls]
+
+    @pytest.mark.asyncio
+    async def test_cycle_delivers_one_batch(self, batch_hub):
+        batch_hub.response_rollerlist(rollerlist_message())
+        batch_hub.response_scenelist(SCENELIST_MESSAGE)
+        batch_hub.response_position(POSITION_MESSAGE)
+        roller = batch_hub.rollers[1]
+        roller.notify_callback = MagicMock()
+        assert batch_hub._schedule_callback.call_count == 0
+
+        await asyncio.sleep(0)
+        (batch,) = self.batches(batch_hub)
+        assert batch.changed == {
+            const.UpdateType.rollers: {roller},
+            const.UpdateType.scenes: set(batch_hub.scenes.values()),
+        }
+        assert batch.removed == {}
+        roller.notify_callback.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unchanged_cycle_is_not_delivered(self, batch_hub):
+        batch_hub.response_rollerlist(rollerlist_message())
+        await asyncio.sleep(0)
+        batch_hub._schedule_callback.reset_mock()
+
+        batch_hub.response_rollerlist(rollerlist_message())
+        await asyncio.sleep(0)
+        assert self.batches(batch_hub) == []
+
+    @pytest.mark.asyncio
+    async def test_removed_entities_are_batched(self, batch_hub):
+        batch_hub.response_rollerlist(rollerlist_message())
+        batch_hub.response_scenelist(SCENELIST_MESSAGE)
+        await asyncio.sleep(0)
+        batch_hub._schedule_callback.reset_mock()
+        scene = next(iter(batch_hub.scenes.values()))
+
+        batch_hub._begin_resync()
+        batch_hub.response_scenelist(SCENELIST_MESSAGE[:12] + b"\x00\x00\x00")
+        await asyncio.sleep(0)
+        batch_hub._cancel_resync()
+        (batch,) = self.batches(batch_hub)
+        assert batch.removed == {const.UpdateType.scenes: {scene}}
+        assert const.UpdateType.scenes in batch
+        assert const.UpdateType.rollers not in batch
+
+    @pytest.mark.asyncio
+    async def test_later_cycle_gets_new_batch(self, batch_hub):
+        batch_hub.response_rollerlist(rollerlist_message())
+        await asyncio.sleep(0)
+        batch_hub.response_rollerlist(rollerlist_message(percent=0x10))
+        await asyncio.sleep(0)
+        first, second = self.batches(batch_hub)
+        assert first is not second
+        assert second.changed == {const.UpdateType.rollers: {batch_hub.rollers[1]}}
+
+
+def health_message(charge=0x0A):
+    return (
+        b"\x00" * 12
+        + b"\x01\x00\x00\x00\x00\x00"
+        + b"A"
+        + b"\x00" * 4
+        + b"B"
+        + b"\x00" * 4
+        + b"C"
+        + b"\x00" * 4
+        + b"\x00" * 3
+        + bytes([charge])
+        + b"\x00"
+        + b"\x00" * 8
+        + b"\x00\x00"
+    )
+
+
+ROLLER_UPDATED_MESSAGE = (
+    b"\x00" * 10
+    + b"\x04\x00"
+    + b"\x01\x00\x00\x00"
+    + b"\x00" * 4
+    + b"\x01"
+    + b"\x00" * 2
+    + b"\x06\x00"
+    + b"Blind1"
+    + b"\x00" * 10
+    + b"\x01\x00\x00\x00\x00\x00"
+    + b"\x00\x00\x00\x00"
+    + b"\x12"
+    + b"\x00\x00\x00\x00\x00"
+    + b"\x00"
+    + b"\x00\x00"
+)
+
+
+class TestHubChangeDetection:
+    @pytest.fixture
+    def roller(self, hub):
+        hub.response_rollerlist(rollerlist_message())
+        roller = hub.rollers[1]
+        roller.notify_callback = MagicMock()
+        hub.callback_subscribe(MagicMock())
+        hub._schedule_callback.reset_mock()
+        return roller
+
+    def test_repeated_position_is_suppressed(self, hub, roller):
+        hub.response_position(POSITION_MESSAGE)
+        hub.response_position(POSITION_MESSAGE)
+        roller.notify_callback.assert_not_called()
+        assert hub.duplicate_updates[const.UpdateType.rollers] == 2
+
+    def test_position_change_reports_fields(self, hub, roller):
+        message = bytearray(POSITION_MESSAGE)
+        message[22] = 0x10
+        hub.response_position(bytes(message))
+        roller.notify_callback.assert_called_once()
+        assert roller.changed_fields == {"closed_percent"}
+        hub.response_position(bytes(message))
+        roller.notify_callback.assert_called_once()
+        assert hub.duplicate_updates[const.UpdateType.rollers] == 1
+
+    @pytest.mark.asyncio
+    async def test_fields_of_each_frame_in_one_read(self, hub, roller):
+        def position_frame(percent, flags):
+            position = (
+                b"\x00" * 12
+                + b"\x01\x00\x00\x00\x00\x00"
+                + b"\x00" * 4
+                + b"\x00"
+                + b"\x00" * 5
+                + bytes([percent, flags])
+            )
+            inner = b"\x06" + hub.topic + b"\x00\x00" + bytes.fromhex("2301") + position
+            return const.HEADER + bytes([3 + len(inner)]) + b"\x00\x00\x91" + inner
+
+        roller.closed_percent = 0
+        roller.flags = 0
+        async with hub.events() as stream:
+            hub.response_parse(position_frame(40, 0) + position_frame(40, 2))
+            events = [await stream.get() for _ in range(2)]
+        # the entity holds the latest update, events keep each update's fields
+        assert roller.changed_fields == {"flags"}
+        assert [event.fields for event in events] == [{"closed_percent"}, {"flags"}]
+
+    def test_repeated_health_is_suppressed(self, hub, roller):
+        hub.response_rollerhealth(health_message())
+        roller.notify_callback.assert_called_once()
+        assert roller.changed_fields == {"battery"}
+        hub.response_rollerhealth(health_message())
+        roller.notify_callback.assert_called_once()
+        assert hub.duplicate_updates[const.UpdateType.rollers] == 1
+
+    def test_repeated_roller_updated_is_suppressed(self, hub, roller):
+        hub.response_roller_updated(ROLLER_UPDATED_MESSAGE)
+        roller.notify_callback.assert_not_called()
+        assert hub.duplicate_updates[const.UpdateType.rollers] == 1
+
+        renamed = ROLLER_UPDATED_MESSAGE.replace(b"Blind1", b"Blind9")
+        hub.response_roller_updated(renamed)
+        roller.notify_callback.assert_called_once()
+        assert roller.changed_fields == {"name"}
+        assert hub._schedule_callback.call_count == 1
+
+    def test_repeated_list_is_counted(self, hub, roller):
+        hub.response_rollerlist(rollerlist_message())
+        assert hub.duplicate_updates[const.UpdateType.rollers] == 1
+        hub.response_rollerlist(rollerlist_message(name=b"Blind2"))
+        assert roller.changed_fields == {"name"}
+
+    def test_new_entity_reports_all_fields(self, hub):
+        hub.response_scenelist(SCENELIST_MESSAGE)
+        scene = next(iter(hub.scenes.values()))
+        assert scene.changed_fields == {"name", "icon"}
+
+    @pytest.mark.asyncio
+    async def test_batch_reports_fields(self, hub, roller):
+        hub.batch_notifications = True
+        message = bytearray(POSITION_MESSAGE)
+        message[22] = 0x10
+        hub.response_position(bytes(message))
+        hub.response_rollerhealth(health_message())
+        await asyncio.sleep(0)
+        (call,) = hub._schedule_callback.call_args_list
+        batch = call.args[2]
+        assert batch.fields == {roller: {"closed_percent", "battery"}}
+
+
+class TestHubEvents:
+    @pytest.mark.asyncio
+    async def test_stream_receives_entity_events(self, hub):
+        async with hub.events() as stream:
+            hub.response_rollerlist(rollerlist_message())
+            hub.response_position(POSITION_MESSAGE)
+            hub.response_rollerhealth(health_message())
+            roller = hub.rollers[1]
+            events = [await stream.get() for _ in range(2)]
+        assert [(e.update_type, e.entity) for e in events] == [
+            (const.UpdateType.rollers, roller)
+        ] * 2
+        assert events[1].fields == {"battery"}
+        assert stream.depth == 0
+        assert hub._streams == []
+
+    @pytest.mark.asyncio
+    async def test_removed_and_resynced_events(self, hub):
+        hub.response_scenelist(SCENELIST_MESSAGE)
+        scene = next(iter(hub.scenes.values()))
+        stream = hub.events()
+        hub._begin_resync()
+        hub.response_scenelist(SCENELIST_MESSAGE[:12] + b"\x00\x00\x00")
+        hub._finish_resync()
+        stream.close()
+        events = [event async for event in stream]
+        assert [(e.update_type, e.entity, e.removed) for e in events] == [
+            (const.UpdateType.scenes, scene, True),
+            (const.UpdateType.resynced, None, False),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_streams_are_independent(self, hub):
+        fast = hub.events()
+        slow = hub.events(maxsize=1, policy=OverflowPolicy.coalesce)
+        hub.response_rollerlist(rollerlist_message())
+        hub.response_rollerhealth(health_message())
+        assert fast.depth == 2
+        assert slow.depth == 1
+        assert slow.coalesced == 1
+        fast.close()
+        slow.close()
+
+    @pytest.mark.asyncio
+    async def test_blocking_stream_pauses_reading(self, hub, mock_transport):
+        stream = hub.events(maxsize=1, policy=OverflowPolicy.block)
+        hub.response_rollerlist(rollerlist_message())
+
+        async def get_response():
+            await asyncio.sleep(0.001)
+            return b""
+
+        hub.get_response = AsyncMock(side_effect=get_response)
+        hub.handshake.set()
+        parser = asyncio.ensure_future(hub.response_parser())
+        await asyncio.sleep(0.01)
+        hub.get_response.assert_not_awaited()
+        assert hub.reading_paused
+        assert hub.read_pauses == 1
+
+        await stream.get()
+        await asyncio.sleep(0.01)
+        hub.get_response.assert_awaited()
+        assert not hub.reading_paused
+        hub.handshake.clear()
+        await asyncio.wait_for(parser, 1)
+        stream.close()
+
+    @pytest.mark.asyncio
+    async def test_blocking_stream_holds_keepalive(self, hub, mock_transport):
+        stream = hub.events(maxsize=1, policy=OverflowPolicy.block)
+        hub.response_rollerlist(rollerlist_message())
+        hub.keepalive.interval = 0.01
+        hub.keepalive.timeout = 0.01
+        hub.keepalive.max_missed = 1
+        hub.disconnect = AsyncMock()
+        hub.handshake.set()
+        parser = asyncio.ensure_future(hub.response_parser())
+        hub.keepalive.start()
+        await asyncio.sleep(0.1)
+
+        # the slow consumer doesn't get the link declared dead
+        assert hub.keepalive.pongs_missed == 0
+        hub.disconnect.assert_not_awaited()
+        await hub.keepalive.stop()
+        hub.handshake.clear()
+        stream.close()
+        await asyncio.wait_for(parser, 1)
+
+
 class TestHubBoundsChecking:
     def test_response_hubinfo_too_short(self, hub):
         """response_hubinfo should raise if message too short."""
@@ -519,6 +1090,15 @@ class TestHubBoundsChecking:
         with pytest.raises(InvalidResponseException):
             hub.response_discover(short_message)
 
+    def test_response_discover_sets_id(self, hub):
+        hub.response_discover(discover_message("hub1"))
+        assert hub.id == "hub1"
+
+    def test_decode_discover_datagram(self):
+        assert Hub.decode_discover_datagram(discover_datagram("hub1")) == "hub1"
+        assert Hub.decode_discover_datagram(b"junk") is None
+        assert Hub.decode_discover_datagram(discover_datagram("")) is None
+
 
 class TestHubRecMessage:
     def test_rec_message_invalid_first_byte(self, hub):
@@ -530,14 +1110,9 @@ class TestHubRecMessage:
             hub.rec_message(b"\x06" + b"WrongTopic" + b"\x00" * 10)
 
     def test_rec_message_acknowledgement(self, hub):
-        hub.command_lock = asyncio.Lock()
-
-        async def do_test():
-            await hub.command_lock.acquire()
-            hub.rec_message(b"")
-            assert not hub.command_lock.locked()
-
-        asyncio.run(do_test())
+        hub.command_engine = MagicMock()
+        hub.rec_message(b"")
+        hub.command_engine.acknowledge.assert_called_once()
 
     def test_rec_message_known_type(self, hub):
         message = (
@@ -575,6 +1150,27 @@ class TestHubResponseParse:
         with pytest.raises(InvalidResponseException):
             hub.response_parse(response)
 
+    def test_response_parse_multiple_frames(self, hub):
+        ping = const.HEADER + b"\x03\x00\x00\x16"
+        room = (
+            b"\x00" * 12
+            + b"\x01"
+            + b"\x00\x00"
+            + b"\x04\x00"
+            + b"\x01\x01\x01\x01"
+            + b"\x00" * 4
+            + b"\x03"
+            + b"\x00\x00"
+            + b"\x06\x00"
+            + b"Living"
+        )
+        inner = b"\x06" + hub.topic + b"\x00\x00" + bytes.fromhex("0101") + room
+        frame = const.HEADER + bytes([3 + len(inner)]) + b"\x00\x00\x91" + inner
+        hub.response_parse(bytearray(ping + frame + ping))
+        assert list(hub.rooms) == [b"\x01\x01\x01\x01"]
+        assert type(next(iter(hub.rooms))) is bytes
+        assert hub.rooms[b"\x01\x01\x01\x01"].name == "Living"
+
     def test_response_parse_multi_block(self, hub):
         # msg_len=128 (>127) triggers multi-block parsing with msg_blocks=1
         # Content: unknown(2) + mtype(22/ping) + 125 zero bytes
@@ -631,6 +1227,23 @@ class TestHubResponseParser:
         )
 
 
+class TestHubKeepalive:
+    @pytest.mark.asyncio
+    async def test_ping_reply_sets_rtt(self, hub, mock_transport):
+        assert hub.rtt is None
+        hub.keepalive.ping()
+        hub.response_parse(_ping_response())
+        assert hub.rtt is not None
+        assert hub.keepalive.pongs_received == 1
+
+    @pytest.mark.asyncio
+    async def test_disconnect_resets_keepalive(self, hub, mock_transport):
+        hub.handshake.set()
+        pong = hub.keepalive.ping()
+        await hub.disconnect()
+        assert pong.cancelled()
+
+
 class TestHubSendCommand:
     @pytest.mark.asyncio
     async def test_send_command_not_running(self, hub, mock_transport):
@@ -646,47 +1259,183 @@ class TestHubSendCommand:
     async def test_send_command_success(self, hub, mock_transport):
         hub.running = True
         hub.handshake.set()
-        mock_transport.send = MagicMock()
-        hub.command_lock = MagicMock(spec=asyncio.Lock)
-        hub.command_lock.acquire = AsyncMock(side_effect=[None, None])
-        hub.command_lock.locked = MagicMock(return_value=False)
-        hub.command_lock.release = MagicMock()
+        mock_transport.send = MagicMock(
+            side_effect=lambda buffer: asyncio.get_running_loop().call_soon(
+                hub.rec_message, b""
+            )
+        )
 
-        await hub.send_command(
+        result = await hub.send_command(
             CommandType.GET_HUB_INFO.to_bytes(4, "big"),
             bytes.fromhex("F000"),
             b"\x00" * 7,
         )
+        assert result is True
         assert mock_transport.send.call_count == 1
+        assert hub.command_engine.acknowledged == 1
 
     @pytest.mark.asyncio
     async def test_send_command_timeout(self, hub, mock_transport):
         hub.running = True
         hub.handshake.set()
         mock_transport.send = MagicMock()
-        hub.command_lock = MagicMock(spec=asyncio.Lock)
-
-        call_count = [0]
-
-        async def mock_acquire():
-            call_count[0] += 1
-            if call_count[0] == 1:
-                return
-            raise TimeoutError()
 
-        hub.command_lock.acquire = AsyncMock(side_effect=mock_acquire)
-        hub.command_lock.locked = MagicMock(return_value=True)
-        hub.command_lock.release = MagicMock()
-
-        await hub.send_command(
+        result = await hub.send_command(
             CommandType.GET_HUB_INFO.to_bytes(4, "big"),
             bytes.fromhex("F000"),
             b"\x00" * 7,
             timeout=0.01,
             retries=2,
         )
+        assert result is False
         assert mock_transport.send.call_count == 2
 
+    @pytest.mark.asyncio
+    async def test_send_command_pipelined(self, hub, mock_transport):
+        hub.running = True
+        hub.handshake.set()
+        mock_transport.send = MagicMock()
+
+        tasks = [
+            asyncio.create_task(
+                hub.send_command(
+                    CommandType.MOVE.to_bytes(4, "big"), bytes.fromhex("2201"), b"\xff"
+                )
+            )
+            for _ in range(3)
+        ]
+        await asyncio.sleep(0)
+        assert mock_transport.send.call_count == 3
+        for _ in tasks:
+            hub.rec_message(b"")
+        assert await asyncio.gather(*tasks) == [True, True, True]
+
+    @pytest.mark.asyncio
+    async def test_send_command_coalesces_roller_moves(self, hub, mock_transport):
+        hub.running = True
+        hub.handshake.set()
+        hub.command_engine.window = 1
+        mock_transport.send = MagicMock()
+        roller = aiopulse.Roller(hub, 7)
+
+        tasks = [
+            asyncio.create_task(roller.move_to(percent)) for percent in (10, 20, 30)
+        ]
+        await asyncio.sleep(0)
+        assert hub.command_engine.coalesced == 1
+        hub.rec_message(b"")
+        hub.rec_message(b"")
+        await asyncio.gather(*tasks)
+        sent = [call.args[0] for call in mock_transport.send.call_args_list]
+        assert len(sent) == 2
+        assert sent[-1][-4:-2] == b"\x1e\x00"
+
+    @pytest.mark.asyncio
+    async def test_disconnect_fails_outstanding(self, hub, mock_transport):
+        hub.running = True
+        hub.handshake.set()
+        mock_transport.send = MagicMock()
+
+        task = asyncio.create_task(
+            hub.send_command(
+                CommandType.MOVE.to_bytes(4, "big"), bytes.fromhex("2201"), b"\xff"
+            )
+        )
+        await asyncio.sleep(0)
+        await hub.disconnect()
+        assert await task is False
+
+    @pytest.mark.asyncio
+    async def test_update_survives_disconnect(self, hub, mock_transport):
+        hub.running = True
+        hub.handshake.set()
+        mock_transport.send = MagicMock()
+
+        task = asyncio.create_task(hub.update())
+        await asyncio.sleep(0)
+        await hub.disconnect()
+        await task
+        hub.running = False
+        await hub.update()
+
+
+class TestHubMoveMany:
+    @pytest.mark.asyncio
+    async def test_move_many_single_write(self, hub, mock_transport):
+        hub.running = True
+        hub.handshake.set()
+        mock_transport.send = MagicMock()
+
+        task = asyncio.create_task(hub.move_many({1: 10, 2: 20, 3: 30}))
+        await asyncio.sleep(0)
+        mock_transport.send.assert_called_once()
+        buffer = mock_transport.send.call_args.args[0]
+        assert buffer.count(const.HEADER + CommandType.MOVE_TO.to_bytes(4, "big")) == 3
+        for _ in range(3):
+            hub.rec_message(b"")
+        assert await task == {1: True, 2: True, 3: True}
+
+    @pytest.mark.asyncio
+    async def test_move_variants(self, hub, mock_transport):
+        hub.running = True
+        hub.handshake.set()
+        hub.send_many = AsyncMock(return_value={1: True})
+        for method, suffix in (
+            (hub.move_up_many, b"\x10\xff"),
+            (hub.move_down_many, b"\x12\xff"),
+            (hub.move_stop_many, b"\x11\xff"),
+        ):
+            assert await method([1]) == {1: True}
+            command, messages = hub.send_many.call_args.args
+            assert command == CommandType.MOVE.to_bytes(4, "big")
+            assert messages[1].endswith(suffix)
+
+    @pytest.mark.asyncio
+    async def test_move_many_disconnect(self, hub, mock_transport):
+        hub.running = True
+        hub.handshake.set()
+        mock_transport.send = MagicMock()
+
+        task = asyncio.create_task(hub.move_many({1: 10, 2: 20}))
+        await asyncio.sleep(0)
+        await hub.disconnect()
+        assert await task == {1: False, 2: False}
+
+    @pytest.mark.asyncio
+    async def test_move_many_empty(self, hub):
+        hub.running = True
+        assert await hub.move_many({}) == {}
+
+    @pytest.mark.asyncio
+    async def test_move_many_not_running(self, hub):
+        with pytest.raises(NotRunningException):
+            await hub.move_many({1: 50})
+
+
+class TestHubEncodeCommand:
+    def test_encode_command(self, hub):
+        message = b"\x00" * 6 + b"\xff"
+        buffer = hub.encode_command(
+            CommandType.GET_HUB_INFO.to_bytes(4, "big"), bytes.fromhex("F000"), message
+        )
+        data = bytes.fromhex("F000") + b"\x04\x00" + message
+        assert buffer == (
+            const.HEADER
+            + CommandType.GET_HUB_INFO.to_bytes(4, "big")
+            + b"\x05"
+            + hub.topic
+            + bytes([len(data) + 1, 0])
+            + data
+            + bytes([sum(data) & 0xFF])
+        )
+        assert hub.sequence == 6
+
+    def test_encode_command_sequence_wraps(self, hub):
+        hub.sequence = 0xFFFE
+        buffer = hub.encode_command(b"\x00" * 4, b"\x00\x00", b"")
+        assert buffer[-3:-1] == b"\xfe\xff"
+        assert hub.sequence == 0
+
 
 class TestHubSendHealthcheck:
     @pytest.mark.asyncio
@@ -694,20 +1443,95 @@ class TestHubSendHealthcheck:
         hub.running = True
         hub.handshake.set()
         hub.send_command = AsyncMock()
-        hub.health_lock = asyncio.Lock()
 
-        async def release_health():
-            hub.health_lock.release()
-            return True
+        result = await hub.send_healthcheck(
+            CommandType.GET_HEALTH.to_bytes(4, "big"),
+            bytes.fromhex("2A01"),
+            b"\x00" * 10,
+        )
+        assert result is True
+        hub.send_command.assert_awaited_once()
+        assert (
+            hub.send_command.call_args.kwargs["priority"]
+            == CommandPriority.HOUSEKEEPING
+        )
+
+    @pytest.mark.asyncio
+    async def test_send_healthcheck_waits_for_response(self, hub, mock_transport):
+        hub.handshake.set()
+        hub.send_command = AsyncMock()
+        hub.rollers[1] = MagicMock()
 
-        with patch.object(hub.health_lock, "acquire") as mock_acquire:
-            mock_acquire.side_effect = [True, TimeoutError]
-            await hub.send_healthcheck(
+        task = asyncio.create_task(
+            hub.send_healthcheck(
                 CommandType.GET_HEALTH.to_bytes(4, "big"),
                 bytes.fromhex("2A01"),
                 b"\x00" * 10,
+                roller_id=1,
             )
-            hub.send_command.assert_awaited_once()
+        )
+        await asyncio.sleep(0)
+        assert not task.done()
+        hub.response_rollerhealth(
+            b"\x00" * 12 + b"\x01\x00\x00\x00\x00\x00" + b"\x00" * 28
+        )
+        assert await task is True
+        assert hub._health_waiters == {}
+
+    @pytest.mark.asyncio
+    async def test_send_healthcheck_skipped_while_disconnected(
+        self, hub, mock_transport
+    ):
+        hub.running = True
+        hub.handshake.clear()
+        hub.send_command = AsyncMock()
+
+        result = await asyncio.wait_for(
+            hub.send_healthcheck(
+                CommandType.GET_HEALTH.to_bytes(4, "big"),
+                bytes.fromhex("2A01"),
+                b"\x00" * 10,
+                roller_id=1,
+            ),
+            timeout=1,
+        )
+        assert result is False
+        hub.send_command.assert_not_awaited()
+        assert hub._health_waiters == {}
+
+    @pytest.mark.asyncio
+    async def test_send_healthcheck_timeout(self, hub, mock_transport):
+        hub.handshake.set()
+        hub.send_command = AsyncMock()
+
+        result = await hub.send_healthcheck(
+            CommandType.GET_HEALTH.to_bytes(4, "big"),
+            bytes.fromhex("2A01"),
+            b"\x00" * 10,
+            roller_id=1,
+            timeout=0.01,
+        )
+        assert result is False
+        assert hub._health_waiters == {}
+
+    @pytest.mark.asyncio
+    async def test_health_responses_are_matched_per_roller(self, hub, mock_transport):
+        hub.handshake.set()
+        hub.send_command = AsyncMock()
+
+        async def poll(roller_id):
+            return await hub.send_healthcheck(
+                b"\x00" * 4, b"\x00\x00", b"", roller_id=roller_id, timeout=0.05
+            )
+
+        first = asyncio.create_task(poll(1))
+        second = asyncio.create_task(poll(2))
+        await asyncio.sleep(0)
+        hub.response_rollerhealth(
+            b"\x00" * 12 + b"\x02\x00\x00\x00\x00\x00" + b"\x00" * 28
+        )
+        assert await second is True
+        assert await first is False
 
 
 class TestHubRunStop:
@@ -736,6 +1560,7 @@ class TestHubRunStop:
         await hub.stop()
         await run_task
         assert hub.running is False
+        assert not hub.health_scheduler.running
         hub.disconnect.assert_called_once()
 
     @pytest.mark.asyncio
@@ -763,6 +1588,115 @@ class TestHubRunStop:
         count = source.count("except errors.InvalidResponseException")
         assert count == 1, f"Expected 1 InvalidResponseException catch, found {count}"
 
+    @pytest.mark.asyncio
+    async def test_run_backs_off_between_failed_attempts(self, hub, mock_transport):
+        delays = []
+        hub.reconnect_policy = MagicMock()
+
+        def delay(failures):
+            delays.append(failures)
+            if failures == 3:
+                hub.running = False
+            return 0
+
+        hub.reconnect_policy.delay = delay
+        hub.connect = AsyncMock(side_effect=CannotConnectException("down"))
+
+        await hub.run()
+        assert delays == [0, 1, 2, 3]
+        assert hub.reconnect_attempts == 4
+        assert hub.last_handshake is None
+
+    @pytest.mark.asyncio
+    async def test_run_retries_immediately_after_connection_drop(
+        self, hub, mock_transport
+    ):
+        failures = []
+        hub.reconnect_policy = MagicMock()
+
+        def delay(count):
+            failures.append(count)
+            if len(failures) == 3:
+                hub.running = False
+            return 0
+
+        async def connect():
+            if len(failures) == 1:
+                raise CannotConnectException("down")
+            hub.handshake.set()
+            hub.last_handshake = 1.0
+
+        hub.reconnect_policy.delay = delay
+        hub.reconnect_policy.stable_after = 0
+        hub.connect = AsyncMock(side_effect=connect)
+        hub.response_parser = AsyncMock()
+        hub.disconnect = AsyncMock(side_effect=hub.handshake.clear)
+
+        await hub.run()
+        # each drop after a handshake retries at once, a failed retry backs off
+        assert failures == [0, 1, 0]
+
+    @pytest.mark.asyncio
+    async def test_run_backs_off_when_connection_flaps(self, hub, mock_transport):
+        failures = []
+        policy = ReconnectPolicy(stable_after=10)
+
+        def delay(count):
+            failures.append(count)
+            if len(failures) == 4:
+                hub.running = False
+            return 0
+
+        async def connect():
+            hub.handshake.set()
+
+        policy.delay = delay
+        hub.reconnect_policy = policy
+        hub.connect = AsyncMock(side_effect=connect)
+        hub.response_parser = AsyncMock(side_effect=NotConnectedException)
+        hub.disconnect = AsyncMock(side_effect=hub.handshake.clear)
+
+        await hub.run()
+        # handshakes that drop at once don't reset the backoff
+        assert failures == [0, 1, 2, 3]
+
+    @pytest.mark.asyncio
+    async def test_stop_interrupts_reconnect_delay(self, hub, mock_transport):
+        hub.reconnect_policy = MagicMock()
+        hub.reconnect_policy.delay = MagicMock(return_value=60)
+        hub.connect = AsyncMock(side_effect=CannotConnectException("down"))
+
+        run_task = asyncio.create_task(hub.run())
+        await asyncio.sleep(0.01)
+        await hub.stop()
+        await asyncio.wait_for(run_task, timeout=1)
+        assert hub.reconnect_attempts == 1
+
+    @pytest.mark.asyncio
+    async def test_time_disconnected(self, hub, mock_transport):
+        hub.connect = AsyncMock(side_effect=CannotConnectException("down"))
+        hub.reconnect_policy = MagicMock()
+        hub.reconnect_policy.delay = MagicMock(return_value=0.02)
+
+        run_task = asyncio.create_task(hub.run())
+        await asyncio.sleep(0.05)
+        assert hub.time_disconnected >= 0.04
+        await hub.stop()
+        await run_task
+        stopped = hub.time_disconnected
+        await asyncio.sleep(0.02)
+        assert hub.time_disconnected == stopped
+
+    @pytest.mark.asyncio
+    async def test_handshake_records_connection(self, hub, mock_transport):
+        hub.running = True
+        hub._mark_disconnected()
+        hub._disconnected_at -= 5
+        hub.handshake.set()
+        hub._mark_connected()
+        assert 5 <= hub.time_disconnected < 6
+        assert hub._disconnected_at is None
+
     @pytest.mark.asyncio
     async def test_stop_already_stopped(self, hub):
         hub.running = False
@@ -797,6 +1731,7 @@ class TestHubDiscover:
 
             mock_client = MagicMock()
             mock_client.connect = AsyncMock()
+            mock_client.connected = False
             mock_client.send = MagicMock()
             mock_client.receive = AsyncMock(side_effect=_receive)
             mock_client.close = AsyncMock()
@@ -826,6 +1761,7 @@ class TestHubDiscover:
 
             mock_client = MagicMock()
             mock_client.connect = AsyncMock()
+            mock_client.connected = False
             mock_client.send = MagicMock()
             mock_client.receive = AsyncMock(side_effect=_receive)
             mock_client.close = AsyncMock()
@@ -884,6 +1820,7 @@ class TestHubDiscover:
 
             mock_client = MagicMock()
             mock_client.connect = AsyncMock()
+            mock_client.connected = False
             mock_client.send = MagicMock()
             mock_client.receive = AsyncMock(side_effect=_receive)
             mock_client.close = AsyncMock()
@@ -906,6 +1843,111 @@ class TestHubDiscover:
 
             assert hubs == []
 
+    @pytest.mark.asyncio
+    async def test_discover_uses_cache(self):
+        cache = DiscoveryCache(ttl=60)
+        cached = Hub("192.168.1.100")
+        cached.id = "hub1"
+        cache.put(cached)
+        new = Hub("192.168.1.101")
+        with (
+            patch.object(aiopulse.transport, "HubTransportUdpBroadcast") as mock_cls,
+            patch.object(
+                Hub, "_interrogate_hub", AsyncMock(return_value=new)
+            ) as interrogate,
+        ):
+            responses = iter(
+                [
+                    (b"response", ("192.168.1.100", 12414)),
+                    (b"response", ("192.168.1.101", 12414)),
+                ]
+            )
+
+            async def _receive():
+                await asyncio.sleep(0.001)
+                try:
+                    return next(responses)
+                except StopIteration:
+                    await asyncio.sleep(10)
+
+            mock_client = MagicMock()
+            mock_client.connect = AsyncMock()
+            mock_client.connected = False
+            mock_client.send = MagicMock()
+            mock_client.receive = AsyncMock(side_effect=_receive)
+            mock_client.close = AsyncMock()
+            mock_cls.return_value = mock_client
+
+            hubs = [hub async for hub in Hub.discover(timeout=0.1, cache=cache)]
+
+        assert hubs == [cached, new]
+        interrogate.assert_awaited_once_with("192.168.1.101")
+        assert cache.get("192.168.1.101") is new
+
+    @pytest.mark.asyncio
+    async def test_discover_reuses_caller_transport(self):
+        async def _receive():
+            await asyncio.sleep(10)
+
+        client = MagicMock()
+        client.connected = True
+        client.connect = AsyncMock()
+        client.receive = AsyncMock(side_effect=_receive)
+        client.close = AsyncMock()
+        with patch.object(aiopulse.transport, "HubTransportUdpBroadcast") as mock_cls:
+            assert [hub async for hub in Hub.discover(0.01, transport=client)] == []
+            assert [
+                hub async for hub in Hub.discover_lazy(0.01, transport=client)
+            ] == []
+
+        mock_cls.assert_not_called()
+        client.connect.assert_not_awaited()
+        client.close.assert_not_awaited()
+        assert client.discard_received.call_count == 2
+        assert client.send.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_discover_lazy_yields_before_interrogation(self):
+        with (
+            patch.object(aiopulse.transport, "HubTransportUdpBroadcast") as mock_cls,
+            patch.object(Hub, "_interrogate_hub", AsyncMock()) as interrogate,
+        ):
+            responses = iter(
+                [
+                    (discover_datagram("hub1"), ("192.168.1.100", 12414)),
+                    (discover_datagram("hub1"), ("192.168.1.100", 12414)),
+                    (b"junk", ("192.168.1.101", 12414)),
+                ]
+            )
+
+            async def _receive():
+                await asyncio.sleep(0.001)
+                try:
+                    return next(responses)
+                except StopIteration:
+                    await asyncio.sleep(10)
+
+            mock_client = MagicMock()
+            mock_client.connect = AsyncMock()
+            mock_client.connected = False
+            mock_client.send = MagicMock()
+            mock_client.receive = AsyncMock(side_effect=_receive)
+            mock_client.close = AsyncMock()
+            mock_cls.return_value = mock_client
+
+            found = [
+                hub
+                async for hub in Hub.discover_lazy(timeout=0.1, max_interrogations=2)
+            ]
+
+        assert [(hub.host, hub.id) for hub in found] == [
+            ("192.168.1.100", "hub1"),
+            ("192.168.1.101", None),
+        ]
+        assert found[0].slots is found[1].slots
+        interrogate.assert_not_awaited()
+        mock_client.close.assert_awaited_once()
+
 
 class TestHubUpdate:
     @pytest.mark.asyncio
@@ -919,4 +1961,5 @@ class TestHubUpdate:
             CommandType.GET_HUB_INFO.to_bytes(4, "big"),
             bytes.fromhex("F000"),
             bytes.fromhex("000000000000FF"),
+            priority=CommandPriority.HOUSEKEEPING,
         )
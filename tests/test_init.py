@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+import pytest
+
+import aiopulse
+
+
+def imported_after(code):
+    """Modules loaded by a fresh interpreter after running code."""
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys\n{code}\nprint(' '.join(sys.modules))"],
+        capture_output=True,
+        check=True,
+        text=True,
+    )
+    return set(result.stdout.split())
+
+
+class TestLazyImports:
+    def test_import_is_lazy(self):
+        modules = imported_after("import aiopulse")
+        assert "aiopulse" in modules
+        assert not {"aiopulse.hub", "aiopulse.transport", "psutil"} & modules
+
+    def test_hub_does_not_import_psutil(self):
+        modules = imported_after("import aiopulse\naiopulse.Hub")
+        assert "aiopulse.hub" in modules
+        assert "psutil" not in modules
+
+    def test_public_attributes(self):
+        from aiopulse.hub import Hub
+
+        assert aiopulse.Hub is Hub
+        for name in aiopulse.__all__:
+            assert getattr(aiopulse, name).__name__ == name
+        assert set(aiopulse.__all__) <= set(dir(aiopulse))
+
+    def test_unknown_attribute(self):
+        with pytest.raises(AttributeError):
+            aiopulse.NoSuchThing  # noqa: B018
@@ -0,0 +1,165 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from aiopulse.errors import NotConnectedException
+from aiopulse.keepalive import PING, Keepalive
+
+
+@pytest.fixture
+def hub():
+    h = MagicMock()
+    h.host = "192.168.1.100"
+    h.handshake = asyncio.Event()
+    h.handshake.set()
+    h.reading_paused = False
+    h.read_pauses = 0
+    h.protocol.send = MagicMock()
+    h.disconnect = AsyncMock(side_effect=h.handshake.clear)
+    return h
+
+
+def answer_pings(hub, keepalive, delay=0.0):
+    """Make the simulated hub reply to each ping after a delay."""
+    loop = asyncio.get_running_loop()
+
+    def send(data):
+        if data == PING:
+            loop.call_later(delay, keepalive.pong_received)
+
+    hub.protocol.send.side_effect = send
+
+
+class TestKeepalive:
+    @pytest.mark.asyncio
+    async def test_measures_rtt(self, hub):
+        keepalive = Keepalive(hub, interval=0.01, timeout=0.5)
+        answer_pings(hub, keepalive, delay=0.02)
+        keepalive.start()
+        await asyncio.sleep(0.1)
+        await keepalive.stop()
+
+        assert keepalive.pongs_received >= 2
+        assert 0.015 <= keepalive.rtt < 0.1
+        assert 0.015 <= keepalive.srtt < 0.1
+        assert keepalive.missed == 0
+
+    @pytest.mark.asyncio
+    async def test_rtt_is_smoothed(self, hub):
+        keepalive = Keepalive(hub, alpha=0.5)
+        loop = asyncio.get_running_loop()
+        for sample in (0.2, 0.1):
+            keepalive.ping()
+            keepalive._sent_at = loop.time() - sample
+            keepalive.pong_received()
+        assert keepalive.rtt == pytest.approx(0.1, abs=0.01)
+        assert keepalive.srtt == pytest.approx(0.15, abs=0.01)
+
+    @pytest.mark.asyncio
+    async def test_unsolicited_pong_is_ignored(self, hub):
+        keepalive = Keepalive(hub)
+        keepalive.pong_received()
+        assert keepalive.pongs_received == 0
+        assert keepalive.rtt is None
+
+    @pytest.mark.asyncio
+    async def test_outstanding_ping_keeps_first_timestamp(self, hub):
+        keepalive = Keepalive(hub)
+        first = keepalive.ping()
+        assert keepalive.ping() is first
+        assert hub.protocol.send.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_dead_link_disconnects(self, hub):
+        keepalive = Keepalive(hub, interval=0.01, timeout=0.01, max_missed=2)
+        keepalive.start()
+        await asyncio.sleep(0.1)
+        await keepalive.stop()
+
+        hub.disconnect.assert_awaited_once()
+        assert keepalive.pongs_missed == 2
+        assert keepalive.dead_links == 1
+
+    @pytest.mark.parametrize(
+        "error", [NotConnectedException("closing"), ConnectionResetError()]
+    )
+    @pytest.mark.asyncio
+    async def test_send_failure_drops_link_and_keeps_running(self, hub, error):
+        keepalive = Keepalive(hub, interval=0.01, timeout=0.5)
+        hub.protocol.send.side_effect = error
+        keepalive.start()
+        await asyncio.sleep(0.05)
+
+        hub.disconnect.assert_awaited_once()
+        assert keepalive.dead_links == 1
+        assert keepalive.running
+
+        # pings resume after the hub reconnects
+        answer_pings(hub, keepalive)
+        hub.handshake.set()
+        await asyncio.sleep(0.05)
+        await keepalive.stop()
+        assert keepalive.pongs_received >= 1
+
+    @pytest.mark.asyncio
+    async def test_no_missed_pings_while_reading_paused(self, hub):
+        keepalive = Keepalive(hub, interval=0.01, timeout=0.01, max_missed=1)
+
+        def send(data):
+            # the hub pauses reading with the reply unread
+            hub.reading_paused = True
+            hub.read_pauses += 1
+
+        hub.protocol.send.side_effect = send
+        keepalive.start()
+        await asyncio.sleep(0.1)
+        await keepalive.stop()
+
+        hub.protocol.send.assert_called_once()
+        hub.disconnect.assert_not_awaited()
+        assert keepalive.pongs_missed == 0
+
+    @pytest.mark.asyncio
+    async def test_pong_resets_missed_count(self, hub):
+        keepalive = Keepalive(hub, interval=0.01, timeout=0.02, max_missed=2)
+        replies = iter([False, True, False, True])
+        loop = asyncio.get_running_loop()
+
+        def send(data):
+            if next(replies, True):
+                loop.call_soon(keepalive.pong_received)
+
+        hub.protocol.send.side_effect = send
+        keepalive.start()
+        await asyncio.sleep(0.15)
+        await keepalive.stop()
+
+        hub.disconnect.assert_not_awaited()
+        assert keepalive.pongs_missed == 2
+
+    @pytest.mark.asyncio
+    async def test_reset_cancels_outstanding_ping(self, hub):
+        keepalive = Keepalive(hub, interval=0.01, timeout=10)
+        keepalive.start()
+        await asyncio.sleep(0.02)
+        assert keepalive._pong is not None
+
+        keepalive.reset()
+        await asyncio.sleep(0)
+        assert keepalive.running
+        await keepalive.stop()
+        assert not keepalive.running
+
+    @pytest.mark.asyncio
+    async def test_no_pings_while_disconnected(self, hub):
+        hub.handshake.clear()
+        keepalive = Keepalive(hub, interval=0.01)
+        keepalive.start()
+        await asyncio.sleep(0.05)
+        await keepalive.stop()
+        hub.protocol.send.assert_not_called()
+
+    def test_invalid_max_missed(self, hub):
+        with pytest.raises(ValueError):
+            Keepalive(hub, max_missed=0)
@@ -0,0 +1,195 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+import aiopulse
+import aiopulse.transport
+from aiopulse import Hub, HubManager
+from aiopulse.const import UpdateType
+
+
+def make_transport():
+    transport = MagicMock(spec=aiopulse.transport.HubTransportTcp)
+    transport.is_udp = False
+    transport.send = MagicMock()
+    transport.close = AsyncMock()
+    return transport
+
+
+def simulated_hub(index, rollers=3):
+    """A hub whose connection and roller list are simulated."""
+    with patch.object(
+        aiopulse.transport, "HubTransportTcp", return_value=make_transport()
+    ):
+        hub = Hub(host=f"10.0.{index // 250}.{index % 250}")
+    hub.keepalive.interval = 3600
+
+    async def connect():
+        hub.id = f"hub{index:03d}"
+        hub.handshake.set()
+
+    async def response_parser():
+        for roller_id in range(1, rollers + 1):
+            roller = hub.rollers.setdefault(
+                roller_id, aiopulse.Roller(hub, roller_id)
+            )
+            roller.battery = 100
+        hub.notify_callback(UpdateType.rollers)
+        while hub.handshake.is_set():
+            await asyncio.sleep(0.01)
+
+    hub.connect = AsyncMock(side_effect=connect)
+    hub.response_parser = response_parser
+    hub.update = AsyncMock()
+    return hub
+
+
+async def wait_for(condition, timeout=2.0):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+class TestHubManager:
+    @pytest.mark.asyncio
+    async def test_add_shares_health_budget(self):
+        manager = HubManager(max_health_polls=3)
+        hubs = [simulated_hub(i) for i in range(2)]
+        for hub in hubs:
+            manager.add(hub)
+        manager.add(hubs[0])
+        assert len(manager) == 2
+        assert list(manager) == hubs
+        assert all(hub.health_scheduler.slots is manager.health_budget for hub in hubs)
+
+    @pytest.mark.asyncio
+    async def test_runs_hubs_and_indexes_rollers(self):
+        manager = HubManager()
+        hub = simulated_hub(1)
+        manager.add(hub)
+        manager.start()
+        await wait_for(lambda: len(manager.rollers) == 3)
+
+        assert manager.roller("hub001", 2) is hub.rollers[2]
+        assert manager.roller("hub001", 9) is None
+        await manager.stop()
+        assert not hub.running
+        assert manager.rollers == {}
+
+    @pytest.mark.asyncio
+    async def test_aggregates_callbacks(self):
+        manager = HubManager()
+        events = []
+
+        async def callback(hub, update_type, roller):
+            events.append((hub, update_type, roller))
+
+        manager.callback_subscribe(callback)
+        hub = simulated_hub(1)
+        manager.add(hub)
+        manager.start()
+        await wait_for(lambda: len(manager.rollers) == 3)
+        await wait_for(lambda: events)
+        assert events[0] == (hub, UpdateType.rollers, None)
+
+        hub.rollers[1].notify_callback()
+        await wait_for(lambda: len(events) == 2)
+        assert events[1] == (hub, UpdateType.rollers, hub.rollers[1])
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_removed_rollers_leave_index(self):
+        manager = HubManager()
+        hub = simulated_hub(1)
+        manager.add(hub)
+        manager.start()
+        await wait_for(lambda: len(manager.rollers) == 3)
+
+        roller = hub.rollers.pop(3)
+        hub.notify_callback(UpdateType.rollers)
+        await wait_for(lambda: len(manager.rollers) == 2)
+        assert not roller._update_callbacks
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_remove_stops_hub(self):
+        manager = HubManager()
+        hub = simulated_hub(1)
+        manager.add(hub)
+        manager.start()
+        await wait_for(lambda: len(manager.rollers) == 3)
+
+        await manager.remove(hub)
+        assert len(manager) == 0
+        assert not hub.running
+        assert manager.rollers == {}
+        assert not hub._update_callbacks
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_add_while_running_starts_hub(self):
+        manager = HubManager()
+        manager.start()
+        hub = simulated_hub(1)
+        manager.add(hub)
+        await wait_for(lambda: hub.running and len(manager.rollers) == 3)
+        await manager.stop()
+
+    @pytest.mark.asyncio
+    async def test_forwards_batches(self):
+        manager = HubManager()
+        events = []
+        manager.callback_subscribe(lambda *args: events.append(args))
+        hub = simulated_hub(1)
+        hub.batch_notifications = True
+        manager.add(hub)
+        manager.start()
+        await wait_for(lambda: len(manager.rollers) == 3 and events)
+        events.clear()
+
+        roller = hub.rollers.setdefault(9, aiopulse.Roller(hub, 9))
+        hub._list_changed(UpdateType.rollers, [roller])
+        await wait_for(lambda: events)
+        assert events[-1][:2] == (hub, UpdateType.batch)
+        assert events[-1][2].changed == {UpdateType.rollers: {roller}}
+        assert manager.roller("hub001", 9) is roller
+        await manager.stop()
+
+
+class TestHubManagerLoad:
+    @pytest.mark.asyncio
+    async def test_hundred_hubs(self):
+        hub_count, rollers = 100, 5
+        manager = HubManager(max_health_polls=4)
+        events = []
+        manager.callback_subscribe(lambda *args: events.append(args))
+
+        active = peak = 0
+
+        async def get_health():
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.005)
+            active -= 1
+
+        for index in range(hub_count):
+            hub = simulated_hub(index, rollers)
+            hub.health_scheduler.initial_spread = 0.1
+            hub.health_scheduler.rescan = 0.01
+            manager.add(hub)
+        manager.start()
+        await wait_for(lambda: len(manager.rollers) == hub_count * rollers, 10)
+        for roller in manager.rollers.values():
+            roller.get_health = get_health
+        await wait_for(
+            lambda: sum(hub.health_scheduler.polls for hub in manager)
+            >= hub_count * rollers,
+            10,
+        )
+        await manager.stop()
+
+        assert all(not hub.running for hub in manager)
+        assert 1 < peak <= 4
+        await wait_for(lambda: len(events) >= hub_count, 5)
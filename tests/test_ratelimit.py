@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from aiopulse.batch import ChangeBatch
+from aiopulse.const import UpdateType
+from aiopulse.ratelimit import RateLimiter
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [{}, {"max_rate": 1, "debounce": 1}, {"max_rate": 0}, {"debounce": -1}],
+)
+def test_invalid_limits(kwargs):
+    with pytest.raises(ValueError):
+        RateLimiter(print, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_max_rate_leading_and_trailing():
+    calls = []
+    limiter = RateLimiter(lambda *args: calls.append(args), max_rate=20)
+    limiter.notify("roller", 1)
+    assert calls == [("roller", 1)]
+    limiter.notify("roller", 2)
+    limiter.notify("roller", 3)
+    assert calls == [("roller", 1)]
+    await asyncio.sleep(0.1)
+    assert calls == [("roller", 1), ("roller", 2), ("roller", 3)]
+    assert limiter.received == 3
+    assert limiter.delivered == 3
+    assert limiter.saved == 0
+
+
+@pytest.mark.asyncio
+async def test_max_rate_merges_same_args():
+    calls = []
+    limiter = RateLimiter(calls.append, max_rate=20)
+    for roller in ["a", "b", "a", "a", "b", "c"]:
+        limiter.notify(roller)
+    assert calls == ["a"]
+    assert limiter.saved == 2
+    await asyncio.sleep(0.1)
+    # a held notification moves to the back when it is replaced
+    assert calls == ["a", "a", "b", "c"]
+    assert limiter.received == 6
+    assert limiter.delivered == 4
+    assert limiter.saved == 2
+
+
+@pytest.mark.asyncio
+async def test_max_rate_spaces_deliveries():
+    loop = asyncio.get_running_loop()
+    times = []
+    limiter = RateLimiter(lambda: times.append(loop.time()), max_rate=50)
+    for _ in range(3):
+        limiter.notify()
+        await asyncio.sleep(0.005)
+    await asyncio.sleep(0.05)
+    assert len(times) == 2
+    assert times[1] - times[0] >= 0.019
+    assert limiter.saved == 1
+
+
+@pytest.mark.asyncio
+async def test_debounce_waits_for_quiet():
+    calls = []
+    limiter = RateLimiter(calls.append, debounce=0.03)
+    for _ in range(3):
+        limiter.notify("a")
+        await asyncio.sleep(0.01)
+    assert calls == []
+    await asyncio.sleep(0.05)
+    assert calls == ["a"]
+    assert limiter.saved == 2
+
+
+@pytest.mark.asyncio
+async def test_batches_are_merged():
+    calls = []
+    limiter = RateLimiter(lambda *args: calls.append(args), max_rate=20)
+    for index in range(20):
+        batch = ChangeBatch()
+        batch.add(UpdateType.rollers, index % 3, frozenset({f"field{index}"}))
+        limiter.notify("hub", UpdateType.batch, batch)
+    assert len(calls) == 1
+    await asyncio.sleep(0.1)
+    assert len(calls) == 2
+    hub, update_type, merged = calls[1]
+    assert (hub, update_type) == ("hub", UpdateType.batch)
+    assert merged.changed == {UpdateType.rollers: {0, 1, 2}}
+    assert merged.fields[1] == {f"field{index}" for index in range(1, 20, 3)}
+    assert limiter.received == 20
+    assert limiter.delivered == 2
+    assert limiter.saved == 18
+
+
+@pytest.mark.asyncio
+async def test_unhashable_args_are_not_merged():
+    calls = []
+    limiter = RateLimiter(calls.append, debounce=0.01)
+    limiter.notify([1])
+    limiter.notify([1])
+    await asyncio.sleep(0.03)
+    assert calls == [[1], [1]]
+    assert limiter.saved == 0
+
+
+@pytest.mark.asyncio
+async def test_cancel_drops_held():
+    calls = []
+    limiter = RateLimiter(calls.append, debounce=0.01)
+    limiter.notify("a")
+    limiter.cancel()
+    await asyncio.sleep(0.03)
+    assert calls == []
@@ -0,0 +1,42 @@
+import pytest
+
+from aiopulse.reconnect import ReconnectPolicy
+
+
+class TestReconnectPolicy:
+    def test_first_retry_is_immediate(self):
+        assert ReconnectPolicy().delay(0) == 0
+
+    def test_exponential_backoff(self):
+        policy = ReconnectPolicy(base=1, factor=2, maximum=300, jitter=0)
+        assert [policy.delay(n) for n in range(1, 6)] == [1, 2, 4, 8, 16]
+
+    def test_backoff_is_capped(self):
+        policy = ReconnectPolicy(base=1, factor=2, maximum=30, jitter=0)
+        assert policy.delay(10) == 30
+        assert policy.delay(1000) == 30
+
+    def test_huge_failure_count_is_capped(self):
+        policy = ReconnectPolicy(base=1, factor=2, maximum=300, jitter=0)
+        assert policy.delay(1030) == 300
+        assert policy.delay(10**6) == 300
+
+    def test_jitter_spreads_delay(self):
+        policy = ReconnectPolicy(base=10, maximum=10, jitter=0.5)
+        delays = {policy.delay(1) for _ in range(50)}
+        assert all(5 <= delay <= 15 for delay in delays)
+        assert len(delays) > 1
+
+    @pytest.mark.parametrize(
+        "kwargs",
+        [
+            {"base": -1},
+            {"base": 10, "maximum": 5},
+            {"factor": 0.5},
+            {"jitter": 1.5},
+            {"stable_after": -1},
+        ],
+    )
+    def test_invalid_arguments(self, kwargs):
+        with pytest.raises(ValueError):
+            ReconnectPolicy(**kwargs)
@@ -1,4 +1,3 @@
-import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -17,8 +16,6 @@ class TestRoller:
     @pytest.fixture
     def roller(self, hub_mock):
         r = Roller(hub_mock, 123)
-        r.health_task = MagicMock()  # prevent actual health updater from running
-        r.health_lock = asyncio.Lock()
         yield r
 
     def test_init(self, roller):
@@ -84,6 +81,16 @@ class TestRoller:
         await roller.move_to(50)
         roller.hub.send_command.assert_awaited_once()
 
+    @pytest.mark.asyncio
+    async def test_move_to_payload(self, roller):
+        roller.hub.send_command = AsyncMock()
+        await roller.move_to(50)
+        command, message_type, message = roller.hub.send_command.call_args.args
+        assert command == bytes.fromhex("34000090")
+        assert message_type == bytes.fromhex("2201")
+        assert bytes(message[-3:]) == b"\x32\x00\xff"
+        assert roller.commands is roller.commands
+
     @pytest.mark.asyncio
     async def test_move_up(self, roller):
         roller.hub.send_command = AsyncMock()
@@ -104,23 +111,11 @@ class TestRoller:
 
     @pytest.mark.asyncio
     async def test_get_health(self, roller):
-        roller.hub.send_healthcheck = AsyncMock()
-        await roller.get_health()
+        roller.hub.send_healthcheck = AsyncMock(return_value=False)
+        assert await roller.get_health() is False
         roller.hub.send_healthcheck.assert_awaited_once()
+        assert roller.hub.send_healthcheck.call_args.kwargs["roller_id"] == 123
 
-    def test_health_updated_releases_lock(self, roller):
-        async def do_test():
-            await roller.health_lock.acquire()
-            roller.health_updated()
-            assert not roller.health_lock.locked()
-
-        asyncio.run(do_test())
-
-    def test_health_updated_no_lock(self, roller):
-        roller.health_updated()
-        assert not roller.health_lock.locked()
-
-    def test_del_cancels_task(self, roller):
-        roller.health_task = MagicMock()
-        roller.__del__()
-        roller.health_task.cancel.assert_called_once()
+    def test_init_does_not_schedule_health_task(self, hub_mock):
+        Roller(hub_mock, 124)
+        hub_mock._schedule_callback.assert_not_called()
@@ -78,3 +78,18 @@ class TestRoom:
         room.hub.send_command = AsyncMock()
         await room.move_down()
         room.hub.send_command.assert_awaited_once()
+
+    def test_commands_non_ascii_id(self, hub_mock):
+        room = Room(hub_mock, b"\x01\x02\x03\x04\x05")
+        assert room.commands.target_id == int.from_bytes(
+            b"\x01\x02\x03\x04\x05", "little"
+        )
+        assert room.commands.up[10:16] == b"\x01\x02\x03\x04\x05\x00"
+
+    @pytest.mark.asyncio
+    async def test_move_key_separate_from_rollers(self, room):
+        room.hub.send_command = AsyncMock()
+        await room.move_to(50)
+        await room.move_stop()
+        keys = [call.kwargs["key"] for call in room.hub.send_command.await_args_list]
+        assert keys == [("room", 1), ("room", 1)]
@@ -0,0 +1,140 @@
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+import aiopulse
+import aiopulse.const as const
+import aiopulse.snapshot as snapshot
+import aiopulse.transport
+from aiopulse import Hub
+
+
+@pytest.fixture
+def populated_hub(hub):
+    hub.id = "b123"
+    hub.firmware_name = "Firm v1"
+    hub.mac_address = "AA:BB:CC:DD:EE:FF"
+    room = hub.rooms[b"\x01\x01\x01\x01"] = aiopulse.Room(hub, b"\x01\x01\x01\x01")
+    room.name = "Living"
+    room.icon = 3
+    roller = hub.rollers[1] = aiopulse.Roller(hub, 1)
+    roller.name = "Blind1"
+    roller.serial = "S1"
+    roller.type = 1
+    roller.room_id = room.id
+    roller.room = room
+    roller.closed_percent = 100
+    roller.flags = 0x12
+    roller.battery = 87
+    scene = hub.scenes[b"\x02\x02\x02\x02"] = aiopulse.Scene(hub, b"\x02\x02\x02\x02")
+    scene.name = "Evening"
+    scene.icon = 2
+    for timer_id, entity in ((b"\x03", roller), (b"\x04", scene)):
+        timer = hub.timers[timer_id] = aiopulse.Timer(hub, timer_id)
+        timer.name = "Morning"
+        timer.state = 1
+        timer.hour = 7
+        timer.minute = 30
+        timer.days = 0b1111100
+        timer.entity = entity
+    return hub
+
+
+@pytest.fixture
+def fresh_hub(event_loop, mock_transport):
+    with patch.object(
+        aiopulse.transport, "HubTransportTcp", return_value=mock_transport
+    ):
+        h = Hub(host="192.168.1.100", loop=event_loop)
+        h._schedule_callback = MagicMock()
+        yield h
+
+
+class TestSnapshot:
+    def test_round_trip(self, populated_hub, fresh_hub, tmp_path):
+        path = tmp_path / "hub.json"
+        populated_hub.save_snapshot(path)
+        assert fresh_hub.load_snapshot(path) is True
+
+        assert fresh_hub.id == "b123"
+        assert fresh_hub.firmware_name == "Firm v1"
+        assert fresh_hub.mac_address == "AA:BB:CC:DD:EE:FF"
+        for name in ("rooms", "rollers", "scenes", "timers"):
+            old = getattr(populated_hub, name)
+            new = getattr(fresh_hub, name)
+            assert new.keys() == old.keys()
+            for key, entity in new.items():
+                assert entity.hub is fresh_hub
+                assert entity.field_values()[:2] == old[key].field_values()[:2]
+        roller = fresh_hub.rollers[1]
+        assert roller.field_values() == populated_hub.rollers[1].field_values()
+        assert roller.room is fresh_hub.rooms[b"\x01\x01\x01\x01"]
+        assert fresh_hub.timers[b"\x03"].entity is roller
+        assert fresh_hub.timers[b"\x04"].entity is fresh_hub.scenes[b"\x02\x02\x02\x02"]
+
+    def test_snapshot_is_compact_json(self, populated_hub, tmp_path):
+        path = tmp_path / "hub.json"
+        populated_hub.save_snapshot(path)
+        text = path.read_text()
+        assert ": " not in text and ", " not in text
+        assert json.loads(text)["v"] == snapshot.SNAPSHOT_VERSION
+        assert not (tmp_path / "hub.json.tmp").exists()
+
+    def test_load_notifies_each_list_once(self, populated_hub, fresh_hub, tmp_path):
+        path = tmp_path / "hub.json"
+        populated_hub.save_snapshot(path)
+        fresh_hub.callback_subscribe(MagicMock())
+        fresh_hub.load_snapshot(path)
+        updates = [call.args[1] for call in fresh_hub._schedule_callback.call_args_list]
+        assert updates == [
+            const.UpdateType.rooms,
+            const.UpdateType.rollers,
+            const.UpdateType.scenes,
+            const.UpdateType.timers,
+        ]
+
+    def test_load_notifies_only_changes(self, populated_hub, fresh_hub, tmp_path):
+        path = tmp_path / "hub.json"
+        populated_hub.save_snapshot(path)
+        fresh_hub.load_snapshot(path)
+        roller = fresh_hub.rollers[1]
+        assert roller.changed_fields >= {"name", "battery"}
+
+        fresh_hub.callback_subscribe(MagicMock())
+        fresh_hub._schedule_callback.reset_mock()
+        roller.battery = 10
+        fresh_hub.load_snapshot(path)
+        updates = [call.args[1] for call in fresh_hub._schedule_callback.call_args_list]
+        assert updates == [const.UpdateType.rollers]
+        assert roller.changed_fields == {"battery"}
+        assert fresh_hub.duplicate_updates[const.UpdateType.rooms] == 1
+
+    def test_missing_file(self, fresh_hub, tmp_path):
+        assert fresh_hub.load_snapshot(tmp_path / "missing.json") is False
+
+    def test_corrupt_file(self, fresh_hub, tmp_path, caplog):
+        path = tmp_path / "hub.json"
+        path.write_text("{not json")
+        assert fresh_hub.load_snapshot(path) is False
+        assert "Couldn't read snapshot" in caplog.text
+
+    def test_unknown_version(self, fresh_hub, tmp_path):
+        path = tmp_path / "hub.json"
+        path.write_text(json.dumps({"v": 99}))
+        assert fresh_hub.load_snapshot(path) is False
+
+    def test_malformed_entry(self, populated_hub, fresh_hub, tmp_path, caplog):
+        data = snapshot.dump(populated_hub)
+        data["rollers"][0] = data["rollers"][0][:3]
+        path = tmp_path / "hub.json"
+        path.write_text(json.dumps(data))
+        assert fresh_hub.load_snapshot(path) is False
+        assert "Malformed snapshot" in caplog.text
+
+    def test_other_hub_is_rejected(self, populated_hub, fresh_hub, tmp_path):
+        path = tmp_path / "hub.json"
+        populated_hub.save_snapshot(path)
+        fresh_hub.id = "other"
+        assert fresh_hub.load_snapshot(path) is False
+        assert fresh_hub.rollers == {}
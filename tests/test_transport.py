@@ -1,16 +1,76 @@
 import asyncio
+import socket
+import threading
+from types import SimpleNamespace
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
+from aiopulse.const import HEADER
 from aiopulse.errors import NotConnectedException
 from aiopulse.transport import (
     HubTransportBase,
     HubTransportTcp,
     HubTransportUdp,
     HubTransportUdpBroadcast,
+    StreamFramer,
 )
 
+PING = HEADER + b"\x03\x00\x00\x16"
+
+
+def _if_addr(address, family=socket.AF_INET):
+    return SimpleNamespace(address=address, family=family)
+
+
+class TestStreamFramer:
+    @pytest.fixture
+    def framer(self):
+        return StreamFramer()
+
+    def test_complete_frame(self, framer):
+        assert framer.feed(PING) == PING
+        assert framer.frames_received == 1
+        assert framer.frames_reassembled == 0
+        assert framer.pending == 0
+
+    def test_multiple_frames(self, framer):
+        assert framer.feed(PING + PING) == PING + PING
+        assert framer.frames_received == 2
+
+    def test_split_frame(self, framer):
+        assert framer.feed(PING[:6]) == b""
+        assert framer.pending == 6
+        assert framer.feed(PING[6:]) == PING
+        assert framer.frames_reassembled == 1
+        assert framer.pending == 0
+
+    def test_split_header(self, framer):
+        assert framer.feed(PING[:2]) == b""
+        assert framer.feed(PING[2:] + PING[:5]) == PING
+        assert framer.feed(PING[5:]) == PING
+        assert framer.frames_reassembled == 2
+
+    def test_multi_block_frame(self, framer):
+        frame = HEADER + b"\x80\x02" + b"\x00" * 256
+        assert framer.feed(frame[:100]) == b""
+        assert framer.feed(frame[100:]) == frame
+
+    def test_garbage_dropped(self, framer):
+        assert framer.feed(b"\xff\xff" + PING + b"\x01" + PING) == PING + PING
+        assert framer.bytes_dropped == 3
+
+    def test_garbage_without_header(self, framer):
+        assert framer.feed(b"\xff" * 10) == b""
+        assert framer.bytes_dropped == 7
+        assert framer.pending == 3
+
+    def test_reset(self, framer):
+        framer.feed(PING[:6])
+        framer.reset()
+        assert framer.pending == 0
+        assert framer.bytes_dropped == 6
+
 
 class TestHubTransportBase:
     def test_init(self):
@@ -107,7 +167,8 @@ class TestHubTransportUdpBroadcast:
     async def test_connect(self):
         transport = HubTransportUdpBroadcast()
         with patch.object(asyncio, "get_running_loop") as mock_get_loop, \
-             patch("socket.socket") as mock_socket:
+             patch("socket.socket") as mock_socket, \
+             patch.object(transport, "read_interfaces", return_value=[]):
             mock_loop = MagicMock()
             mock_get_loop.return_value = mock_loop
             mock_sock_instance = MagicMock()
@@ -122,6 +183,106 @@ class TestHubTransportUdpBroadcast:
             mock_loop.create_datagram_endpoint.assert_called_once()
 
 
+    @pytest.mark.asyncio
+    async def test_interfaces_read_once(self):
+        transport = HubTransportUdpBroadcast()
+        with patch(
+            "psutil.net_if_addrs", return_value={
+                "lo": [_if_addr("127.0.0.1")],
+                "eth0": [_if_addr("10.0.0.24"), _if_addr("fe80::1", socket.AF_INET6)],
+                "eth1": [_if_addr("169.254.3.4")],
+            }
+        ) as net_if_addrs:
+            await transport.connect()
+            try:
+                transport.send(b"one")
+                transport.send(b"two")
+                assert transport.interfaces == ["10.0.0.24"]
+                net_if_addrs.assert_called_once()
+            finally:
+                await transport.close()
+        assert transport.endpoints == {}
+
+    @pytest.mark.asyncio
+    async def test_send_on_every_endpoint(self):
+        transport = HubTransportUdpBroadcast()
+        transport.transport = MagicMock()
+        transport.endpoints = {"10.0.0.24": MagicMock(), "10.1.0.24": MagicMock()}
+        transport.host = "255.255.255.255"
+        transport.send(b"data")
+        for endpoint in transport.endpoints.values():
+            endpoint.sendto.assert_called_once_with(
+                b"data", ("255.255.255.255", 12414)
+            )
+        transport.transport.sendto.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_send_without_endpoints_uses_main_socket(self):
+        transport = HubTransportUdpBroadcast()
+        transport.transport = MagicMock()
+        transport.host = "255.255.255.255"
+        transport.send(b"data")
+        transport.transport.sendto.assert_called_once_with(
+            b"data", ("255.255.255.255", 12414)
+        )
+
+    @pytest.mark.asyncio
+    async def test_refresh_closes_gone_interfaces(self):
+        transport = HubTransportUdpBroadcast()
+        gone = MagicMock()
+        kept = MagicMock()
+        transport.endpoints = {"10.0.0.24": kept, "10.9.0.1": gone}
+        with patch.object(transport, "read_interfaces", return_value=["10.0.0.24"]):
+            await transport.refresh_interfaces()
+        gone.close.assert_called_once()
+        kept.close.assert_not_called()
+        assert transport.endpoints == {"10.0.0.24": kept}
+
+    @pytest.mark.asyncio
+    async def test_interfaces_read_off_loop(self):
+        transport = HubTransportUdpBroadcast()
+        threads = []
+
+        def read_interfaces():
+            threads.append(threading.get_ident())
+            return []
+
+        with patch.object(transport, "read_interfaces", side_effect=read_interfaces):
+            await transport.refresh_interfaces()
+        assert threads and threads[0] != threading.get_ident()
+
+    @pytest.mark.asyncio
+    async def test_connected_and_discard_received(self):
+        transport = HubTransportUdpBroadcast()
+        assert not transport.connected
+        with patch.object(transport, "read_interfaces", return_value=[]):
+            await transport.connect(host="127.0.0.1")
+        try:
+            assert transport.connected
+            transport.datagram_received(b"stale", ("10.0.0.5", 12414))
+            transport.discard_received()
+            assert transport.receive_queue.empty()
+        finally:
+            await transport.close()
+        assert not transport.connected
+
+    @pytest.mark.asyncio
+    async def test_endpoint_forwards_replies(self):
+        transport = HubTransportUdpBroadcast()
+        with patch.object(transport, "read_interfaces", return_value=["127.0.0.1"]):
+            await transport.connect(host="127.0.0.1")
+            await transport.refresh_interfaces()
+        try:
+            endpoint = transport.endpoints["127.0.0.1"]
+            endpoint.get_protocol().datagram_received(b"reply", ("10.0.0.5", 12414))
+            assert transport.receive_queue.get_nowait() == (
+                b"reply",
+                ("10.0.0.5", 12414),
+            )
+        finally:
+            await transport.close()
+
+
 class TestHubTransportTcp:
     @pytest.fixture
     def tcp(self):
@@ -207,13 +368,37 @@ class TestHubTransportTcp:
         mock_writer.is_closing.return_value = False
         tcp.writer = mock_writer
         mock_reader = AsyncMock()
-        mock_reader.read.return_value = b"response"
+        mock_reader.read.return_value = PING
         tcp.reader = mock_reader
 
         result = await tcp.receive()
-        assert result == b"response"
+        assert result == PING
         mock_reader.read.assert_called_once_with(65535)
 
+    @pytest.mark.asyncio
+    async def test_receive_reassembles_split_frame(self, tcp):
+        mock_writer = MagicMock()
+        mock_writer.is_closing.return_value = False
+        tcp.writer = mock_writer
+        mock_reader = AsyncMock()
+        mock_reader.read.side_effect = [PING[:3], PING[3:] + PING[:1], PING[1:]]
+        tcp.reader = mock_reader
+
+        assert await tcp.receive() == PING
+        assert await tcp.receive() == PING
+        assert tcp.framer.frames_reassembled == 2
+
+    @pytest.mark.asyncio
+    async def test_receive_eof(self, tcp):
+        mock_writer = MagicMock()
+        mock_writer.is_closing.return_value = False
+        tcp.writer = mock_writer
+        mock_reader = AsyncMock()
+        mock_reader.read.return_value = b""
+        tcp.reader = mock_reader
+
+        assert await tcp.receive() == b""
+
     @pytest.mark.asyncio
     async def test_receive_writer_closing(self, tcp):
         mock_writer = MagicMock()
@@ -3,7 +3,9 @@ from aiopulse.utils import (
     pack_int,
     unpack_bytes,
     unpack_int,
+    unpack_roller_health,
     unpack_roller_percent,
+    unpack_roller_state,
     unpack_string,
 )
 
@@ -122,3 +124,52 @@ class TestUnpackRollerPercent:
         percent, ptr = unpack_roller_percent(buffer, 0)
         assert percent == 50
         assert ptr == 11
+
+
+class TestUnpackRollerState:
+    # roller id, 4 unknown, state, 5 unknown, percent, flags
+    ROLLER_ID = b"\x01\x02\x03\x04\x05\x06"
+
+    def _state(self, state, percent=0, flags=0):
+        unknown = b"\x00" * 4
+        return self.ROLLER_ID + unknown + state + unknown + b"\x00" + bytes(
+            [percent, flags]
+        )
+
+    def test_roller_open(self):
+        roller_id, percent, flags, ptr = unpack_roller_state(self._state(b"\x10"), 0)
+        assert roller_id == 0x060504030201
+        assert percent == 0
+        assert ptr == 18
+
+    def test_roller_closed(self):
+        _, percent, _, _ = unpack_roller_state(self._state(b"\x12"), 0)
+        assert percent == 100
+
+    def test_roller_percent_and_flags(self):
+        buffer = b"\xff\xff" + self._state(b"\x00", 42, 0b101)
+        _, percent, flags, ptr = unpack_roller_state(memoryview(buffer), 2)
+        assert percent == 42
+        assert flags == 0b101
+        assert ptr == 20
+
+    def test_short_buffer_matches_field_helpers(self):
+        buffer = self._state(b"\x12")[:-1]
+        roller_id, percent, flags, ptr = unpack_roller_state(buffer, 0)
+        assert (roller_id, percent, flags, ptr) == (0x060504030201, 100, 0, 18)
+
+
+class TestUnpackRollerHealth:
+    def test_unpack_health(self):
+        buffer = b"\x01" + b"\x00" * 5 + b"\x00" * 18 + b"\x0c\x80" + b"\x00" * 8
+        roller_id, charge, ptr = unpack_roller_health(buffer, 0)
+        assert roller_id == 1
+        assert charge == 12.5
+        assert ptr == 34
+
+    def test_short_buffer(self):
+        buffer = b"\x01" + b"\x00" * 5 + b"\x00" * 18 + b"\x0a"
+        roller_id, charge, ptr = unpack_roller_health(buffer, 0)
+        assert roller_id == 1
+        assert charge == 10.0
+        assert ptr == 34